@@ -1,67 +1,99 @@
 import zipfile
 import sqlite3
 import os
+import logging
+import hashlib
+import json
+import tempfile
+import time
+from itertools import islice
+from metrics import span
+from search import split_meaning
+from wordbank import WordBank, BATCH
 
-def extract_apkg(apkg_path, extract_dir):
-    """Extract the .apkg file to a directory."""
-    with zipfile.ZipFile(apkg_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_dir)
+logger = logging.getLogger(__name__)
 
-def read_anki_database(db_path):
-    """Read the Anki SQLite database and extract card data."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Tag prefix export_apkg uses to record each note's level
+LEVEL_TAG = "xilanhua::"
+# Note layout convert_anki_to_wordbank reads: number, word, (traditional), pinyin, meaning
+NOTE_FIELDS = ["Number", "Simplified", "Traditional", "Pinyin", "Meaning"]
 
-    cursor.execute("SELECT id, flds FROM notes")
-    notes = cursor.fetchall()
+# Anki collection schema 11, as found in collection.anki2
+ANKI_SCHEMA = """
+CREATE TABLE col (id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null, conf text not null,
+    models text not null, decks text not null, dconf text not null, tags text not null);
+CREATE TABLE notes (id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null, csum integer not null,
+    flags integer not null, data text not null);
+CREATE TABLE cards (id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null, due integer not null,
+    ivl integer not null, factor integer not null, reps integer not null, lapses integer not null,
+    left integer not null, odue integer not null, odid integer not null, flags integer not null, data text not null);
+CREATE TABLE revlog (id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+"""
+ANKI_INDEXES = """
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+"""
 
-    cards = []
-    for note in notes:
-        note_id, flds = note
-        fields = flds.split("\x1f")  # Anki uses \x1f (ASCII unit separator) to split fields
-        
-        if len(cards) < 3:  
-            print(f"Card {len(cards)+1} fields:")
-            for i, field in enumerate(fields):
-                print(f"  Field {i+1}: {field}")
-        
-        cards.append({
-            "id": note_id,
-            "fields": fields  
-        })
+@span("anki_extract")
+def extract_apkg(apkg, extract_dir, members=None):
+    """Extract the .apkg (a path or binary file object) to a directory.
+    `members` limits extraction to those archive entries."""
+    with zipfile.ZipFile(apkg, 'r') as zip_ref:
+        zip_ref.extractall(extract_dir, members)
+
+def iter_anki_notes(db_path):
+    """Yield the notes of an Anki SQLite database one at a time as card dicts."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute("SELECT id, flds, tags FROM notes")
+        for count, (note_id, flds, tags) in enumerate(cursor):
+            fields = flds.split("\x1f")  # Anki uses \x1f (ASCII unit separator) to split fields
+            
+            if count < 3:  
+                logger.debug("Card %d fields: %s", count + 1, fields)
+            
+            yield {
+                "id": note_id,
+                "fields": fields,
+                "tags": tags.split()
+            }
+    finally:
+        conn.close()
 
-    conn.close()
-    return cards
+@span("anki_parse")
+def read_anki_database(db_path):
+    """Read the Anki SQLite database and extract card data."""
+    return list(iter_anki_notes(db_path))
 
-def import_anki_deck(apkg_path):
-    """Import an Anki deck from a .apkg file."""
-    extract_dir = "extracted_anki"
+def extract_collection(apkg, extract_dir):
+    """Unpack just the deck's database and return its path."""
     os.makedirs(extract_dir, exist_ok=True)
 
-    extract_apkg(apkg_path, extract_dir)
-
-    db_path = os.path.join(extract_dir, "collection.anki2")
-    if not os.path.exists(db_path):
+    # Only the database is needed; the media files can be far larger
+    try:
+        extract_apkg(apkg, extract_dir, ["collection.anki2"])
+    except KeyError:
         raise FileNotFoundError("Anki database not found in the extracted files.")
 
-    cards = read_anki_database(db_path)
-    return cards
-def convert_anki_to_wordbank(cards, default_level="beginner"):
-    """
-    Convert Anki cards to the word bank format used by the API.
-    
-    Args:
-        cards: List of card dictionaries from import_anki_deck
-        default_level: Default level to assign cards if not specified in the card
-    
-    Returns:
-        Dictionary with 'beginner' and 'intermediate' lists of word entries
-    """
-    word_bank = {
-        "beginner": [],
-        "intermediate": []
-    }
-    
+    return os.path.join(extract_dir, "collection.anki2")
+
+def import_anki_deck(apkg, extract_dir="extracted_anki"):
+    """Import an Anki deck from a .apkg file (a path or binary file object)."""
+    return read_anki_database(extract_collection(apkg, extract_dir))
+
+def iter_anki_entries(cards):
+    """Yield (level, entry) for every card that has the fields a word entry needs."""
     for card in cards:
         fields = card["fields"]
         
@@ -78,29 +110,148 @@ def convert_anki_to_wordbank(cards, default_level="beginner"):
             
             card_number = int(fields[0]) if fields[0].isdigit() else 0
             level = "beginner" if card_number <= 100 else "intermediate"
+            # Decks written by export_apkg record the level as a tag
+            for tag in card.get("tags", ()):
+                if tag.startswith(LEVEL_TAG) and tag[len(LEVEL_TAG):] in ("beginner", "intermediate"):
+                    level = tag[len(LEVEL_TAG):]
             
-            word_entry = {
+            yield level, {
                 "word": word,
                 "meaning": meaning
             }
-            
-            word_bank[level].append(word_entry)
+
+@span("anki_convert")
+def convert_anki_to_wordbank(cards, default_level="beginner"):
+    """
+    Convert Anki cards to the word bank format used by the API.
+    
+    Args:
+        cards: Card dictionaries from import_anki_deck or iter_anki_notes
+        default_level: Default level to assign cards if not specified in the card
+    
+    Returns:
+        Dictionary with 'beginner' and 'intermediate' WordBanks of word entries
+    """
+    word_bank = {
+        "beginner": WordBank(),
+        "intermediate": WordBank()
+    }
+    pending = {level: [] for level in word_bank}
+    
+    for level, word_entry in iter_anki_entries(cards):
+        pending[level].append(word_entry)
+        if len(pending[level]) == BATCH:
+            word_bank[level].extend(pending[level])
+            pending[level] = []
     
+    for level, entries in pending.items():
+        word_bank[level].extend(entries)
     return word_bank
 
-def import_anki_to_wordbank(apkg_path, default_level="beginner"):
+def import_anki_to_wordbank(apkg, default_level="beginner", extract_dir="extracted_anki"):
     """
     Import an Anki deck and convert it to the word bank format.
     
     Args:
-        apkg_path: Path to the .apkg file
+        apkg: Path to the .apkg file, or a binary file object
         default_level: Default level to assign cards if not specified
+        extract_dir: Where to unpack the deck's database
         
     Returns:
         Word bank dictionary ready for the API
     """
-    cards = import_anki_deck(apkg_path)
-    return convert_anki_to_wordbank(cards, default_level)
+    db_path = extract_collection(apkg, extract_dir)
+    return convert_anki_to_wordbank(iter_anki_notes(db_path), default_level)
+
+def _collection_row(now, deck_id, model_id, deck_name):
+    """The single `col` row: configuration, the note type and the deck as Anki's JSON."""
+    model = {
+        "id": model_id, "name": "Xilanhua", "type": 0, "mod": now, "usn": -1, "sortf": 0,
+        "did": deck_id, "tags": [], "vers": [], "req": [[0, "any", [1]]],
+        "flds": [{"name": name, "ord": i, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+                 for i, name in enumerate(NOTE_FIELDS)],
+        "tmpls": [{"name": "Card 1", "ord": 0, "qfmt": "{{Simplified}}",
+                   "afmt": "{{FrontSide}}<hr id=answer>{{Pinyin}}<br>{{Meaning}}",
+                   "did": None, "bqfmt": "", "bafmt": ""}],
+        "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+        "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+    }
+    deck = {
+        "id": deck_id, "name": deck_name, "mod": now, "usn": -1, "desc": "", "dyn": 0, "conf": 1,
+        "collapsed": False, "extendNew": 10, "extendRev": 50,
+        "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+    }
+    default_deck = dict(deck, id=1, name="Default")
+    options = {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+        "replayq": True, "dyn": False,
+        "new": {"delays": [1, 10], "ints": [1, 4, 7], "initialFactor": 2500, "order": 1, "perDay": 20},
+        "rev": {"perDay": 200, "ease4": 1.3, "fuzz": 0.05, "maxIvl": 36500},
+        "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 0},
+    }
+    conf = {"nextPos": 1, "estTimes": True, "activeDecks": [1], "sortType": "noteFld", "timeLim": 0,
+            "sortBackwards": False, "addToCur": True, "curDeck": 1, "newBury": True, "newSpread": 0,
+            "dueCounts": True, "curModel": str(model_id), "collapseTime": 1200}
+    return (1, now, now, now * 1000, 11, 0, 0, 0, json.dumps(conf), json.dumps({str(model_id): model}),
+            json.dumps({"1": default_deck, str(deck_id): deck}), json.dumps({"1": options}), "{}")
+
+@span("anki_export")
+def export_apkg(rows, path, deck_name="Xilanhua"):
+    """
+    Write word-bank rows to an Anki .apkg that import_anki_to_wordbank reads back.
+    
+    collection.anki2 is filled a batch of notes per transaction, so memory stays
+    flat however large the bank is.
+    
+    Args:
+        rows: Iterable of (level, word, meaning)
+        path: Where to write the .apkg
+        deck_name: Name of the deck inside Anki
+    
+    Returns:
+        Number of notes written
+    """
+    now = int(time.time())
+    base_id = now * 1000
+    deck_id = model_id = base_id
+    rows = iter(rows)
+    count = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "collection.anki2")
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.executescript(ANKI_SCHEMA)
+            conn.execute("INSERT INTO col VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         _collection_row(now, deck_id, model_id, deck_name))
+            while True:
+                batch = list(islice(rows, BATCH))
+                if not batch:
+                    break
+                notes = []
+                cards = []
+                for level, word, meaning in batch:
+                    count += 1
+                    text, pinyin = split_meaning(meaning)
+                    fields = [str(count), word, "", pinyin or "", text.strip()]
+                    note_id = base_id + count
+                    guid = hashlib.sha1(f"{level}\x1f{word}".encode("utf-8")).hexdigest()[:16]
+                    checksum = int(hashlib.sha1(fields[0].encode("utf-8")).hexdigest()[:8], 16)
+                    notes.append((note_id, guid, model_id, now, -1, f" {LEVEL_TAG}{level} ",
+                                  "\x1f".join(fields), count, checksum, 0, ""))
+                    cards.append((note_id, note_id, deck_id, 0, now, -1, 0, 0, count, 0, 0, 0, 0, 0, 0, 0, 0, ""))
+                conn.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", notes)
+                conn.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", cards)
+                conn.commit()
+            # Indexing once at the end is much cheaper than maintaining them per insert
+            conn.executescript(ANKI_INDEXES)
+            conn.commit()
+        finally:
+            conn.close()
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as apkg:
+            apkg.write(db_path, "collection.anki2")
+            apkg.writestr("media", "{}")
+    return count
 
 if __name__ == "__main__":
     apkg_path = input("Enter path to .apkg file: ")
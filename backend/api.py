@@ -1,23 +1,48 @@
-from fastapi import FastAPI, UploadFile, File, Query, HTTPException, Request  
+from fastapi import FastAPI, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
 import os
-import PyPDF2
 from typing import List, Dict
-import anthropic
 from dotenv import load_dotenv
-import fitz  # PyMuPDF
-import easyocr
-import numpy as np
 import re
 import json
-from main import load_word_banks, save_word_banks, transcribe_audio, clean_text
+from main import transcribe_audio_async, transcribe_audio_hedged, transcription_hedger, clean_text, close_async_clients
 from ank import read_anki_database, convert_anki_to_wordbank, extract_apkg, import_anki_to_wordbank
-import traceback
-from mistralai import Mistral
+import logging
+import asyncio
+import time
+from governor import get_governor, governor_statuses, deadline, CircuitOpenError, DeadlineExceeded
+from phonetic import get_phonetic_index, drop_phonetic_index, refresh_phonetic_index, MATCH_SCORE
+from scheduler import get_scheduler, drop_schedulers, refresh_schedulers, quality_from_score
+from search import get_search_index, drop_search_index, refresh_search_index
+from wordbank import export, WordBank
+import bulk
+import shards
+from paths import DEFAULT_USER
+import metrics
+from metrics import span
+from logs import configure_logging
+import backends
+import io
+import tempfile
+from uploads import receive_upload, MAX_PDF_BYTES, MAX_ANKI_BYTES, MAX_AUDIO_BYTES, MAX_IMPORT_BYTES
+
 
+configure_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Heavy backends load on first use; PRELOAD_BACKENDS warms some in the
+    # background so the worker starts serving straight away
+    names = backends.preload_names()
+    if names:
+        asyncio.get_running_loop().run_in_executor(None, backends.warm, names)
+    yield
+    await close_async_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,38 +55,197 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Provider calls that were shed or ran out of time surface as 503 / 504
+# wherever they happen, rather than as an empty result
+PROVIDER_ERRORS = (CircuitOpenError, DeadlineExceeded)
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open(request: Request, e: CircuitOpenError):
+    return JSONResponse({"detail": str(e)}, status_code=503)
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, e: DeadlineExceeded):
+    return JSONResponse({"detail": str(e)}, status_code=504)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    with metrics.maybe_profile(request.url.path):
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template so /api/words/{level}/{word} is one series
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            metrics.REQUEST_DURATION.observe(time.perf_counter() - start, request.method, path, status)
+            metrics.REQUESTS.inc(request.method, path, status)
+
+def collect_provider_metrics():
+    lines = [
+        "# HELP xilanhua_provider_concurrency_limit Adaptive concurrency limit per provider",
+        "# TYPE xilanhua_provider_concurrency_limit gauge",
+    ]
+    statuses = governor_statuses()
+    for status in statuses:
+        lines.append(f'xilanhua_provider_concurrency_limit{{provider="{status["name"]}"}} {status["concurrency_limit"]}')
+    lines += [
+        "# HELP xilanhua_provider_in_flight Provider calls currently in flight",
+        "# TYPE xilanhua_provider_in_flight gauge",
+    ]
+    for status in statuses:
+        lines.append(f'xilanhua_provider_in_flight{{provider="{status["name"]}"}} {status["in_flight"]}')
+    lines += [
+        "# HELP xilanhua_provider_circuit_open Whether the provider circuit breaker is rejecting calls",
+        "# TYPE xilanhua_provider_circuit_open gauge",
+    ]
+    for status in statuses:
+        lines.append(f'xilanhua_provider_circuit_open{{provider="{status["name"]}"}} {int(status["circuit"] != "closed")}')
+    hedging = transcription_hedger.status()
+    lines += [
+        "# HELP xilanhua_transcription_hedges_total Duplicate transcription requests sent",
+        "# TYPE xilanhua_transcription_hedges_total counter",
+        f"xilanhua_transcription_hedges_total {hedging['hedges_sent']}",
+        "# HELP xilanhua_transcription_hedges_won_total Duplicate transcription requests that answered first",
+        "# TYPE xilanhua_transcription_hedges_won_total counter",
+        f"xilanhua_transcription_hedges_won_total {hedging['hedges_won']}",
+    ]
+    return lines
+
+metrics.register_collector(collect_provider_metrics)
+
+def collect_backend_metrics():
+    lines = [
+        "# HELP xilanhua_backend_loaded Whether a lazily loaded backend is warm",
+        "# TYPE xilanhua_backend_loaded gauge",
+    ]
+    for status in backends.statuses():
+        lines.append(f'xilanhua_backend_loaded{{backend="{status["name"]}"}} {int(status["loaded"])}')
+    return lines
+
+metrics.register_collector(collect_backend_metrics)
+
+def collect_shard_metrics():
+    loaded = shards.statuses()
+    return [
+        "# HELP xilanhua_word_bank_shards_loaded (user, language) word banks held in memory",
+        "# TYPE xilanhua_word_bank_shards_loaded gauge",
+        f"xilanhua_word_bank_shards_loaded {len(loaded)}",
+        "# HELP xilanhua_word_bank_entries_loaded Entries across the word banks held in memory",
+        "# TYPE xilanhua_word_bank_entries_loaded gauge",
+        f"xilanhua_word_bank_entries_loaded {sum(status['entries'] for status in loaded)}",
+    ]
+
+metrics.register_collector(collect_shard_metrics)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 503 until every backend in PRELOAD_BACKENDS is warm."""
+    statuses = backends.statuses()
+    loaded = {status["name"] for status in statuses if status["loaded"]}
+    pending = [name for name in backends.preload_names() if name not in loaded]
+    return JSONResponse(
+        {"ready": not pending, "pending": pending, "backends": statuses},
+        status_code=503 if pending else 200
+    )
+
 load_dotenv()
-anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
-async def extract_text_with_mistral(pdf_path: str) -> str:
-    """Extract text using Mistral AI's OCR API."""
+def _banks_changed(user: str, language: str, word_banks):
+    """Bring the review decks and search and phonetic indexes in line with freshly saved word banks."""
+    refresh_schedulers(language, word_banks, user)
+    refresh_search_index(language, word_banks, user)
+    refresh_phonetic_index(language, word_banks, user)
+
+shards.on_change(_banks_changed)
+
+def _shard_evicted(user: str, language: str):
+    """Drop what was built from a shard's banks along with them, so memory stays bounded by CACHE_SHARDS."""
+    drop_schedulers(language, user)
+    drop_search_index(language, user)
+    drop_phonetic_index(language, user)
+
+shards.on_evict(_shard_evicted)
+
+def _shard(user: str, language: str):
+    """The learner's word-bank shard, or 400 for a malformed user or language."""
     try:
-        print("Initializing Mistral AI OCR...")
-        client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
-        
-        print("Uploading PDF file...")
-        with open(pdf_path, "rb") as file:
-            uploaded_pdf = client.files.upload(
-                file={
-                    "file_name": os.path.basename(pdf_path),
-                    "content": file
-                },
-                purpose="ocr"
+        return shards.get_shard(user, language)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _add_new_words(shard, vocab_lists):
+    """Append extracted words the bank doesn't have yet; returns the banks as plain dicts."""
+    with shard.edit() as word_banks:
+        for level in ['beginner', 'intermediate']:
+            new_words = [word for word in vocab_lists[level] 
+                        if word['word'] not in word_banks[level]]
+            word_banks[level].extend(new_words)
+        return export(word_banks)
+
+def _open_pdf(source):
+    """PyMuPDF document from a path or from the PDF's bytes."""
+    fitz = backends.get("pymupdf")
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+async def extract_text_with_mistral(source, file_name: str = "upload.pdf") -> str:
+    """Extract text using Mistral AI's OCR API. `source` is a path or the PDF's bytes."""
+    try:
+        logger.info("Initializing Mistral AI OCR")
+        client = backends.get("mistral")
+        governor = get_governor("mistral")
+        
+        def upload(timeout):
+            # Reopen on every attempt so a retry uploads the whole file again
+            with (open(source, "rb") if isinstance(source, str) else io.BytesIO(source)) as file:
+                return client.files.upload(
+                    file={
+                        "file_name": file_name,
+                        "content": file
+                    },
+                    purpose="ocr",
+                    timeout_ms=int(timeout * 1000)
+                )
+        
+        logger.debug("Uploading PDF file")
+        with span("mistral_upload"):
+            uploaded_pdf = await asyncio.to_thread(governor.call, upload)
+        
+        logger.debug("File uploaded", extra={"file_id": uploaded_pdf.id})
+        
+        logger.debug("Getting signed URL")
+        with span("mistral_signed_url"):
+            signed_url = await asyncio.to_thread(
+                governor.call,
+                lambda timeout: client.files.get_signed_url(
+                    file_id=uploaded_pdf.id,
+                    timeout_ms=int(timeout * 1000)
+                )
             )
         
-        print(f"File uploaded with ID: {uploaded_pdf.id}")
-        
-        print("Getting signed URL...")
-        signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
-        
-        print("Processing with OCR...")
-        ocr_response = client.ocr.process(
-            model="mistral-ocr-latest",
-            document={
-                "type": "document_url",
-                "document_url": signed_url.url
-            }
-        )
+        logger.debug("Processing with OCR")
+        with span("mistral_ocr"):
+            ocr_response = await asyncio.to_thread(
+                governor.call,
+                lambda timeout: client.ocr.process(
+                    model="mistral-ocr-latest",
+                    document={
+                        "type": "document_url",
+                        "document_url": signed_url.url
+                    },
+                    timeout_ms=int(timeout * 1000)
+                )
+            )
 
         extracted_text = []
         if hasattr(ocr_response, 'pages'):
@@ -71,81 +255,87 @@ async def extract_text_with_mistral(pdf_path: str) -> str:
 
         final_text = '\n'.join(extracted_text) if extracted_text else ""
         if final_text:
-            print("Mistral AI OCR completed successfully")
-            print(f"First 200 characters of extracted text: {final_text[:200]}...")
+            logger.info("Mistral AI OCR completed", extra={"chars": len(final_text)})
+            logger.debug("Mistral AI OCR text preview: %s", final_text[:200], extra={"sample": True})
         else:
-            print("No text extracted from Mistral AI OCR")
+            logger.warning("No text extracted from Mistral AI OCR")
         return final_text
 
+    except PROVIDER_ERRORS:
+        raise
     except Exception as e:
-        print(f"Mistral AI OCR failed: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Mistral AI OCR failed: %s", e)
         return ""
     
     
     
     
-async def extract_text_from_pdf(file_path: str) -> str:
-    """Try multiple methods to extract text from PDF, return empty string if all fail."""
+async def extract_text_from_pdf(source) -> str:
+    """Try multiple methods to extract text from PDF, return empty string if all fail.
+    `source` is a path or the PDF's bytes."""
     extracted_text = ""
 
     # Method 1: Try PyMuPDF (fitz)
     try:
-        doc = fitz.open(file_path)
-        for page in doc:
-            extracted_text += page.get_text()
-        doc.close()
+        with span("pdf_text_pymupdf"):
+            doc = _open_pdf(source)
+            for page in doc:
+                extracted_text += page.get_text()
+            doc.close()
         if extracted_text.strip():
-            print("Successfully extracted text using PyMuPDF")
+            logger.info("Extracted text using PyMuPDF")
             return extracted_text
     except Exception as e:
-        print(f"PyMuPDF failed: {str(e)}")
+        logger.warning("PyMuPDF failed: %s", e)
 
     # Method 2: Try PyPDF2
     try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
+        with span("pdf_text_pypdf2"), (open(source, 'rb') if isinstance(source, str) else io.BytesIO(source)) as file:
+            pdf_reader = backends.get("pypdf2").PdfReader(file)
             text = ""
             for page in pdf_reader.pages:
                 text += page.extract_text() or ""
             if text.strip():
-                print("Successfully extracted text using PyPDF2")
+                logger.info("Extracted text using PyPDF2")
                 return text
     except Exception as e:
-        print(f"PyPDF2 failed: {str(e)}")
+        logger.warning("PyPDF2 failed: %s", e)
 
     return "" 
 
-async def extract_text_with_ocr(pdf_path: str) -> str:
-    """Extract text using EasyOCR."""
+async def extract_text_with_ocr(source) -> str:
+    """Extract text using EasyOCR. `source` is a path or the PDF's bytes."""
     try:
         # Initialize EasyOCR reader for Chinese and English
-        print("Initializing EasyOCR...")
-        reader = easyocr.Reader(['ch_sim', 'en'])
+        logger.info("Initializing EasyOCR")
+        with span("ocr_model_load"):
+            reader = backends.get("easyocr")
+        np = backends.get("numpy")
         
-        doc = fitz.open(pdf_path)
+        doc = _open_pdf(source)
         extracted_text = []
         
-        print(f"Processing {len(doc)} pages with OCR...")
+        logger.info("Processing %d pages with OCR", len(doc))
         for page_num in range(len(doc)):
-            print(f"Processing page {page_num + 1}/{len(doc)}")
-            page = doc[page_num]
-            pix = page.get_pixmap()
-            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
-                pix.height, pix.width, pix.n
-            )
-            
-            results = reader.readtext(img)
+            logger.debug("Processing page %d/%d", page_num + 1, len(doc))
+            with span("ocr_page"):
+                page = doc[page_num]
+                pix = page.get_pixmap()
+                img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
+                    pix.height, pix.width, pix.n
+                )
+                
+                results = reader.readtext(img)
             page_text = ' '.join([text[1] for text in results])
             extracted_text.append(page_text)
         
         doc.close()
         final_text = '\n'.join(extracted_text)
-        print("OCR completed successfully")
+        logger.info("OCR completed")
         return final_text
         
     except Exception as e:
-        print(f"OCR failed: {str(e)}")
+        logger.exception("OCR failed: %s", e)
         return ""
 async def extract_vocab_from_text(text: str) -> Dict[str, List[Dict[str, str]]]:
     """
@@ -179,18 +369,23 @@ async def extract_vocab_from_text(text: str) -> Dict[str, List[Dict[str, str]]]:
     """
     
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-opus-20240229",
-            max_tokens=2000,
-            temperature=0,
-            system="You are a Chinese/Korean language expert helping to extract and categorize vocabulary from text. Only respond with the requested JSON format.",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
+        with span("llm_call"):
+            response = await asyncio.to_thread(
+                get_governor("anthropic").call,
+                lambda timeout: backends.get("anthropic").messages.create(
+                    model="claude-3-opus-20240229",
+                    max_tokens=2000,
+                    temperature=0,
+                    system="You are a Chinese/Korean language expert helping to extract and categorize vocabulary from text. Only respond with the requested JSON format.",
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    timeout=timeout
+                )
+            )
         
         response_text = response.content[0].text
         json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
@@ -199,59 +394,59 @@ async def extract_vocab_from_text(text: str) -> Dict[str, List[Dict[str, str]]]:
             result = json.loads(json_match.group())
             
             if isinstance(result, dict) and 'beginner' in result and 'intermediate' in result:
-                print("\nExtracted Vocabulary:")
-                print("\nBeginner Words:")
-                print("-" * 40)
-                for word in result['beginner']:
-                    print(f"Word: {word['word']} | Meaning: {word['meaning']}")
-                
-                print("\nIntermediate Words:")
-                print("-" * 40)
-                for word in result['intermediate']:
-                    print(f"Word: {word['word']} | Meaning: {word['meaning']}")
-                print("-" * 40)
+                logger.info("Extracted vocabulary", extra={
+                    "beginner": len(result['beginner']),
+                    "intermediate": len(result['intermediate'])
+                })
+                if logger.isEnabledFor(logging.DEBUG):
+                    for level in ['beginner', 'intermediate']:
+                        for word in result[level]:
+                            logger.debug("Extracted word %s (%s)", word.get('word'), word.get('meaning'),
+                                         extra={"level": level, "sample": True})
                 
                 return result
             else:
-                print("Invalid response structure from Claude")
+                logger.warning("Invalid response structure from Claude")
                 return {"beginner": [], "intermediate": []}
         else:
-            print("No valid JSON found in Claude's response")
-            print("Full response:", response_text)
+            logger.warning("No valid JSON found in Claude's response")
+            logger.debug("Full response: %s", response_text)
             return {"beginner": [], "intermediate": []}
             
+    except PROVIDER_ERRORS:
+        raise
     except Exception as e:
-        print(f"Error in Claude processing: {str(e)}")
-        print("Full response text:", response_text if 'response_text' in locals() else "No response")
+        logger.exception("Error in Claude processing: %s", e)
+        logger.debug("Full response text: %s", response_text if 'response_text' in locals() else "No response")
         return {"beginner": [], "intermediate": []}
 
 @app.post("/api/extract-pdf")
 async def extract_pdf_vocab(
-    pdf_file: UploadFile = File(...),
-    ocr_method: str = Query("mistral", description="OCR method to use: 'easy' or 'mistral'") 
+    request: Request,
+    ocr_method: str = Query("mistral", description="OCR method to use: 'easy' or 'mistral'"),
+    user: str = Query(DEFAULT_USER),
+    language: str = Query("chinese")
 ):
-    """Extract vocabulary from a PDF file and return categorized word lists."""
+    """Extract vocabulary from a PDF file (multipart field `pdf_file`) and return categorized word lists."""
+    shard = _shard(user, language)
+    pdf_file = await receive_upload(request, "pdf_file", MAX_PDF_BYTES, suffix='.pdf')
     if not pdf_file.filename.endswith('.pdf'):
+        pdf_file.close()
         return {
             "message": "File must be a PDF",
             "success": False,
             "word_banks": None
         }
     
-    temp_pdf = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
     try:
-        content = await pdf_file.read()
-        temp_pdf.write(content)
-        temp_pdf.close()
-        
-        extracted_text = await extract_text_from_pdf(temp_pdf.name)
+        extracted_text = await extract_text_from_pdf(pdf_file.source)
         
         if not extracted_text.strip():
-            print(f"No text found through normal extraction, attempting {ocr_method} OCR...")
+            logger.info("No text found through normal extraction, attempting %s OCR", ocr_method)
             if ocr_method == "mistral":
-                extracted_text = await extract_text_with_mistral(temp_pdf.name)
+                extracted_text = await extract_text_with_mistral(pdf_file.source, pdf_file.filename)
             else:
-                extracted_text = await extract_text_with_ocr(temp_pdf.name)
+                extracted_text = await extract_text_with_ocr(pdf_file.source)
             
         if not extracted_text.strip():
             return {
@@ -260,41 +455,36 @@ async def extract_pdf_vocab(
                 "word_banks": None
             }
             
-        print(f"Extracted text length: {len(extracted_text)}")
-        print("First 500 characters of extracted text:", extracted_text[:500])
+        logger.info("Extracted text from PDF", extra={"chars": len(extracted_text)})
+        logger.debug("Extracted text preview: %s", extracted_text[:500], extra={"sample": True})
         
         try:
             vocab_lists = await extract_vocab_from_text(extracted_text)
             
-            
-            existing_banks = load_word_banks()
-            
-            for level in ['beginner', 'intermediate']:
-                existing_words = {item['word'] for item in existing_banks[level]}
-                new_words = [word for word in vocab_lists[level] 
-                            if word['word'] not in existing_words]
-                existing_banks[level].extend(new_words)
-            
-            save_word_banks(existing_banks, "chinese")
+            word_banks = await asyncio.to_thread(_add_new_words, shard, vocab_lists)
             
             return {
                 "message": "Successfully extracted vocabulary from PDF",
                 "success": True,
                 "extracted_text_length": len(extracted_text),
-                "word_banks": existing_banks,
+                "word_banks": word_banks,
                 "new_words": vocab_lists
             }
             
+        except PROVIDER_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error processing extracted text: {str(e)}")
+            logger.exception("Error processing extracted text: %s", e)
             return {
                 "message": f"Error processing extracted text: {str(e)}",
                 "success": False,
                 "word_banks": None
             }
             
+    except PROVIDER_ERRORS:
+        raise
     except Exception as e:
-        print(f"Error processing PDF: {str(e)}")
+        logger.exception("Error processing PDF: %s", e)
         return {
             "message": f"Error processing PDF: {str(e)}",
             "success": False,
@@ -302,8 +492,7 @@ async def extract_pdf_vocab(
         }
     
     finally:
-        if os.path.exists(temp_pdf.name):
-            os.remove(temp_pdf.name)
+        pdf_file.close()
 @app.post("/api/extract-anki")
 async def extract_anki_deck(filename: str = Query(..., description="Name of the Anki deck file to extract")):
     try:
@@ -321,7 +510,7 @@ async def extract_anki_deck(filename: str = Query(..., description="Name of the
             "status": True
         }
     except Exception as e:
-        print(f"Error extracting Anki deck: {str(e)}")
+        logger.exception("Error extracting Anki deck: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/check-anki-status")
@@ -343,46 +532,71 @@ async def check_anki_status():
         
         return status
     except Exception as e:
-        print(f"Error checking Anki status: {str(e)}")
+        logger.exception("Error checking Anki status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _phonetic_index(shard):
+    with shard.lock:
+        return get_phonetic_index(shard.load(), shard.language, shard.user)
+
 @app.post("/api/transcribe")
-async def transcribe(audio: UploadFile = File(...)):
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+async def transcribe(
+    request: Request,
+    hedge: bool = Query(os.getenv("TRANSCRIBE_HEDGE", "") == "1", description="Send a duplicate request if the first one is slow"),
+    deadline_seconds: float = Query(float(os.getenv("TRANSCRIBE_DEADLINE_SECONDS", "30")), gt=0, description="Give up with 504 after this many seconds"),
+    target: str = Query(None, description="Word the user was asked to say; enables graded scoring"),
+    language: str = Query("chinese"),
+    user: str = Query(DEFAULT_USER)
+):
+    """Transcribe the recording in multipart field `audio`."""
+    shard = _shard(user, language) if target else None
+    audio = await receive_upload(request, "audio", MAX_AUDIO_BYTES, suffix='.wav')
     try:
-        await audio.seek(0)
-        
-        content = await audio.read()
-        print(f"Content length: {len(content) if content else 0} bytes")
-        if not content:
+        logger.debug("Content length: %d bytes", audio.size)
+        if not audio.size:
             raise HTTPException(status_code=400, detail="The uploaded file is empty or corrupted")
-            
-        temp_file.write(content)
-        temp_file.close()
-        print(f"Temp file written to: {temp_file.name}")
-        print(f"Temp file size: {os.path.getsize(temp_file.name)} bytes")
         
         try:
-            print("Starting transcription...")
-            transcribed_text = transcribe_audio(temp_file.name)
-            print(f"Raw transcribed text: {transcribed_text}")
+            logger.debug("Starting transcription", extra={"hedge": hedge, "deadline": deadline_seconds})
+            with deadline(deadline_seconds):
+                if hedge:
+                    pending = transcribe_audio_hedged(audio.source, language)
+                else:
+                    pending = transcribe_audio_async(audio.source, language)
+                transcribed_text = await asyncio.wait_for(pending, deadline_seconds)
+            logger.debug("Raw transcribed text: %s", transcribed_text)
             
-            cleaned_text = clean_text(transcribed_text)
-            print(f"Cleaned text: {cleaned_text}")
+            cleaned_text = clean_text(transcribed_text, language)
+            logger.debug("Cleaned text: %s", cleaned_text)
             
-            return {"transcription": cleaned_text, "raw_transcription": transcribed_text}
+            result = {"transcription": cleaned_text, "raw_transcription": transcribed_text}
+            if target:
+                index = await asyncio.to_thread(_phonetic_index, shard)
+                score = index.score(target, cleaned_text)
+                result.update({
+                    "score": score,
+                    "matched": cleaned_text == target or score >= MATCH_SCORE,
+                    "closest": [{"word": word, "score": s} for word, s in index.match(cleaned_text)]
+                })
+            return result
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            logger.warning("Transcription exceeded its %ss deadline", deadline_seconds)
+            raise HTTPException(status_code=504, detail=f"Transcription did not finish within {deadline_seconds} seconds")
+        except CircuitOpenError:
+            raise
         except Exception as e:
-            print(f"Transcription error: {str(e)}")
-            print(f"Error type: {type(e)}")
-            print(f"Full traceback: {traceback.format_exc()}")
+            logger.exception("Transcription error: %s", e)
             raise HTTPException(status_code=500, detail=str(e))
     finally:
-        if os.path.exists(temp_file.name):
-            print(f"Cleaning up temp file: {temp_file.name}")
-            os.remove(temp_file.name)
+        audio.close()
 @app.post("/api/extract-text")
-async def extract_text_vocab(request: Request):
+async def extract_text_vocab(
+    request: Request,
+    user: str = Query(DEFAULT_USER),
+    language: str = Query("chinese")
+):
     """Extract vocabulary from provided text."""
+    shard = _shard(user, language)
     try:
         data = await request.json()
         text = data.get('text', '')
@@ -408,33 +622,29 @@ async def extract_text_vocab(request: Request):
         try:
             vocab_lists = await extract_vocab_from_text(chinese_text)
             
-            existing_banks = load_word_banks()
-            
-            for level in ['beginner', 'intermediate']:
-                existing_words = {item['word'] for item in existing_banks[level]}
-                new_words = [word for word in vocab_lists[level] 
-                            if word['word'] not in existing_words]
-                existing_banks[level].extend(new_words)
-            
-            save_word_banks(existing_banks, "chinese")
+            word_banks = await asyncio.to_thread(_add_new_words, shard, vocab_lists)
             
             return {
                 "message": "Successfully extracted vocabulary from text",
                 "success": True,
-                "word_banks": existing_banks,
+                "word_banks": word_banks,
                 "new_words": vocab_lists
             }
             
+        except PROVIDER_ERRORS:
+            raise
         except Exception as e:
-            print(f"Error processing text: {str(e)}")
+            logger.exception("Error processing text: %s", e)
             return {
                 "message": f"Error processing text: {str(e)}",
                 "success": False,
                 "word_banks": None
             }
             
+    except PROVIDER_ERRORS:
+        raise
     except Exception as e:
-        print(f"Error processing request: {str(e)}")
+        logger.exception("Error processing request: %s", e)
         return {
             "message": f"Error processing request: {str(e)}",
             "success": False,
@@ -442,103 +652,275 @@ async def extract_text_vocab(request: Request):
         }
 
 @app.delete("/api/words/{level}/{word}")
-async def remove_word(level: str, word: str):
+async def remove_word(level: str, word: str, user: str = Query(DEFAULT_USER), language: str = Query("chinese")):
+    shard = _shard(user, language)
     try:
         if level not in ["beginner", "intermediate"]:
             raise HTTPException(status_code=400, detail="Level must be 'beginner' or 'intermediate'")
         
-        word_banks = load_word_banks()
-        
-        word_banks[level] = [w for w in word_banks[level] if w["word"] != word]
-        
-        save_word_banks(word_banks, "chinese")
+        def remove():
+            with shard.edit() as word_banks:
+                while word_banks[level].discard(word):
+                    pass
+                return export(word_banks)
         
         return {
             "message": f"Successfully removed word '{word}' from {level} level",
-            "word_banks": word_banks
+            "word_banks": await asyncio.to_thread(remove)
         }
     except Exception as e:
-        print(f"Error removing word: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error removing word: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
         
+@app.get("/api/words/search")
+async def search_words(
+    q: str = Query(..., min_length=1, description="Word, part of a meaning, or romanization prefix such as 'nih'"),
+    language: str = Query("chinese"),
+    level: str = Query(None, description="Only search this level"),
+    limit: int = Query(20, ge=1, le=200),
+    user: str = Query(DEFAULT_USER)
+):
+    """Ranked word-bank matches from the server-side search index."""
+    shard = _shard(user, language)
+    
+    def build():
+        # Under the shard lock so no save can slip in between reading the banks and registering the index
+        with shard.lock:
+            return get_search_index(language, shard.load, user)
+    
+    # The first search for a learner's language builds the index; keep that off the event loop
+    index = await asyncio.to_thread(build)
+    results = index.search(q, limit, level)
+    return {
+        "query": q,
+        "results": [{**entry, "level": lvl, "score": score} for score, lvl, entry in results]
+    }
+
+async def _bulk_format(fmt: str):
+    if fmt not in bulk.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(bulk.FORMATS)}")
+    if fmt in bulk.COLUMNAR:
+        try:
+            # The first Arrow/Parquet request imports pyarrow; keep that off the event loop
+            await asyncio.to_thread(backends.get, "pyarrow")
+        except ImportError:
+            raise HTTPException(status_code=501, detail=f"{fmt} needs pyarrow, which is not installed")
+    return fmt
+
+@app.get("/api/words/export")
+async def export_words(
+    fmt: str = Query("ndjson", alias="format", description="ndjson, csv, arrow, parquet or apkg"),
+    level: str = Query(None, description="Only export this level"),
+    user: str = Query(DEFAULT_USER),
+    language: str = Query("chinese")
+):
+    """Stream a learner's word banks in a bulk format, a batch at a time."""
+    shard = _shard(user, language)
+    await _bulk_format(fmt)
+    if level is not None and level not in bulk.LEVELS:
+        raise HTTPException(status_code=400, detail="Level must be 'beginner' or 'intermediate'")
+    
+    def take_snapshot():
+        # Only the row ids are copied under the lock; edits made while the export streams don't show up in it
+        with shard.lock:
+            return bulk.snapshot(shard.load(), (level,) if level else bulk.LEVELS)
+    
+    snap = await asyncio.to_thread(take_snapshot)
+    if fmt == "apkg":
+        chunks = bulk.export_anki(snap, deck_name=f"Xilanhua {language}")
+    else:
+        chunks = bulk.EXPORTERS[fmt](snap)
+    media_type, suffix = bulk.FORMATS[fmt]
+    return StreamingResponse(chunks, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{user}-{language}{suffix}"'
+    })
+
+@app.post("/api/words/import")
+async def import_words(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format", description="ndjson, csv, arrow, parquet or apkg"),
+    mode: str = Query("append", description="append to the banks, or replace them"),
+    level: str = Query(None, description="Level for records that don't name one"),
+    user: str = Query(DEFAULT_USER),
+    language: str = Query("chinese")
+):
+    """Import the file in multipart field `file`, validating and inserting it a batch at a time."""
+    shard = _shard(user, language)
+    await _bulk_format(fmt)
+    if mode not in ("append", "replace"):
+        raise HTTPException(status_code=400, detail="Mode must be 'append' or 'replace'")
+    if level is not None and level not in bulk.LEVELS:
+        raise HTTPException(status_code=400, detail="Level must be 'beginner' or 'intermediate'")
+    
+    upload = await receive_upload(request, "file", MAX_IMPORT_BYTES, suffix=bulk.FORMATS[fmt][1])
+    
+    def load():
+        with upload.open() as f:
+            records = bulk.READERS[fmt](f, level)
+            if mode == "append":
+                with shard.edit() as word_banks:
+                    return bulk.insert(word_banks, records)
+            # Built aside and swapped in, so a bad row leaves the old banks untouched
+            word_banks = {lvl: WordBank() for lvl in bulk.LEVELS}
+            counts = bulk.insert(word_banks, records)
+            shard.save(word_banks)
+            return counts
+    
+    try:
+        added, skipped = await asyncio.to_thread(load)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Import failed, nothing was saved: {e}")
+    finally:
+        upload.close()
+    return {"added": added, "skipped": skipped, "mode": mode}
+
 @app.get("/api/words")
-async def get_words():
-    try:        
+async def get_words(user: str = Query(DEFAULT_USER), language: str = Query("chinese")):
+    shard = _shard(user, language)
+    
+    def read():
         anki_db_path = os.path.join("extracted_anki", "collection.anki2")
         
-        if not os.path.exists(anki_db_path):
-            word_banks = load_word_banks()
-            print("Using JSON word banks (Anki file not found)")
-        else:
+        # A deck unpacked by /api/extract-anki belongs to the default learner's Chinese bank
+        if user == DEFAULT_USER and language == "chinese" and os.path.exists(anki_db_path):
             cards = read_anki_database(anki_db_path)
-            word_banks = convert_anki_to_wordbank(cards)
-            print(f"Loaded {len(cards)} cards from Anki database")
+            logger.debug("Loaded %d cards from Anki database", len(cards))
+            return export(convert_anki_to_wordbank(cards))
         
-        return word_banks
+        with shard.lock:
+            return export(shard.load())
+    
+    try:
+        return await asyncio.to_thread(read)
     except Exception as e:
-        print(f"Error loading words: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error loading words: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.post("/api/import-anki")
-async def import_anki(anki_file: UploadFile = File(...)):
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.apkg')
+async def import_anki(request: Request, user: str = Query(DEFAULT_USER), language: str = Query("chinese")):
+    """Import the .apkg in multipart field `anki_file`, replacing the learner's word banks."""
+    shard = _shard(user, language)
+    anki_file = await receive_upload(request, "anki_file", MAX_ANKI_BYTES, suffix='.apkg')
     try:
-        await anki_file.seek(0)
-        
-        content = await anki_file.read()
-        if not content:
+        if not anki_file.size:
             raise HTTPException(status_code=400, detail="The uploaded file is empty or corrupted")
-            
-        temp_file.write(content)
-        temp_file.close()
         
-        word_banks = import_anki_to_wordbank(temp_file.name)
+        def load_deck():
+            with anki_file.open() as apkg:
+                if user == DEFAULT_USER and language == "chinese":
+                    # /api/words reads the default learner's deck back from extracted_anki
+                    return import_anki_to_wordbank(apkg)
+                # Other learners' imports must not share one extraction directory
+                with tempfile.TemporaryDirectory() as extract_dir:
+                    return import_anki_to_wordbank(apkg, extract_dir=extract_dir)
         
-        save_word_banks(word_banks, "chinese") 
+        word_banks = await asyncio.to_thread(load_deck)
+        word_banks = await asyncio.to_thread(shard.save, word_banks)
         
         return {
             "message": f"Successfully imported Anki deck with {len(word_banks['beginner'])} beginner and {len(word_banks['intermediate'])} intermediate words",
-            "word_banks": word_banks
+            "word_banks": export(word_banks)
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error importing Anki file: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error importing Anki file: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        if os.path.exists(temp_file.name):
-            os.remove(temp_file.name)
+        anki_file.close()
             
 @app.post("/api/words")
-async def add_word(word_data: dict):
+async def add_word(word_data: dict, user: str = Query(DEFAULT_USER), language: str = Query("chinese")):
     try:
-        print(f"Received word data: {word_data}") 
+        logger.debug("Received word data", extra={"keys": sorted(word_data)})
+        shard = _shard(word_data.get("user", user), word_data.get("language", language))
         if "beginner" in word_data and "intermediate" in word_data:
             word_banks = word_data
-            language = "chinese"  
-            save_word_banks(word_banks, language)
+            await asyncio.to_thread(shard.save, word_banks)
             return word_banks
         else:
             
             level = word_data.get("level")
             word = word_data.get("word")
             meaning = word_data.get("meaning")
-            language = word_data.get("language", "chinese")
             if not level or not word or not meaning:
                 return {"error": "Missing required fields: level, word, or meaning"}
             
             if level not in ["beginner", "intermediate"]:
                 return {"error": "Level must be 'beginner' or 'intermediate'"}
             
-            word_banks = load_word_banks(language)
-            
-            word_banks[level].append({"word": word, "meaning": meaning})
+            def add():
+                with shard.edit() as word_banks:
+                    word_banks[level].append({"word": word, "meaning": meaning})
+                    return export(word_banks)
             
-            save_word_banks(word_banks, language)
-            
-            return word_banks
+            return await asyncio.to_thread(add)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error adding word: {str(e)}")
-        traceback.print_exc()
-        return {"error": str(e)}
\ No newline at end of file
+        logger.exception("Error adding word: %s", e)
+        return {"error": str(e)}
+
+
+def _deck(user: str, language: str, level: str):
+    shard = _shard(user, language)
+    
+    def load_entries():
+        # The bank itself, so later saves only sync the rows that changed
+        with shard.lock:
+            return shard.load()[level]
+    
+    return get_scheduler(language, level, load_entries, user)
+
+@app.get("/api/review/next")
+async def next_review(level: str = Query("beginner"), language: str = Query("chinese"), user: str = Query(DEFAULT_USER)):
+    """Return the card the user should practise next."""
+    if level not in ["beginner", "intermediate"]:
+        raise HTTPException(status_code=400, detail="Level must be 'beginner' or 'intermediate'")
+    
+    # The first call for a deck loads the bank and replays the review log; keep that off the event loop
+    card = await asyncio.to_thread(lambda: _deck(user, language, level).next_card())
+    if card is None:
+        return {"card": None, "new": False, "state": None}
+    
+    entry, state = card
+    return {
+        "card": entry,
+        "new": state is None,
+        "state": state.to_dict() if state else None
+    }
+
+def _review_quality(review):
+    """SM-2 quality grade from a review's `quality` (0-5) or `score` (0-1), or 400."""
+    if "quality" not in review and "score" not in review:
+        raise HTTPException(status_code=400, detail="Provide either quality (0-5) or score (0-1)")
+    try:
+        if "quality" in review:
+            quality = float(review["quality"])
+            if quality.is_integer() and 0 <= quality <= 5:
+                return int(quality)
+        else:
+            score = float(review["score"])
+            if 0 <= score <= 1:
+                return quality_from_score(score)
+    except (TypeError, ValueError):
+        pass
+    raise HTTPException(status_code=400, detail="Quality must be a whole number from 0 to 5, or score a number from 0 to 1")
+
+@app.post("/api/review")
+async def record_review(review: dict, user: str = Query(DEFAULT_USER), language: str = Query("chinese")):
+    """Record a review graded either by `quality` (0-5) or by a pronunciation `score` (0-1)."""
+    level = review.get("level")
+    word = review.get("word")
+    language = review.get("language", language)
+    user = review.get("user", user)
+    if level not in ["beginner", "intermediate"] or not word or not isinstance(word, str):
+        raise HTTPException(status_code=400, detail="Missing or invalid fields: level, word")
+    quality = _review_quality(review)
+    
+    try:
+        state = await asyncio.to_thread(lambda: _deck(user, language, level).record(word, quality))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Word '{word}' not found in {level} level")
+    
+    return {"word": word, "quality": quality, "state": state.to_dict()}
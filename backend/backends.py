@@ -0,0 +1,143 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """A heavy dependency (library, model or client) built on first use.
+
+    `loader` runs at most once; later calls to get() return the same object.
+    A failed load is remembered in the status but retried on the next get().
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+        self.load_seconds = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.loaded:
+            return self.value
+        with self.lock:
+            if not self.loaded:
+                start = time.perf_counter()
+                try:
+                    self.value = self.loader()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.loaded = True
+                self.error = None
+                logger.info("Loaded backend %s in %.2fs", self.name, self.load_seconds)
+        return self.value
+
+    def status(self):
+        return {
+            "name": self.name,
+            "loaded": self.loaded,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+_backends = {}
+
+
+def register(name):
+    """Decorator registering a zero-argument loader under `name`."""
+    def decorate(loader):
+        _backends[name] = Backend(name, loader)
+        return loader
+    return decorate
+
+
+def get(name):
+    return _backends[name].get()
+
+
+def statuses():
+    return [backend.status() for backend in _backends.values()]
+
+
+def warm(names):
+    """Load `names` now, logging (not raising) failures. Returns the names that failed."""
+    failed = []
+    for name in names:
+        try:
+            get(name)
+        except Exception as e:
+            logger.warning("Could not preload backend %s: %s", name, e)
+            failed.append(name)
+    return failed
+
+
+def preload_names():
+    """Backends listed in PRELOAD_BACKENDS (comma-separated, or "all")."""
+    spec = os.getenv("PRELOAD_BACKENDS", "").strip()
+    if spec == "all":
+        return list(_backends)
+    return [name.strip() for name in spec.split(",") if name.strip()]
+
+
+@register("pymupdf")
+def _load_pymupdf():
+    return importlib.import_module("fitz")
+
+
+@register("pypdf2")
+def _load_pypdf2():
+    return importlib.import_module("PyPDF2")
+
+
+@register("numpy")
+def _load_numpy():
+    return importlib.import_module("numpy")
+
+
+@register("easyocr")
+def _load_easyocr():
+    # Importing easyocr pulls in torch; building the reader loads the models
+    easyocr = importlib.import_module("easyocr")
+    return easyocr.Reader(['ch_sim', 'en'])
+
+
+@register("anthropic")
+def _load_anthropic():
+    anthropic = importlib.import_module("anthropic")
+    return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+
+@register("mistral")
+def _load_mistral():
+    mistralai = importlib.import_module("mistralai")
+    return mistralai.Mistral(api_key=os.getenv("MISTRAL_API_KEY"), server_url=os.getenv("MISTRAL_SERVER_URL"))
+
+
+@register("elevenlabs")
+def _load_elevenlabs():
+    # The module rather than a client: the async client is bound to the event loop it is used on
+    return importlib.import_module("elevenlabs.client")
+
+
+@register("pyarrow")
+def _load_pyarrow():
+    # Only needed for the Arrow and Parquet word-bank exports and imports
+    pyarrow = importlib.import_module("pyarrow")
+    importlib.import_module("pyarrow.ipc")
+    importlib.import_module("pyarrow.parquet")
+    return pyarrow
+
+
+@register("pypinyin")
+def _load_pypinyin():
+    # Tone-numbered pinyin for phonetic scoring; its dictionaries are large
+    return importlib.import_module("pypinyin")
@@ -0,0 +1,107 @@
+"""Throughput and memory of the bulk word-bank exports and imports, per format.
+
+Each (format, size) pair runs in a fresh process: export the generated banks
+to a temp file, then import that file into empty banks. "peak" is the Python
+allocation high-water mark (tracemalloc) above the banks themselves, which
+should stay flat as the bank grows. Arrow and Parquet are skipped without pyarrow.
+
+Run from backend/:  python -m benchmarks.bench_bulk [--sizes 100000,1000000] [--formats ndjson,csv]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+import backends
+import bulk
+from benchmarks.datagen import make_word_banks
+from wordbank import WordBank
+
+
+def _export(fmt, word_banks, path):
+    with open(path, "wb") as f:
+        for chunk in bulk.EXPORTERS[fmt](bulk.snapshot(word_banks)):
+            f.write(chunk)
+
+
+def _import(fmt, path):
+    word_banks = {level: WordBank() for level in bulk.LEVELS}
+    with open(path, "rb") as f:
+        added, _ = bulk.insert(word_banks, bulk.READERS[fmt](f))
+    return word_banks, added
+
+
+def _traced(fn):
+    """Peak Python allocations while `fn` runs, and its result."""
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, result
+
+
+def _timed(fn):
+    # Timed separately since tracing slows allocation-heavy code down
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _child(fmt, size, path, conn):
+    word_banks = {level: WordBank(entries) for level, entries in make_word_banks(size).items()}
+    export_peak, _ = _traced(lambda: _export(fmt, word_banks, path))
+    export_seconds = _timed(lambda: _export(fmt, word_banks, path))
+    del word_banks
+
+    import_peak, (imported, added) = _traced(lambda: _import(fmt, path))
+    # The imported banks are kept, so count only what the import held on top of them
+    import_peak -= sum(bank.nbytes for bank in imported.values())
+    del imported
+    import_seconds = _timed(lambda: _import(fmt, path))
+
+    conn.send((os.path.getsize(path), export_seconds, export_peak, import_seconds, import_peak, added))
+    conn.close()
+
+
+def measure(fmt, size, path):
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(fmt, size, path, child))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--formats", default=",".join(bulk.FORMATS))
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    try:
+        backends.get("pyarrow")
+    except ImportError:
+        skipped = [fmt for fmt in formats if fmt in bulk.COLUMNAR]
+        if skipped:
+            print(f"skipping {', '.join(skipped)}: pyarrow is not installed")
+        formats = [fmt for fmt in formats if fmt not in bulk.COLUMNAR]
+
+    print(f"{'entries':>9} {'format':<8} {'file MB':>8} {'export s':>9} {'rows/s':>10} {'peak MB':>8}"
+          f" {'import s':>9} {'rows/s':>10} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(size) for size in args.sizes.split(",")):
+            for fmt in formats:
+                path = os.path.join(workdir, f"{size}{bulk.FORMATS[fmt][1]}")
+                file_bytes, export_s, export_peak, import_s, import_peak, added = measure(fmt, size, path)
+                assert added == size, (fmt, added, size)
+                print(f"{size:>9} {fmt:<8} {file_bytes / 2**20:>8.1f} {export_s:>9.2f} {size / export_s:>10.0f}"
+                      f" {export_peak / 2**20:>8.1f} {import_s:>9.2f} {size / import_s:>10.0f} {import_peak / 2**20:>8.1f}")
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
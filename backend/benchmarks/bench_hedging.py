@@ -0,0 +1,61 @@
+"""Tail latency of hedged vs. plain transcription against a slow stub backend.
+
+Run from backend/:  python -m benchmarks.bench_hedging
+"""
+import asyncio
+import random
+import time
+
+from hedging import Hedger
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def make_stub(slow_rate, slow_seconds):
+    """A fake STT backend: ~80 ms lognormal latency with injected slow responses."""
+    async def stub():
+        latency = random.lognormvariate(-2.5, 0.3)
+        if random.random() < slow_rate:
+            latency += slow_seconds
+        await asyncio.sleep(latency)
+        return "你好"
+    return stub
+
+
+async def measure(run_one, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.monotonic()
+            await run_one()
+            latencies.append(time.monotonic() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def main(requests=1000, concurrency=50, slow_rate=0.05, slow_seconds=2.0):
+    random.seed(0)
+    stub = make_stub(slow_rate, slow_seconds)
+    hedger = Hedger(percentile=0.95, min_delay=0.05)
+
+    results = {
+        "plain": await measure(stub, requests, concurrency),
+        "hedged": await measure(lambda: hedger.run([stub, stub]), requests, concurrency),
+    }
+
+    print(f"{requests} requests, {slow_rate:.0%} injected +{slow_seconds}s responses")
+    for name, latencies in results.items():
+        print(f"{name:>7}: p50={percentile(latencies, 0.5) * 1000:7.1f}ms "
+              f"p95={percentile(latencies, 0.95) * 1000:7.1f}ms "
+              f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms")
+    print(f"hedger: {hedger.status()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""Compare the compiled normalizer with the original loop-based clean_text.
+
+Run from backend/:  python -m benchmarks.bench_normalize
+"""
+import random
+import timeit
+
+from normalize import get_normalizer
+
+
+def legacy_clean_text(text):
+    """clean_text as it was before normalize.py, kept here as the baseline."""
+    while '(' in text and ')' in text:
+        start = text.find('(')
+        end = text.find(')') + 1
+        text = text[:start] + text[end:]
+
+    punctuation = '。，！？,.!?¡¿'
+    for p in punctuation:
+        text = text.replace(p, '')
+
+    return text.strip()
+
+
+def make_transcript(sentences, rng):
+    chars = "你好谢谢再见朋友学习喜欢吃饭水猫狗经济环境发展技术教育文化社会政府工作生活"
+    parts = []
+    for _ in range(sentences):
+        parts.append("".join(rng.choice(chars) for _ in range(rng.randint(4, 20))))
+        if rng.random() < 0.3:
+            parts.append("(laughter)")
+        parts.append(rng.choice("。，！？"))
+    return "".join(parts)
+
+
+def bench(name, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{name:<48} {seconds * 1e6:10.1f} us")
+    return seconds
+
+
+def main():
+    rng = random.Random(0)
+    normalizer = get_normalizer("chinese")
+    words = [make_transcript(1, rng) for _ in range(10_000)]
+
+    for sentences in (1, 100, 2000):
+        text = make_transcript(sentences, rng)
+        number = max(1, 2000 // sentences)
+        old = bench(f"legacy clean_text, {len(text)} chars", lambda: legacy_clean_text(text), number)
+        new = bench(f"Normalizer.normalize, {len(text)} chars", lambda: normalizer.normalize(text), number)
+        print(f"{'speedup':<48} {old / new:10.1f}x\n")
+
+    text = "你好(laughter)" * 5000
+    old = bench(f"legacy clean_text, {len(text)} chars, 5k groups", lambda: legacy_clean_text(text), 3)
+    new = bench(f"Normalizer.normalize, {len(text)} chars, 5k groups", lambda: normalizer.normalize(text), 3)
+    print(f"{'speedup':<48} {old / new:10.1f}x\n")
+
+    old = bench("legacy clean_text, 10k words", lambda: [legacy_clean_text(w) for w in words], 3)
+    new = bench("Normalizer.normalize_many, 10k words", lambda: normalizer.normalize_many(words), 3)
+    print(f"{'speedup':<48} {old / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Search index latency against a client-side style linear scan, for 10k-1M entries.
+
+Run from backend/:  python -m benchmarks.bench_search [--sizes 10000,100000]
+"""
+import argparse
+import time
+
+from benchmarks.datagen import make_word_banks
+from search import SearchIndex
+
+
+def linear_scan(word_banks, query, limit=20):
+    """What the frontend does today: download every entry and filter."""
+    query = query.casefold()
+    matches = []
+    for level, entries in word_banks.items():
+        for entry in entries:
+            if query in entry["word"].casefold() or query in entry["meaning"].casefold():
+                matches.append((level, entry))
+                if len(matches) == limit:
+                    return matches
+    return matches
+
+
+def percentiles(fn, runs=200):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e3, samples[int(len(samples) * 0.99)] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args()
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        banks = make_word_banks(size)
+        sample = banks["intermediate"][size // 3]
+        queries = {
+            "exact word": sample["word"],
+            "single character": sample["word"][0],
+            "meaning substring": sample["meaning"].split(" (")[0][-5:],
+            "pinyin prefix": sample["meaning"].rsplit("(", 1)[1][:4],
+            "no match": "zzzz",
+        }
+
+        start = time.perf_counter()
+        index = SearchIndex(banks)
+        print(f"\n{size} entries: index built in {time.perf_counter() - start:.2f}s")
+        print(f"{'query':<22} {'index p50 ms':>13} {'p99 ms':>8} {'scan p50 ms':>12}")
+        for name, query in queries.items():
+            p50, p99 = percentiles(lambda: index.search(query))
+            scan, _ = percentiles(lambda: linear_scan(banks, query), runs=5)
+            print(f"{name:<22} {p50:>13.3f} {p99:>8.3f} {scan:>12.2f}")
+
+        entry = {"word": "新词", "meaning": "new word (xin1 ci2)"}
+        start = time.perf_counter()
+        for _ in range(1000):
+            index.add("beginner", entry)
+            index.remove("beginner", entry["word"])
+        print(f"add + remove: {(time.perf_counter() - start) * 1e3:.3f} us per pair")
+
+
+if __name__ == "__main__":
+    main()
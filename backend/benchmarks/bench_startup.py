@@ -0,0 +1,91 @@
+"""Import time and RSS of `import api` in a fresh interpreter, checked against a budget.
+
+Exits non-zero when the median import time or RSS is over budget, or when a
+backend that should load lazily (torch, easyocr, fitz, ...) was imported.
+
+Run from backend/:  python -m benchmarks.bench_startup [--budget-ms 1500] [--budget-rss-mb 150]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level modules that only the registry in backends.py may import
+LAZY_MODULES = ("torch", "easyocr", "fitz", "PyPDF2", "numpy", "anthropic", "mistralai", "elevenlabs", "pyarrow", "pypinyin")
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import api
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "rss_mb": rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    "loaded": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure():
+    env = dict(os.environ, LOG_LEVEL="ERROR", PRELOAD_BACKENDS="")
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"import api failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit):
+    """Largest cumulative times from `python -X importtime`, in ms."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import api"], cwd=BACKEND_DIR,
+                            env=dict(os.environ, LOG_LEVEL="ERROR"), capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  <self us> | <cumulative us> | <indented module>"
+        _, cumulative_us, module = line.split("|", 2)
+        rows.append((int(cumulative_us) / 1000, module.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--budget-rss-mb", type=float, default=float(os.getenv("IMPORT_BUDGET_RSS_MB", "150")))
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest imports")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    rss_mb = statistics.median(run["rss_mb"] for run in runs)
+    loaded = runs[-1]["loaded"]
+
+    print(f"import api: median {import_ms:.0f} ms (budget {args.budget_ms:.0f}), "
+          f"RSS {rss_mb:.0f} MB (budget {args.budget_rss_mb:.0f}) over {args.runs} runs")
+    print("\nSlowest imports (cumulative ms):")
+    for cumulative_ms, module in slowest_imports(args.top):
+        print(f"  {cumulative_ms:8.1f}  {module}")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import time {import_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if rss_mb > args.budget_rss_mb:
+        failures.append(f"RSS {rss_mb:.0f} MB is over the {args.budget_rss_mb:.0f} MB budget")
+    if loaded:
+        failures.append(f"imported eagerly, should load through backends.py: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Memory and lookup time of the columnar WordBank against a list of dicts, for 10k-1M entries.
+
+Each (layout, size) pair loads the same word-bank JSON in a fresh process, so
+the RSS figures don't include the other layout's leftovers. "held" and "peak"
+are Python allocations (tracemalloc) after and during the load; "RSS" is the
+process's growth, which includes the file text still held by the allocator.
+
+Run from backend/:  python -m benchmarks.bench_wordbank [--sizes 10000,100000,1000000]
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.datagen import make_word_banks
+from wordbank import WordBank, load_json
+
+
+def _rss_mb():
+    """Current RSS. ru_maxrss is no use here: a spawned child inherits the parent's high-water mark."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return float("nan")
+
+
+def _best_us(fn, runs):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(runs):
+            fn()
+        best = min(best, (time.perf_counter() - start) / runs)
+    return best * 1e6
+
+
+def _child(layout, path, hits, conn):
+    before = _rss_mb()
+
+    def load():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f) if layout == "dicts" else load_json(f)
+
+    tracemalloc.start()
+    bank = load()
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = _rss_mb() - before
+
+    # Timed separately since tracing slows allocation-heavy code down
+    start = time.perf_counter()
+    load()
+    load_seconds = time.perf_counter() - start
+
+    rng = random.Random(0)
+    if layout == "dicts":
+        # What the API did: build a fresh set per request, or scan the list
+        contains = lambda word: word in {entry["word"] for entry in bank}
+        scan = lambda word: any(entry["word"] == word for entry in bank)
+        lookup_us = min(_best_us(lambda: contains(rng.choice(hits)), 3),
+                        _best_us(lambda: scan(rng.choice(hits)), 3))
+    else:
+        lookup_us = _best_us(lambda: rng.choice(hits) in bank, 10000)
+    conn.send((held / 2**20, peak / 2**20, rss, load_seconds, lookup_us))
+    conn.close()
+
+
+def measure(layout, path, hits):
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(layout, path, hits, child))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'entries':>9} {'layout':<9} {'held MB':>8} {'peak MB':>8} {'RSS MB':>7} {'load s':>7} {'lookup us':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(size) for size in args.sizes.split(",")):
+            path = os.path.join(workdir, f"{size}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                entries = [entry for entries in make_word_banks(size).values() for entry in entries]
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            hits = [entry["word"] for entry in random.Random(size).sample(entries, 1000)]
+            del entries
+            for layout in ("dicts", "WordBank"):
+                held, peak, rss, load_seconds, lookup_us = measure(layout, path, hits)
+                print(f"{size:>9} {layout:<9} {held:>8.1f} {peak:>8.1f} {rss:>7.1f} {load_seconds:>7.2f} {lookup_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Synthetic inputs for the benchmark suite: word banks, .apkg decks, PDFs and WAV clips.
+
+Everything is generated from a seed so runs are reproducible.
+"""
+import json
+import math
+import os
+import random
+import sqlite3
+import struct
+import tempfile
+import wave
+import zipfile
+import zlib
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+# Common characters so generated words look like real vocabulary to the OCR and LLM stubs
+CHARACTERS = "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明其种声全工己话儿者向情部正名定女问力机给等几很业最间新什打便位因重被走电四第门相次东政海口使教西再平真听世气信北少关并内加化由却代军产入先山五太水万市眼体别处总才场师书"
+SYLLABLES = ["ni", "hao", "xie", "zai", "jian", "peng", "you", "xue", "xi", "chi", "fan", "shui", "mao", "gou"]
+
+
+def make_word_banks(size, seed=0):
+    """`size` unique entries split 30/70 between beginner and intermediate."""
+    rng = random.Random(seed)
+    seen = set()
+    entries = []
+    while len(entries) < size:
+        word = "".join(rng.choice(CHARACTERS) for _ in range(rng.randint(2, 4)))
+        if word in seen:
+            continue
+        seen.add(word)
+        pinyin = " ".join(rng.choice(SYLLABLES) + str(rng.randint(1, 4)) for _ in word)
+        entries.append({"word": word, "meaning": f"meaning {len(entries)} ({pinyin})"})
+    split = int(size * 0.3)
+    return {"beginner": entries[:split], "intermediate": entries[split:]}
+
+
+def write_word_banks(words_dir, language, word_banks):
+    language_dir = os.path.join(words_dir, language)
+    os.makedirs(language_dir, exist_ok=True)
+    for level, entries in word_banks.items():
+        with open(os.path.join(language_dir, f"{level}.json"), "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+
+
+def make_apkg(path, notes, media=0, media_bytes=4096, seed=0):
+    """Write an .apkg whose notes use the field layout convert_anki_to_wordbank expects:
+    number, word, (unused), pinyin, meaning."""
+    rng = random.Random(seed)
+    banks = make_word_banks(notes, seed)
+    entries = banks["beginner"] + banks["intermediate"]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "collection.anki2")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE notes (id integer primary key, guid text not null, mid integer not null,"
+            " mod integer not null, usn integer not null, tags text not null, flds text not null,"
+            " sfld text not null, csum integer not null, flags integer not null, data text not null)"
+        )
+        rows = []
+        for i, entry in enumerate(entries, 1):
+            pinyin = entry["meaning"].rsplit("(", 1)[-1].rstrip(")")
+            fields = [str(i), entry["word"], "", pinyin, f"meaning {i}"]
+            rows.append((i, f"g{i}", 1, 0, -1, "", "\x1f".join(fields), entry["word"], 0, 0, ""))
+        conn.executemany("INSERT INTO notes VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+        conn.commit()
+        conn.close()
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as apkg:
+            apkg.write(db_path, "collection.anki2")
+            apkg.writestr("media", json.dumps({str(i): f"audio_{i}.mp3" for i in range(media)}))
+            for i in range(media):
+                apkg.writestr(str(i), rng.randbytes(media_bytes))
+    return path
+
+
+def _write_pdf(path, pages):
+    """Minimal PDF writer. `pages` is a list of (content_stream, image or None),
+    where image is (width, height, zlib-compressed 8-bit grayscale rows)."""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    page_tree = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for content, image in pages:
+        resources = f"/Font << /F1 {font} 0 R >>"
+        if image is not None:
+            width, height, data = image
+            image_id = add(
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray"
+                f" /BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode()
+                + data + b"\nendstream"
+            )
+            resources += f" /XObject << /Im1 {image_id} 0 R >>"
+        stream_id = add(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {page_tree} 0 R /MediaBox [0 0 612 792]"
+            f" /Resources << {resources} >> /Contents {stream_id} 0 R >>".encode()
+        ))
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {page_tree} 0 R >>".encode()
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[page_tree - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return path
+
+
+def make_text_pdf(path, pages, lines_per_page=40, seed=0):
+    """A PDF with an extractable text layer. Uses PyMuPDF with a CJK font when
+    available, otherwise writes pinyin with the built-in Helvetica font."""
+    rng = random.Random(seed)
+    if fitz is not None:
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            for line in range(lines_per_page):
+                text = "".join(rng.choice(CHARACTERS) for _ in range(20))
+                page.insert_text((40, 40 + line * 18), text, fontname="china-s", fontsize=12)
+        doc.save(path)
+        doc.close()
+        return path
+
+    content = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(SYLLABLES) for _ in range(12)) for _ in range(lines_per_page)]
+        ops = ["BT /F1 11 Tf 40 760 Td 14 TL"] + [f"({line}) Tj T*" for line in lines] + ["ET"]
+        content.append(("\n".join(ops).encode(), None))
+    return _write_pdf(path, content)
+
+
+def make_scanned_pdf(path, pages, width=850, height=1100, seed=0):
+    """An image-only PDF (no text layer), so extraction has to fall through to OCR."""
+    rng = random.Random(seed)
+    content = []
+    for _ in range(pages):
+        # Light paper with dark horizontal "text" bands, which compresses like a real scan
+        rows = []
+        for y in range(height):
+            if (y // 12) % 3 == 0 and 80 < y < height - 80:
+                rows.append(bytes(rng.choice((30, 60, 240)) for _ in range(width)))
+            else:
+                rows.append(bytes([245]) * width)
+        image = (width, height, zlib.compress(b"".join(rows)))
+        draw = b"q 612 0 0 792 0 0 cm /Im1 Do Q"
+        content.append((draw, image))
+    return _write_pdf(path, content)
+
+
+def make_wav(path, seconds=3.0, rate=16000, seed=0):
+    """A mono 16-bit WAV with a few voiced-sounding tones."""
+    rng = random.Random(seed)
+    frequencies = [rng.uniform(120, 300) for _ in range(3)]
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        sample = sum(math.sin(2 * math.pi * f * t) for f in frequencies) / len(frequencies)
+        frames += struct.pack("<h", int(sample * 12000))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return path
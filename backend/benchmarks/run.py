@@ -0,0 +1,604 @@
+"""Benchmark suite for the word-bank, Anki, PDF, normalization and HTTP paths.
+
+Every case runs in a fresh process so peak RSS is per case, against
+synthetic data from benchmarks.datagen and, for the HTTP endpoints, the
+local provider stubs in benchmarks.stubs. Results are written as JSON so
+two runs can be compared.
+
+Run from backend/:
+
+    python -m benchmarks.run                       # default sizes, all cases
+    python -m benchmarks.run --full                # adds the 1M-entry word banks
+    python -m benchmarks.run --only word_banks --sizes 1000,100000
+    python -m benchmarks.run --compare benchmarks/results/20250101-120000.json
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import datagen  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+FULL_SIZES = DEFAULT_SIZES + (1_000_000,)
+API_BANK_SIZE = 1_000
+# Another learner's bank, rewritten in the background by the isolation case
+BUSY_BANK_SIZE = 100_000
+
+TRANSCRIPTIONS = [
+    "(笑声) 你好，我叫（小明）！",
+    "[背景音乐] 谢谢 [掌声] 再见。",
+    "ＡＢＣ 学习 (咳嗽) 中文，很难吗？",
+    "Hola, ¿cómo estás? (risas)",
+]
+
+
+class Fixtures:
+    """Generated inputs, cached on disk for the whole run and shared by all cases."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def word_banks(self, size, language="chinese"):
+        """Directory usable as XILANHUA_WORDS_DIR holding a `size`-entry bank."""
+        path = self._path(f"words-{size}")
+        if not os.path.exists(path):
+            datagen.write_word_banks(path, language, datagen.make_word_banks(size))
+        return path
+
+    def apkg(self, notes, media=0):
+        path = self._path(f"deck-{notes}-{media}.apkg")
+        if not os.path.exists(path):
+            datagen.make_apkg(path, notes, media)
+        return path
+
+    def text_pdf(self, pages):
+        path = self._path(f"text-{pages}.pdf")
+        if not os.path.exists(path):
+            datagen.make_text_pdf(path, pages)
+        return path
+
+    def scanned_pdf(self, pages):
+        path = self._path(f"scanned-{pages}.pdf")
+        if not os.path.exists(path):
+            datagen.make_scanned_pdf(path, pages)
+        return path
+
+    def wav(self, seconds):
+        path = self._path(f"clip-{seconds}.wav")
+        if not os.path.exists(path):
+            datagen.make_wav(path, seconds)
+        return path
+
+
+CASES = []
+
+
+class Case:
+    def __init__(self, name, params, fixtures=None):
+        self.name = name
+        self.params = params
+        self.fixtures = fixtures
+
+    @property
+    def key(self):
+        suffix = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{suffix}]" if suffix else self.name
+
+
+def case(name, fixtures=None, sized=False, **params):
+    """Register a benchmark. `setup(fx, workdir, **params)` runs in the child
+    process and returns (fn, items_per_call); `fixtures(fx, **params)` runs in
+    the parent first so data generation doesn't count towards the child's RSS."""
+    def register(setup):
+        CASES.append((name, setup, params, fixtures, sized))
+        return setup
+    return register
+
+
+def _use_words(fx, workdir, size):
+    """Point the app at a private, writable copy of a generated word bank."""
+    words = os.path.join(workdir, "words")
+    shutil.copytree(fx.word_banks(size), words)
+    os.environ["XILANHUA_WORDS_DIR"] = words
+    return words
+
+
+def _sync(coroutine_fn):
+    return lambda *args: asyncio.run(coroutine_fn(*args))
+
+
+# Word banks
+
+@case("word_banks.load", sized=True, fixtures=lambda fx, size: fx.word_banks(size))
+def bench_load_word_banks(fx, workdir, size):
+    from main import load_word_banks
+    os.environ["XILANHUA_WORDS_DIR"] = fx.word_banks(size)
+    return (lambda: load_word_banks("chinese")), size
+
+
+@case("word_banks.save", sized=True, fixtures=lambda fx, size: fx.word_banks(size))
+def bench_save_word_banks(fx, workdir, size):
+    from main import load_word_banks, save_word_banks
+    _use_words(fx, workdir, size)
+    word_banks = load_word_banks("chinese")
+    return (lambda: save_word_banks(word_banks, "chinese")), size
+
+
+# Anki
+
+@case("anki.read_database", notes=5_000, fixtures=lambda fx, notes: fx.apkg(notes))
+def bench_read_anki_database(fx, workdir, notes):
+    from ank import extract_apkg, read_anki_database
+    extract_dir = os.path.join(workdir, "extracted_anki")
+    extract_apkg(fx.apkg(notes), extract_dir)
+    db_path = os.path.join(extract_dir, "collection.anki2")
+    return (lambda: read_anki_database(db_path)), notes
+
+
+@case("anki.convert", notes=5_000, fixtures=lambda fx, notes: fx.apkg(notes))
+def bench_convert_anki_to_wordbank(fx, workdir, notes):
+    from ank import extract_apkg, read_anki_database, convert_anki_to_wordbank
+    extract_dir = os.path.join(workdir, "extracted_anki")
+    extract_apkg(fx.apkg(notes), extract_dir)
+    cards = read_anki_database(os.path.join(extract_dir, "collection.anki2"))
+    return (lambda: convert_anki_to_wordbank(cards)), notes
+
+
+@case("anki.extract", notes=5_000, media=200, fixtures=lambda fx, notes, media: fx.apkg(notes, media))
+def bench_extract_apkg(fx, workdir, notes, media):
+    from ank import extract_apkg
+    path = fx.apkg(notes, media)
+    extract_dir = os.path.join(workdir, "extracted_anki")
+    return (lambda: extract_apkg(path, extract_dir)), notes + media
+
+
+# PDF
+
+@case("pdf.extract_text", pages=20, fixtures=lambda fx, pages: fx.text_pdf(pages))
+def bench_extract_text_pdf(fx, workdir, pages):
+    from api import extract_text_from_pdf
+    path = fx.text_pdf(pages)
+    return (lambda: _sync(extract_text_from_pdf)(path)), pages
+
+
+@case("pdf.extract_scanned", pages=5, fixtures=lambda fx, pages: fx.scanned_pdf(pages))
+def bench_extract_scanned_pdf(fx, workdir, pages):
+    # No text layer: measures what both extractors cost before falling through to OCR
+    from api import extract_text_from_pdf
+    path = fx.scanned_pdf(pages)
+    return (lambda: _sync(extract_text_from_pdf)(path)), pages
+
+
+# Normalization
+
+@case("clean_text", batch=1_000)
+def bench_clean_text(fx, workdir, batch):
+    from main import clean_text
+    texts = [TRANSCRIPTIONS[i % len(TRANSCRIPTIONS)] for i in range(batch)]
+    return (lambda: [clean_text(text) for text in texts]), batch
+
+
+# HTTP endpoints, against the provider stubs
+
+def _client(fx, workdir, size=API_BANK_SIZE):
+    _use_words(fx, workdir, size)
+    from fastapi.testclient import TestClient
+    import api
+    return TestClient(api.app)
+
+
+def _expect(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} -> "
+                           f"{response.status_code}: {response.text[:200]}")
+    return response
+
+
+def _api_bank(fx, **params):
+    return fx.word_banks(API_BANK_SIZE)
+
+
+@case("api.get_words", fixtures=_api_bank)
+def bench_api_get_words(fx, workdir):
+    client = _client(fx, workdir)
+    return (lambda: _expect(client.get("/api/words"))), 1
+
+
+@case("api.get_words_other_learner_busy",
+      fixtures=lambda fx: (_api_bank(fx), fx.word_banks(BUSY_BANK_SIZE)))
+def bench_api_get_words_other_learner_busy(fx, workdir):
+    """get_words for one learner while another keeps adding words to a large bank."""
+    client = _client(fx, workdir)
+    busy_dir = os.path.join(os.environ["XILANHUA_WORDS_DIR"], "users", "busy")
+    shutil.copytree(fx.word_banks(BUSY_BANK_SIZE), busy_dir)
+    from fastapi.testclient import TestClient
+    import api
+    busy = TestClient(api.app)
+    counter = iter(range(10 ** 9))
+
+    def write_forever():
+        while True:
+            busy.post("/api/words", params={"user": "busy"}, json={
+                "level": "beginner", "word": f"新词{next(counter)}", "meaning": "new word (xin1 ci2)"
+            })
+
+    threading.Thread(target=write_forever, daemon=True).start()
+    return (lambda: _expect(client.get("/api/words"))), 1
+
+
+@case("api.search", fixtures=_api_bank)
+def bench_api_search(fx, workdir):
+    client = _client(fx, workdir)
+    _expect(client.get("/api/words/search", params={"q": "meaning"}))  # builds the index
+    queries = iter(["meaning 1", "xue", "ni hao", "的", "zzz"] * 10 ** 6)
+    return (lambda: _expect(client.get("/api/words/search", params={"q": next(queries)}))), 1
+
+
+@case("api.add_word", fixtures=_api_bank)
+def bench_api_add_word(fx, workdir):
+    client = _client(fx, workdir)
+    counter = iter(range(10 ** 9))
+    return (lambda: _expect(client.post("/api/words", json={
+        "level": "beginner", "word": f"新词{next(counter)}", "meaning": "new word (xin1 ci2)"
+    }))), 1
+
+
+@case("api.remove_word", fixtures=_api_bank)
+def bench_api_remove_word(fx, workdir):
+    client = _client(fx, workdir)
+    words = iter([entry["word"] for entry in client.get("/api/words").json()["beginner"]])
+    return (lambda: _expect(client.delete(f"/api/words/beginner/{next(words, 'missing')}"))), 1
+
+
+@case("api.extract_text", fixtures=_api_bank)
+def bench_api_extract_text(fx, workdir):
+    client = _client(fx, workdir)
+    text = "今天我们学习中文。经济和环境都很重要。" * 20
+    return (lambda: _expect(client.post("/api/extract-text", json={"text": text}))), 1
+
+
+@case("api.extract_pdf", pages=5, fixtures=lambda fx, pages: (_api_bank(fx), fx.text_pdf(pages)))
+def bench_api_extract_pdf(fx, workdir, pages):
+    client = _client(fx, workdir)
+    with open(fx.text_pdf(pages), "rb") as f:
+        content = f.read()
+    return (lambda: _expect(client.post(
+        "/api/extract-pdf", files={"pdf_file": ("doc.pdf", content, "application/pdf")}))), 1
+
+
+@case("api.extract_pdf_ocr", pages=2, fixtures=lambda fx, pages: (_api_bank(fx), fx.scanned_pdf(pages)))
+def bench_api_extract_pdf_ocr(fx, workdir, pages):
+    client = _client(fx, workdir)
+    with open(fx.scanned_pdf(pages), "rb") as f:
+        content = f.read()
+    return (lambda: _expect(client.post(
+        "/api/extract-pdf", params={"ocr_method": "mistral"},
+        files={"pdf_file": ("scan.pdf", content, "application/pdf")}))), 1
+
+
+@case("api.transcribe", seconds=3, fixtures=lambda fx, seconds: (_api_bank(fx), fx.wav(seconds)))
+def bench_api_transcribe(fx, workdir, seconds):
+    client = _client(fx, workdir)
+    with open(fx.wav(seconds), "rb") as f:
+        content = f.read()
+    return (lambda: _expect(client.post(
+        "/api/transcribe", params={"target": "你好"},
+        files={"audio": ("clip.wav", content, "audio/wav")}))), 1
+
+
+@case("api.import_anki", notes=1_000, fixtures=lambda fx, notes: (_api_bank(fx), fx.apkg(notes)))
+def bench_api_import_anki(fx, workdir, notes):
+    client = _client(fx, workdir)
+    with open(fx.apkg(notes), "rb") as f:
+        content = f.read()
+    return (lambda: _expect(client.post(
+        "/api/import-anki", files={"anki_file": ("deck.apkg", content, "application/octet-stream")}))), notes
+
+
+@case("api.import_anki_large", notes=1_000, media=5_000,
+      fixtures=lambda fx, notes, media: (_api_bank(fx), fx.apkg(notes, media)))
+def bench_api_import_anki_large(fx, workdir, notes, media):
+    # ~20 MB deck: spooled to disk, so peak RSS should stay close to api.import_anki
+    client = _client(fx, workdir)
+    path = fx.apkg(notes, media)
+    size = os.path.getsize(path)
+
+    def upload():
+        with open(path, "rb") as f:
+            return _expect(client.post(
+                "/api/import-anki", files={"anki_file": ("deck.apkg", f, "application/octet-stream")}))
+    return upload, size
+
+
+@case("api.extract_anki", notes=1_000, fixtures=lambda fx, notes: (_api_bank(fx), fx.apkg(notes)))
+def bench_api_extract_anki(fx, workdir, notes):
+    client = _client(fx, workdir)
+    shutil.copy(fx.apkg(notes), os.path.join(workdir, "deck.apkg"))
+    return (lambda: _expect(client.post("/api/extract-anki", params={"filename": "deck.apkg"}))), 1
+
+
+@case("api.check_anki_status", fixtures=_api_bank)
+def bench_api_check_anki_status(fx, workdir):
+    client = _client(fx, workdir)
+    return (lambda: _expect(client.get("/api/check-anki-status"))), 1
+
+
+@case("api.review_next", fixtures=_api_bank)
+def bench_api_review_next(fx, workdir):
+    client = _client(fx, workdir)
+    return (lambda: _expect(client.get("/api/review/next", params={"level": "beginner"}))), 1
+
+
+@case("api.review_record", fixtures=_api_bank)
+def bench_api_review_record(fx, workdir):
+    client = _client(fx, workdir)
+
+    def review():
+        card = _expect(client.get("/api/review/next", params={"level": "beginner"})).json()["card"]
+        return _expect(client.post("/api/review", json={
+            "level": "beginner", "word": card["word"], "score": 0.9
+        }))
+    return review, 1
+
+
+@case("api.metrics", fixtures=_api_bank)
+def bench_api_metrics(fx, workdir):
+    client = _client(fx, workdir)
+    client.get("/api/words")
+    return (lambda: _expect(client.get("/metrics"))), 1
+
+
+@case("api.ready", fixtures=_api_bank)
+def bench_api_ready(fx, workdir):
+    client = _client(fx, workdir)
+    return (lambda: _expect(client.get("/api/ready"))), 1
+
+
+
+# CLI
+
+@case("cli.practice_session", words=10, seconds=1,
+      fixtures=lambda fx, words, seconds: (_api_bank(fx), fx.wav(seconds)))
+def bench_cli_practice_session(fx, workdir, words, seconds):
+    """A `words`-word drill against the STT stub. `rec` is stood in for by a
+    `seconds` wait and a copy of a WAV clip; with --stub-latency, compare the
+    time per word with `seconds`."""
+    _use_words(fx, workdir, API_BANK_SIZE)
+    import contextlib
+    import io
+    import main
+    main.backends.get("elevenlabs")
+    clip = fx.wav(seconds)
+
+    def record(duration):
+        time.sleep(duration)
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        shutil.copyfile(clip, path)
+        return path
+
+    word_banks = main.load_word_banks()
+
+    def drill():
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.practice_session(word_banks, "chinese", "beginner", size=words,
+                                  duration=seconds, countdown=0, record=record)
+    return drill, words
+
+def expand_cases(sizes, only):
+    cases = []
+    for name, setup, params, fixtures, sized in CASES:
+        variants = [dict(params, size=size) for size in sizes] if sized else [params]
+        for variant in variants:
+            item = Case(name, variant, fixtures)
+            if not only or any(fnmatch.fnmatch(item.key, f"*{pattern}*") for pattern in only):
+                cases.append(item)
+    return cases
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _child(case_name, params, fixtures_root, stub_options, iterations, max_seconds, conn):
+    """Run one case in a fresh interpreter and send its result back over `conn`."""
+    result = {"case": case_name, "params": params}
+    workdir = tempfile.mkdtemp(prefix="xilanhua-bench-")
+    try:
+        from benchmarks.stubs import StubServer
+
+        os.chdir(workdir)
+        os.environ.setdefault("LOG_LEVEL", "ERROR")
+        stub = StubServer(**stub_options).start()
+        os.environ.update(stub.environ())
+
+        setup = next(setup for name, setup, *_ in CASES if name == case_name)
+        try:
+            fn, items = setup(Fixtures(fixtures_root), workdir, **params)
+        except ImportError as e:
+            result.update(status="skipped", reason=f"missing dependency: {e.name or e}")
+            return
+
+        setup_rss = _rss_mb()
+        fn()  # warm-up, not counted
+        samples = []
+        started = time.perf_counter()
+        while len(samples) < iterations and (not samples or time.perf_counter() - started < max_seconds):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+
+        ordered = sorted(samples)
+        total = sum(samples)
+        result.update(
+            status="ok",
+            iterations=len(samples),
+            items_per_call=items,
+            p50_ms=round(percentile(ordered, 0.50) * 1000, 3),
+            p95_ms=round(percentile(ordered, 0.95) * 1000, 3),
+            p99_ms=round(percentile(ordered, 0.99) * 1000, 3),
+            mean_ms=round(total / len(samples) * 1000, 3),
+            ops_per_sec=round(len(samples) / total, 2),
+            items_per_sec=round(len(samples) * items / total, 1),
+            setup_rss_mb=setup_rss,
+            peak_rss_mb=_rss_mb(),
+            stub_requests=stub.config.requests,
+        )
+        stub.stop()
+    except Exception as e:
+        result.update(status="error", reason=f"{type(e).__name__}: {e}",
+                      traceback=traceback.format_exc(limit=5))
+    finally:
+        conn.send(result)
+        conn.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_case(item, fx, stub_options, iterations, max_seconds, timeout):
+    if item.fixtures is not None:
+        item.fixtures(fx, **item.params)
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(
+        item.name, item.params, fx.root, stub_options, iterations, max_seconds, child))
+    process.start()
+    child.close()
+    if parent.poll(timeout):
+        result = parent.recv()
+    else:
+        process.kill()
+        result = {"case": item.name, "params": item.params, "status": "error",
+                  "reason": f"timed out after {timeout}s"}
+    process.join()
+    result["key"] = item.key
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'case':<44} {'iters':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+          f"{'items/s':>12} {'peak MB':>8}")
+    for r in results:
+        if r["status"] != "ok":
+            print(f"{r['key']:<44} {r['status']}: {r.get('reason', '')}")
+            continue
+        print(f"{r['key']:<44} {r['iterations']:>5} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} "
+              f"{r['p99_ms']:>10.2f} {r['items_per_sec']:>12.0f} {r['peak_rss_mb']:>8.1f}")
+
+
+def compare(old_path, results):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {r["key"]: r for r in json.load(f)["results"] if r.get("status") == "ok"}
+    print(f"\nCompared with {old_path} (ratio = new / old; <1 is faster or smaller)")
+    print(f"{'case':<44} {'p50':>8} {'p95':>8} {'items/s':>8} {'peak RSS':>9}")
+    for r in results:
+        before = old.get(r["key"])
+        if r["status"] != "ok" or before is None:
+            continue
+
+        def ratio(field):
+            return f"{r[field] / before[field]:.2f}x" if before[field] else "-"
+        print(f"{r['key']:<44} {ratio('p50_ms'):>8} {ratio('p95_ms'):>8} "
+              f"{ratio('items_per_sec'):>8} {ratio('peak_rss_mb'):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", action="append", default=[],
+                        help="Run cases whose key contains this pattern (repeatable)")
+    parser.add_argument("--sizes", help="Comma-separated word-bank sizes, e.g. 1000,10000")
+    parser.add_argument("--full", action="store_true", help="Include the 1M-entry word banks")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop timing a case after this long, even below --iterations")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Kill a case after this long")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Seconds the provider stubs wait")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-error-status", type=int, default=429)
+    parser.add_argument("--fixtures", help="Reuse generated inputs from this directory")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--list", action="store_true", help="List case keys and exit")
+    args = parser.parse_args()
+
+    if args.sizes:
+        sizes = tuple(int(size) for size in args.sizes.split(","))
+    else:
+        sizes = FULL_SIZES if args.full else DEFAULT_SIZES
+    cases = expand_cases(sizes, args.only)
+    if args.list:
+        print("\n".join(item.key for item in cases))
+        return
+
+    fixtures_root = args.fixtures or tempfile.mkdtemp(prefix="xilanhua-fixtures-")
+    os.makedirs(fixtures_root, exist_ok=True)
+    fx = Fixtures(fixtures_root)
+    stub_options = {"latency": args.stub_latency, "error_rate": args.stub_error_rate,
+                    "error_status": args.stub_error_status}
+
+    results = []
+    try:
+        for item in cases:
+            print(f"running {item.key} ...", file=sys.stderr, flush=True)
+            results.append(run_case(item, fx, stub_options, args.iterations, args.max_seconds, args.timeout))
+    finally:
+        if not args.fixtures:
+            shutil.rmtree(fixtures_root, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "iterations": args.iterations,
+                "stub": stub_options,
+            },
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+
+    print_results(results)
+    print(f"\nWrote {output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Local stand-ins for the Anthropic, Mistral and ElevenLabs HTTP APIs.
+
+Each stub answers with a response shaped like the real API, after a
+configurable latency, and can inject throttling or server errors:
+
+    with StubServer(latency=0.05, error_rate=0.1, error_status=429) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        ...
+
+Run directly to serve all three on one port until interrupted:
+
+    python -m benchmarks.stubs --port 8765 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VOCAB_RESPONSE = {
+    "beginner": [{"word": "你好", "meaning": "hello"}, {"word": "吃饭", "meaning": "eat"}],
+    "intermediate": [{"word": "经济", "meaning": "economy"}, {"word": "环境", "meaning": "environment"}],
+}
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, slow_rate=0.0, slow_seconds=2.0,
+                 error_rate=0.0, error_status=429, transcript="你好", ocr_text="你好，经济环境。"):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.transcript = transcript
+        self.ocr_text = ocr_text
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        config = self.config
+        with config.lock:
+            config.requests += 1
+        delay = config.latency + random.uniform(0, config.jitter)
+        if random.random() < config.slow_rate:
+            delay += config.slow_seconds
+        time.sleep(delay)
+
+        if random.random() < config.error_rate:
+            with config.lock:
+                config.errors += 1
+            headers = {"Retry-After": "0"} if config.error_status == 429 else None
+            return self._reply(config.error_status, {"error": {"message": "injected fault"}}, headers)
+
+        path = self.path.split("?", 1)[0]
+        if path == "/v1/messages":
+            return self._reply(200, {
+                "id": "msg_stub", "type": "message", "role": "assistant", "model": "stub",
+                "content": [{"type": "text", "text": json.dumps(VOCAB_RESPONSE, ensure_ascii=False)}],
+                "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": 1, "output_tokens": 1},
+            })
+        if path == "/v1/files":
+            return self._reply(200, {
+                "id": "file-stub", "object": "file", "bytes": length, "created_at": 0,
+                "filename": "upload.pdf", "purpose": "ocr", "sample_type": "ocr_input", "source": "upload",
+            })
+        if path.startswith("/v1/files/") and path.endswith("/url"):
+            return self._reply(200, {"url": f"http://{self.headers.get('Host')}/signed/file-stub"})
+        if path == "/v1/ocr":
+            return self._reply(200, {
+                "pages": [{"index": 0, "markdown": config.ocr_text, "images": [],
+                           "dimensions": {"dpi": 200, "height": 1100, "width": 850}}],
+                "model": "mistral-ocr-latest",
+                "usage_info": {"pages_processed": 1, "doc_size_bytes": length},
+            })
+        if path == "/v1/speech-to-text":
+            return self._reply(200, {
+                "language_code": "zho", "language_probability": 1.0,
+                "text": config.transcript, "words": [],
+            })
+        return self._reply(404, {"error": {"message": f"no stub for {path}"}})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class StubServer:
+    """Serve all three provider stubs on one local port in a background thread."""
+
+    def __init__(self, port=0, **options):
+        self.config = StubConfig(**options)
+        handler = type("BoundStubHandler", (StubHandler,), {"config": self.config})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environ(self):
+        """Environment variables that point the SDK clients at this stub."""
+        return {
+            "ANTHROPIC_BASE_URL": self.url,
+            "ANTHROPIC_API_KEY": "stub",
+            "MISTRAL_SERVER_URL": self.url,
+            "MISTRAL_API_KEY": "stub",
+            "ELEVENLABS_BASE_URL": self.url,
+            "ELEVENLABS_API_KEY": "stub",
+        }
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args()
+
+    stub = StubServer(args.port, latency=args.latency, jitter=args.jitter, slow_rate=args.slow_rate,
+                      error_rate=args.error_rate, error_status=args.error_status)
+    for key, value in stub.environ().items():
+        print(f"export {key}={value}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
@@ -0,0 +1,304 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from itertools import islice
+from json.encoder import encode_basestring
+
+import backends
+from ank import export_apkg, extract_collection, iter_anki_entries, iter_anki_notes
+
+LEVELS = ("beginner", "intermediate")
+# Rows per Arrow record batch, Parquet row group and import batch
+BATCH_ROWS = 50_000
+# Text formats go out in chunks of about this many characters
+CHUNK_CHARS = 1 << 16
+MAX_WORD_CHARS = 200
+MAX_MEANING_CHARS = 2000
+
+# format -> (media type, file suffix)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrow"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "apkg": ("application/octet-stream", ".apkg"),
+}
+# Formats that need pyarrow
+COLUMNAR = ("arrow", "parquet")
+
+
+def snapshot(word_banks, levels=LEVELS):
+    """(level, bank, live rows) per level. Take it under the shard lock; it can
+    then be read without the lock while the banks keep changing."""
+    return [(level, word_banks[level], word_banks[level].snapshot()) for level in levels]
+
+
+def iter_rows(snap):
+    """(level, word, meaning, extra keys or None) for every row of a snapshot."""
+    for level, bank, rows in snap:
+        words, meanings, extras = bank.words, bank.meanings, bank.extras
+        for row in rows:
+            yield level, words[row], meanings[row], extras.get(row)
+
+
+# Export: each exporter yields the file as a series of bytes chunks
+
+def _chunked(pieces):
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_CHARS:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def export_ndjson(snap):
+    def lines():
+        for level, word, meaning, extra in iter_rows(snap):
+            if extra:
+                yield json.dumps({"level": level, "word": word, "meaning": meaning, **extra}, ensure_ascii=False) + "\n"
+            else:
+                yield f'{{"level": "{level}", "word": {encode_basestring(word)}, "meaning": {encode_basestring(meaning)}}}\n'
+    return _chunked(lines())
+
+
+def export_csv(snap):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("level", "word", "meaning"))
+    for level, word, meaning, _ in iter_rows(snap):
+        writer.writerow((level, word, meaning))
+        if buffer.tell() >= CHUNK_CHARS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _Drain:
+    """Write-only file for pyarrow writers whose output is handed on as it accumulates."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _schema(pa):
+    return pa.schema([
+        ("level", pa.dictionary(pa.int8(), pa.string())),
+        ("word", pa.string()),
+        ("meaning", pa.string()),
+    ])
+
+
+def _record_batches(pa, snap):
+    """Record batches of up to BATCH_ROWS rows, one level at a time."""
+    schema = _schema(pa)
+    # Every batch carries the same two-entry dictionary, so Arrow streams never need a replacement
+    dictionary = pa.array(LEVELS, pa.string())
+    for level, bank, rows in snap:
+        for start in range(0, len(rows), BATCH_ROWS):
+            chunk = rows[start:start + BATCH_ROWS]
+            levels = pa.DictionaryArray.from_arrays(pa.array([LEVELS.index(level)] * len(chunk), pa.int8()), dictionary)
+            yield pa.RecordBatch.from_arrays([
+                levels,
+                pa.array([bank.words[row] for row in chunk], pa.string()),
+                pa.array([bank.meanings[row] for row in chunk], pa.string()),
+            ], schema=schema)
+
+
+def export_arrow(snap):
+    """Arrow IPC stream, one record batch per BATCH_ROWS rows."""
+    pa = backends.get("pyarrow")
+    sink = _Drain()
+    with pa.ipc.new_stream(sink, _schema(pa)) as writer:
+        for batch in _record_batches(pa, snap):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def export_parquet(snap):
+    """Parquet, one row group per BATCH_ROWS rows; the footer comes last."""
+    pa = backends.get("pyarrow")
+    sink = _Drain()
+    with pa.parquet.ParquetWriter(sink, _schema(pa)) as writer:
+        for batch in _record_batches(pa, snap):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def export_anki(snap, deck_name="Xilanhua"):
+    """Anki .apkg. The deck is built in a temp file (a zip needs its central
+    directory at the end) and then streamed from disk."""
+    fd, path = tempfile.mkstemp(suffix=".apkg")
+    os.close(fd)
+    try:
+        export_apkg(((level, word, meaning) for level, word, meaning, _ in iter_rows(snap)), path, deck_name)
+        with open(path, "rb") as f:
+            yield from iter(lambda: f.read(1 << 20), b"")
+    finally:
+        os.remove(path)
+
+
+EXPORTERS = {
+    "ndjson": export_ndjson,
+    "csv": export_csv,
+    "arrow": export_arrow,
+    "parquet": export_parquet,
+    "apkg": export_anki,
+}
+
+
+# Import: each reader yields validated (level, entry) records from a binary file
+
+def _record(level, word, meaning, extra, default_level, unit, number):
+    """(level, entry) from one input row, or ValueError naming the row."""
+    level = level or default_level
+    if meaning is None:
+        meaning = ""
+    if (level in LEVELS and type(word) is str and 0 < len(word) <= MAX_WORD_CHARS and word.strip()
+            and type(meaning) is str and len(meaning) <= MAX_MEANING_CHARS):
+        entry = {"word": word, "meaning": meaning}
+        if extra:
+            entry.update(extra)
+        return level, entry
+    # Only build the message for the row that failed
+    where = f"{unit} {number}"
+    if level not in LEVELS:
+        raise ValueError(f"{where}: level must be one of {', '.join(LEVELS)}, not {level!r}")
+    if not isinstance(word, str) or not word.strip():
+        raise ValueError(f"{where}: missing word")
+    if len(word) > MAX_WORD_CHARS:
+        raise ValueError(f"{where}: word is longer than {MAX_WORD_CHARS} characters")
+    if not isinstance(meaning, str):
+        raise ValueError(f"{where}: meaning must be a string")
+    raise ValueError(f"{where}: meaning is longer than {MAX_MEANING_CHARS} characters")
+
+
+def read_ndjson(f, default_level=None):
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: invalid JSON ({e})") from None
+        if not isinstance(item, dict):
+            raise ValueError(f"line {number}: expected a JSON object")
+        level = item.pop("level", None)
+        yield _record(level, item.pop("word", None), item.pop("meaning", None), item, default_level, "line", number)
+
+
+def read_csv(f, default_level=None):
+    reader = csv.reader(io.TextIOWrapper(f, encoding="utf-8-sig", newline=""))
+    header = next(reader, [])
+    if "word" not in header:
+        raise ValueError("CSV header must have a 'word' column (and optionally 'level' and 'meaning')")
+    columns = [header.index(name) if name in header else None for name in ("level", "word", "meaning")]
+    width = max(column for column in columns if column is not None) + 1
+    level_at, word_at, meaning_at = columns
+    for number, row in enumerate(reader, 2):
+        if len(row) < width:
+            row += [None] * (width - len(row))
+        yield _record(row[level_at] if level_at is not None else None, row[word_at],
+                      row[meaning_at] if meaning_at is not None else None, None, default_level, "line", number)
+
+
+def _read_batches(batches, default_level):
+    number = 0
+    for batch in batches:
+        columns = batch.to_pydict()
+        if "word" not in columns:
+            raise ValueError("Arrow data must have a 'word' column (and optionally 'level' and 'meaning')")
+        words = columns["word"]
+        levels = columns.get("level") or [None] * len(words)
+        meanings = columns.get("meaning") or [None] * len(words)
+        for level, word, meaning in zip(levels, words, meanings):
+            number += 1
+            yield _record(level, word, meaning, None, default_level, "row", number)
+
+
+def read_arrow(f, default_level=None):
+    pa = backends.get("pyarrow")
+    try:
+        reader = pa.ipc.open_stream(f)
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Not an Arrow IPC stream: {e}") from None
+    yield from _read_batches(reader, default_level)
+
+
+def read_parquet(f, default_level=None):
+    pa = backends.get("pyarrow")
+    try:
+        parquet = pa.parquet.ParquetFile(f)
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Not a Parquet file: {e}") from None
+    yield from _read_batches(parquet.iter_batches(batch_size=BATCH_ROWS), default_level)
+
+
+def read_apkg(f, default_level=None):
+    with tempfile.TemporaryDirectory() as extract_dir:
+        try:
+            db_path = extract_collection(f, extract_dir)
+        except Exception as e:
+            raise ValueError(f"Not an Anki deck: {e}") from None
+        for number, (level, entry) in enumerate(iter_anki_entries(iter_anki_notes(db_path)), 1):
+            yield _record(level, entry["word"], entry["meaning"], None, default_level, "note", number)
+
+
+READERS = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+    "arrow": read_arrow,
+    "parquet": read_parquet,
+    "apkg": read_apkg,
+}
+
+
+def insert(word_banks, records):
+    """Append records a batch at a time, skipping words their level already
+    has. Returns (added, skipped)."""
+    added = skipped = 0
+    records = iter(records)
+    while True:
+        batch = list(islice(records, BATCH_ROWS))
+        if not batch:
+            return added, skipped
+        pending = {level: {} for level in LEVELS}
+        for level, entry in batch:
+            if entry["word"] in pending[level] or word_banks[level].find(entry["word"]) >= 0:
+                skipped += 1
+            else:
+                pending[level][entry["word"]] = entry
+        for level, entries in pending.items():
+            word_banks[level].extend(entries.values())
+            added += len(entries)
@@ -0,0 +1,422 @@
+import os
+import asyncio
+import logging
+import random
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+
+SUCCESS = "success"
+THROTTLED = "throttled"
+FAILED = "failed"
+FATAL = "fatal"
+
+THROTTLE_STATUS_CODES = {429, 503, 529}
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a governed call cannot finish before the current deadline."""
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting calls."""
+
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds):
+    """Bound every governed call made inside the block to `seconds` from now.
+
+    Nested deadlines can only shrink the budget. The deadline lives in a
+    context variable, so it follows the request into `asyncio.to_thread`.
+    """
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires = min(expires, current)
+    token = _deadline.set(expires)
+    try:
+        yield expires
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining():
+    """Seconds left before the current deadline, or None when unbounded."""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` requests per second with bursts up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token and return 0, or return how long until one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return True
+            if end is not None and time.monotonic() + wait > end:
+                return False
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: grow by 1/limit per success, halve on throttling."""
+
+    def __init__(self, initial=4, minimum=1, maximum=32, backoff=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def try_acquire(self):
+        with self.cond:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, outcome=SUCCESS):
+        with self.cond:
+            self.in_flight -= 1
+            if outcome == SUCCESS:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif outcome == THROTTLED:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            self.cond.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through after a cooldown."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def abandon(self):
+        """A call that was let through gave up without an answer from the provider.
+
+        If it was the half-open probe, go back to OPEN with the cooldown already
+        served, so the next call probes instead of everything being refused.
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+def _status_code(exc):
+    for obj in (exc, getattr(exc, "response", None)):
+        code = getattr(obj, "status_code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_timeout(exc):
+    return isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower()
+
+
+def classify(exc):
+    """Sort an exception into THROTTLED, FAILED (retryable) or FATAL."""
+    code = _status_code(exc)
+    if code in THROTTLE_STATUS_CODES:
+        return THROTTLED
+    if code is not None:
+        return FAILED if code >= 500 else FATAL
+    if _is_timeout(exc):
+        return THROTTLED
+    if isinstance(exc, ConnectionError) or "connection" in type(exc).__name__.lower():
+        return FAILED
+    return FATAL
+
+
+class Governor:
+    """Rate limit, concurrency limit, retry and circuit-break calls to one provider.
+
+    `fn` is called as `fn(timeout)` where `timeout` is the number of seconds the
+    attempt may take, so callers can forward it to the provider SDK.
+    """
+
+    def __init__(self, name, rate=5.0, burst=5, concurrency=4, max_concurrency=16,
+                 retries=3, base_delay=0.5, max_delay=10.0,
+                 failure_threshold=5, reset_timeout=30.0, timeout=60.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(concurrency, maximum=max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def _attempt_timeout(self):
+        remaining = time_remaining()
+        if remaining is None:
+            return self.timeout
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded before calling {self.name}")
+        return min(self.timeout, remaining)
+
+    def _acquire(self):
+        if not self.bucket.acquire(self._attempt_timeout()):
+            raise DeadlineExceeded(f"Deadline exceeded waiting for {self.name} rate limit")
+        if not self.limiter.acquire(self._attempt_timeout()):
+            raise DeadlineExceeded(f"Deadline exceeded waiting for {self.name} concurrency slot")
+        self._check_breaker()
+
+    async def _aacquire(self):
+        # Poll rather than block a worker thread, so cancelling the caller
+        # never leaves a slot taken on its behalf.
+        while True:
+            wait = self.bucket.try_acquire()
+            if not wait:
+                break
+            if wait > self._attempt_timeout():
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {self.name} rate limit")
+            await asyncio.sleep(wait)
+        while not self.limiter.try_acquire():
+            self._attempt_timeout()
+            await asyncio.sleep(0.01)
+        self._check_breaker()
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self.limiter.release(FATAL)
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def _retry_delay(self, e, attempt):
+        """Record a failed attempt and return how long to wait, or re-raise."""
+        remaining = time_remaining()
+        if isinstance(e, DeadlineExceeded) or (_is_timeout(e) and remaining is not None and remaining <= 0):
+            # The caller's own deadline ran out, which says nothing about the
+            # provider: free the slot without touching the limit or the breaker
+            self.limiter.release(FATAL)
+            self.breaker.abandon()
+            if isinstance(e, DeadlineExceeded):
+                raise e
+            raise DeadlineExceeded(f"Deadline exceeded calling {self.name}") from e
+        outcome = classify(e)
+        self.limiter.release(outcome)
+        if outcome == FATAL:
+            # The provider answered, it just didn't like the request.
+            self.breaker.record_success()
+            raise e
+        if outcome == THROTTLED and not _is_timeout(e):
+            # Throttling is a load signal for the limiter and the backoff, not
+            # a sign the provider is down; a throttled probe just frees its turn.
+            # Timeouts also slow the limiter down but do count as failures.
+            self.breaker.abandon()
+        else:
+            self.breaker.record_failure()
+        if attempt >= self.retries:
+            raise e
+
+        delay = _retry_after(e)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if remaining is not None and delay >= remaining:
+            raise e
+        logger.info("%s call failed (%s: %s), retrying in %.2fs", self.name, outcome, e, delay)
+        return delay
+
+    def _succeeded(self):
+        self.limiter.release(SUCCESS)
+        self.breaker.record_success()
+
+    def call(self, fn):
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                result = fn(self._attempt_timeout())
+            except Exception as e:
+                time.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+                continue
+            self._succeeded()
+            return result
+
+    async def acall(self, fn):
+        """Async variant of `call`; `fn(timeout)` must return an awaitable."""
+        attempt = 0
+        while True:
+            await self._aacquire()
+            try:
+                result = await fn(self._attempt_timeout())
+            except asyncio.CancelledError:
+                # Losing a hedge race is not the provider's fault, but a
+                # cancelled half-open probe must not leave the breaker stuck
+                self.limiter.release(FATAL)
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+                continue
+            self._succeeded()
+            return result
+
+    def status(self):
+        return {
+            "name": self.name,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "circuit": self.breaker.state,
+        }
+
+
+PROVIDER_DEFAULTS = {
+    "anthropic": {"rate": 1.0, "burst": 4, "concurrency": 2, "max_concurrency": 8, "timeout": 120.0},
+    "mistral": {"rate": 2.0, "burst": 4, "concurrency": 2, "max_concurrency": 8, "timeout": 120.0},
+    "elevenlabs": {"rate": 4.0, "burst": 8, "concurrency": 4, "max_concurrency": 16, "timeout": 60.0},
+}
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def _env_overrides(name):
+    overrides = {}
+    prefix = name.upper()
+    for key, env, cast in (("rate", "RATE_LIMIT", float),
+                           ("max_concurrency", "MAX_CONCURRENCY", int),
+                           ("timeout", "TIMEOUT", float)):
+        value = os.getenv(f"{prefix}_{env}")
+        if value:
+            overrides[key] = cast(value)
+    return overrides
+
+
+def get_governor(name):
+    """Return the shared governor for a provider, creating it on first use."""
+    with _governors_lock:
+        if name not in _governors:
+            settings = dict(PROVIDER_DEFAULTS.get(name, {}))
+            settings.update(_env_overrides(name))
+            _governors[name] = Governor(name, **settings)
+        return _governors[name]
+
+
+def governor_statuses():
+    with _governors_lock:
+        return [governor.status() for governor in _governors.values()]
+
+
+if __name__ == "__main__":
+    # Drive a governor against a local stub that throttles above a fixed
+    # concurrency and fails randomly, and report how the limit settles.
+    from concurrent.futures import ThreadPoolExecutor
+
+    class StubError(Exception):
+        def __init__(self, status_code):
+            super().__init__(f"stub returned {status_code}")
+            self.status_code = status_code
+
+    capacity = 6
+    active = 0
+    active_lock = threading.Lock()
+
+    def stub(timeout):
+        global active
+        with active_lock:
+            active += 1
+            over = active > capacity
+        try:
+            time.sleep(0.02)
+            if over:
+                raise StubError(429)
+            if random.random() < 0.05:
+                raise StubError(500)
+            return "ok"
+        finally:
+            with active_lock:
+                active -= 1
+
+    gov = Governor("stub", rate=200, burst=20, concurrency=2, max_concurrency=32,
+                   base_delay=0.01, max_delay=0.1)
+    ok = failed = 0
+    start = time.monotonic()
+    with ThreadPoolExecutor(32) as pool:
+        for future in [pool.submit(gov.call, stub) for _ in range(500)]:
+            try:
+                future.result()
+                ok += 1
+            except Exception:
+                failed += 1
+    elapsed = time.monotonic() - start
+    print(f"{ok} ok, {failed} failed in {elapsed:.2f}s ({ok / elapsed:.0f} req/s)")
+    print(gov.status())
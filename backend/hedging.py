@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies used to pick a hedging delay."""
+
+    def __init__(self, window=256):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+
+class Hedger:
+    """Race a primary request against delayed duplicates; the first good answer wins.
+
+    A duplicate goes out once the primary has been running longer than the
+    `percentile` of recently observed latencies (or `default_delay` until
+    `min_samples` have been seen). Losing attempts are cancelled.
+    """
+
+    def __init__(self, percentile=0.95, min_delay=0.2, default_delay=2.0,
+                 min_samples=20, window=256):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def delay(self):
+        if len(self.latencies.samples) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.latencies.percentile(self.percentile))
+
+    async def _timed(self, attempt, sample):
+        """Await `attempt`, recording its latency if `sample` is set.
+
+        Only primaries are sampled, win or lose: timing just the winners would
+        skew the window low, and hedges would then fire earlier and earlier.
+        A primary cancelled after losing the race took at least as long as it
+        ran, so that elapsed time goes in as a lower bound.
+        """
+        start = time.monotonic()
+        try:
+            result = await attempt()
+        except asyncio.CancelledError:
+            if sample:
+                self.latencies.record(time.monotonic() - start)
+            raise
+        if sample:
+            self.latencies.record(time.monotonic() - start)
+        return result
+
+    async def run(self, attempts):
+        """Run zero-argument coroutine factories in order, hedging after `delay()`.
+
+        Returns the first successful result. If every attempt fails, the last
+        error is raised.
+        """
+        remaining = list(attempts)
+        pending = set()
+        owner = {}
+        error = None
+
+        def launch():
+            task = asyncio.ensure_future(self._timed(remaining.pop(0), sample=not owner))
+            owner[task] = len(owner)
+            pending.add(task)
+
+        launch()
+        try:
+            while pending:
+                timeout = self.delay() if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges_sent += 1
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        if owner[task] > 0:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+                if not pending and remaining:
+                    launch()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def status(self):
+        return {
+            "delay": round(self.delay(), 3),
+            "samples": len(self.latencies.samples),
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+        }
@@ -0,0 +1,125 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# Attributes every LogRecord has; anything else came in through `extra=` and
+# is emitted as a structured field.
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+_configured = False
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in `every` records logged with `extra={"sample": True}`.
+
+    Counting is per call site (logger and message template), so a hot loop
+    logging every word is thinned out without hiding rarer events.
+    """
+
+    def __init__(self, every=100):
+        super().__init__()
+        self.every = max(1, every)
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "sample", False):
+            return True
+        key = (record.name, record.msg)
+        with self.lock:
+            count = self.counts.get(key, 0)
+            self.counts[key] = count + 1
+        return count % self.every == 0
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the request path; drops records when full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        line = f"{stamp} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Route all logging through a background thread. Safe to call more than once.
+
+    Environment:
+        LOG_LEVEL         root level, WARNING by default so production is quiet
+        LOG_LEVELS        per-module overrides, e.g. "api=INFO,governor=DEBUG"
+        LOG_FORMAT        "text" (default) or "json"
+        LOG_SAMPLE_EVERY  keep 1 in N high-volume records (default 100)
+        LOG_QUEUE_SIZE    records buffered before new ones are dropped
+    """
+    global _configured, _listener
+    if _configured:
+        return
+    _configured = True
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if os.getenv("LOG_FORMAT") == "json" else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(int(os.getenv("LOG_SAMPLE_EVERY", "100"))))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+    root.addHandler(handler)
+    for name, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,105 +1,94 @@
 from dotenv import load_dotenv
+import asyncio
 import os
-from elevenlabs.client import ElevenLabs
 import subprocess
+import threading
+import weakref
 import tempfile
-import random
 import time
 
-import json
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from governor import get_governor
+from hedging import Hedger
+from normalize import normalize
+from phonetic import get_phonetic_index, refresh_phonetic_index, MATCH_SCORE, CLOSE_SCORE
+from scheduler import get_scheduler, refresh_schedulers, quality_from_score
+from metrics import span
+from logs import configure_logging
+from paths import DEFAULT_USER, shard_dir
+from wordbank import WordBank, load_json, dump_json
+import backends
 
-def load_word_banks(language="chinese"):
-    """Load word banks from JSON files for the specified language"""
+logger = logging.getLogger(__name__)
+
+@span("word_bank_load")
+def load_word_banks(language="chinese", user=DEFAULT_USER):
+    """Load word banks from JSON files for the specified language and learner"""
     word_banks = {
-        'beginner': [],
-        'intermediate': []
+        'beginner': WordBank(),
+        'intermediate': WordBank()
     }
+    language_dir = shard_dir(language, user)
     
     try:
-        print(f"Current working directory when loading: {os.getcwd()}")
-        
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        words_dir = os.path.join(base_dir, 'words')
-        
-        print(f"Using base directory: {base_dir}")
-        print(f"Words directory path: {words_dir}")
-        
-        if not os.path.exists(words_dir):
-            print(f"Creating words directory at {words_dir}")
-            os.makedirs(words_dir)
-        
-        language_dir = os.path.join(words_dir, language)
         if not os.path.exists(language_dir):
-            print(f"Creating language directory at {language_dir}")
+            logger.info("Creating language directory at %s", language_dir)
             os.makedirs(language_dir)
         
         beginner_path = os.path.join(language_dir, 'beginner.json')
-        print(f"Looking for beginner words at: {beginner_path}")
         
         if os.path.exists(beginner_path):
-            print(f"Found beginner words file")
             with open(beginner_path, 'r', encoding='utf-8') as f:
-                word_banks['beginner'] = json.load(f)
-                print(f"Loaded {len(word_banks['beginner'])} beginner words")
+                word_banks['beginner'] = load_json(f)
         else:
-            print(f"Beginner words file not found")
+            logger.debug("Beginner words file not found at %s", beginner_path)
                 
         intermediate_path = os.path.join(language_dir, 'intermediate.json')
-        print(f"Looking for intermediate words at: {intermediate_path}")
         
         if os.path.exists(intermediate_path):
-            print(f"Found intermediate words file")
             with open(intermediate_path, 'r', encoding='utf-8') as f:
-                word_banks['intermediate'] = json.load(f)
-                print(f"Loaded {len(word_banks['intermediate'])} intermediate words")
+                word_banks['intermediate'] = load_json(f)
         else:
-            print(f"Intermediate words file not found")
+            logger.debug("Intermediate words file not found at %s", intermediate_path)
+        
+        logger.debug("Loaded word banks", extra={
+            "language": language,
+            "user": user,
+            "beginner": len(word_banks['beginner']),
+            "intermediate": len(word_banks['intermediate'])
+        })
                 
     except Exception as e:
-        print(f"Error loading word banks: {e}")
-        import traceback
-        traceback.print_exc()
-        print(f"Using default words for {language}")
-        word_banks['beginner'] = DEFAULT_WORDS[language]['beginner']
-        word_banks['intermediate'] = DEFAULT_WORDS[language]['intermediate']
+        logger.exception("Error loading word banks, using default words for %s: %s", language, e)
+        defaults = DEFAULT_WORDS.get(language, {})
+        word_banks['beginner'] = WordBank(defaults.get('beginner', ()))
+        word_banks['intermediate'] = WordBank(defaults.get('intermediate', ()))
     
     return word_banks
 
-def save_word_banks(word_banks, language="chinese"):
-    """Save word banks to JSON files for the specified language"""
+def _write_bank(path, entries):
+    # Write beside the file and swap it in, so a concurrent reader never sees half a bank
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        dump_json(entries, f)
+    os.replace(path + '.tmp', path)
+
+@span("word_bank_save")
+def save_word_banks(word_banks, language="chinese", user=DEFAULT_USER):
+    """Save word banks to JSON files for the specified language and learner"""
+    language_dir = shard_dir(language, user)
     try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        words_dir = os.path.join(base_dir, 'words')
-        
-        print(f"Using base directory: {base_dir}")
-        print(f"Words directory path: {words_dir}")
-        
-        if not os.path.exists(words_dir):
-            print(f"Creating words directory at {words_dir}")
-            os.makedirs(words_dir)
-            
-        language_dir = os.path.join(words_dir, language)
         if not os.path.exists(language_dir):
-            print(f"Creating language directory at {language_dir}")
+            logger.info("Creating language directory at %s", language_dir)
             os.makedirs(language_dir)
             
-        beginner_path = os.path.join(language_dir, 'beginner.json')
-        print(f"Saving beginner words to: {beginner_path}")
-        
-        with open(beginner_path, 'w', encoding='utf-8') as f:
-            json.dump(word_banks['beginner'], f, ensure_ascii=False, indent=2)
+        _write_bank(os.path.join(language_dir, 'beginner.json'), word_banks['beginner'])
+        _write_bank(os.path.join(language_dir, 'intermediate.json'), word_banks['intermediate'])
             
-        intermediate_path = os.path.join(language_dir, 'intermediate.json')
-        print(f"Saving intermediate words to: {intermediate_path}")
-        
-        with open(intermediate_path, 'w', encoding='utf-8') as f:
-            json.dump(word_banks['intermediate'], f, ensure_ascii=False, indent=2)
-            
-        print("Word banks saved successfully!")
+        logger.debug("Saved word banks", extra={"language": language, "user": user})
     except Exception as e:
-        print(f"Error saving word banks: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error saving word banks: %s", e)
 
 def manage_words(language):
     """Menu for managing word banks"""
@@ -154,6 +143,8 @@ def manage_words(language):
         elif choice == "4":
             save_word_banks(word_banks, language)
             break
+    
+    return word_banks
 
 DEFAULT_WORDS = {
     "chinese": {
@@ -230,54 +221,250 @@ def record_audio(duration=5):
     print("Recording finished!")
     return temp_file.name
 
-def clean_text(text):
-    while '(' in text and ')' in text:
-        start = text.find('(')
-        end = text.find(')') + 1
-        text = text[:start] + text[end:]
+def clean_text(text, language=None):
+    """Strip bracketed audio events, punctuation and width variants from a transcription"""
+    return normalize(text, language)
+
+def _audio_file(source):
+    """Binary file for a recording given as a path or as bytes."""
+    return open(source, 'rb') if isinstance(source, str) else io.BytesIO(source)
+
+_client = None
+_client_lock = threading.Lock()
+# One async client per event loop, since its connection pool is bound to the loop it was made on
+_async_clients = weakref.WeakKeyDictionary()
+
+def _elevenlabs_client():
+    """The shared ElevenLabs client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            load_dotenv()
+            _client = backends.get("elevenlabs").ElevenLabs(
+                api_key=os.getenv("ELEVENLABS_API_KEY"),
+                base_url=os.getenv("ELEVENLABS_BASE_URL")
+            )
+        return _client
+
+def _async_elevenlabs_client():
+    """The running loop's AsyncElevenLabs client, created on first use and then reused."""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        import httpx
+        load_dotenv()
+        # Our own HTTP client so close_async_clients() can shut the pool down
+        http = httpx.AsyncClient(follow_redirects=True)
+        client = backends.get("elevenlabs").AsyncElevenLabs(
+            api_key=os.getenv("ELEVENLABS_API_KEY"),
+            base_url=os.getenv("ELEVENLABS_BASE_URL"),
+            httpx_client=http
+        )
+        entry = _async_clients[loop] = (client, http)
+    return entry[0]
+
+async def close_async_clients():
+    """Close the running loop's transcription client, e.g. at server shutdown."""
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[1].aclose()
+
+@span("stt_call")
+def transcribe_audio(source, language="chinese"):
+    """Transcribe a recording; `source` is a file path or the audio bytes."""
+    client = _elevenlabs_client()
     
-    punctuation = '。，！？,.!?¡¿'
-    for p in punctuation:
-        text = text.replace(p, '')
+    language_code = LANGUAGE_CODES.get(language, "eng")
     
-    return text.strip()
-
-def transcribe_audio(file_path, language="chinese"):
-    load_dotenv()
+ 
+    def convert(timeout):
+        # Reopen on every attempt so a retry sends the whole recording again
+        with _audio_file(source) as audio_file:
+            return client.speech_to_text.convert(
+                file=audio_file,
+                model_id="scribe_v1",
+                tag_audio_events=True,
+                language_code=language_code,
+                diarize=True,
+                request_options={"timeout_in_seconds": max(1, int(timeout))}
+            )
     
-    client = ElevenLabs(
-        api_key=os.getenv("ELEVENLABS_API_KEY")
-    )
+    try:
+        transcription = get_governor("elevenlabs").call(convert)
+        
+        if not transcription or not transcription.text:
+            return "No speech detected"
+            
+        return transcription.text
+    except Exception as e:
+        logger.exception("Error in transcribe_audio: %s", e)
+        raise e 
+
+async def transcribe_audio_async(source, language="chinese"):
+    """Async variant of transcribe_audio; cancelling it aborts the HTTP request."""
+    client = _async_elevenlabs_client()
     
     language_code = LANGUAGE_CODES.get(language, "eng")
     
-    with open(file_path, 'rb') as audio_file:
-        try:
-            transcription = client.speech_to_text.convert(
+    async def convert(timeout):
+        with _audio_file(source) as audio_file:
+            return await client.speech_to_text.convert(
                 file=audio_file,
                 model_id="scribe_v1",
                 tag_audio_events=True,
                 language_code=language_code,
-                diarize=True
+                diarize=True,
+                request_options={"timeout_in_seconds": max(1, int(timeout))}
             )
-            
-            if not transcription or not transcription.text:
-                return "No speech detected"
-                
-            return transcription.text
+    
+    with span("stt_call"):
+        transcription = await get_governor("elevenlabs").acall(convert)
+    
+    if not transcription or not transcription.text:
+        return "No speech detected"
+        
+    return transcription.text
+
+# Backends a hedged transcription can fall back to, by name
+TRANSCRIPTION_BACKENDS = {
+    "elevenlabs": transcribe_audio_async,
+}
+
+transcription_hedger = Hedger(
+    percentile=float(os.getenv("TRANSCRIBE_HEDGE_PERCENTILE", "0.95"))
+)
+
+async def transcribe_audio_hedged(source, language="chinese", backend="elevenlabs", fallback=None):
+    """Transcribe with a duplicate request sent to `fallback` once the first is slow."""
+    fallback = fallback or os.getenv("TRANSCRIBE_HEDGE_BACKEND", backend)
+    primary = TRANSCRIPTION_BACKENDS[backend]
+    secondary = TRANSCRIPTION_BACKENDS.get(fallback, primary)
+    
+    return await transcription_hedger.run([
+        lambda: primary(source, language),
+        lambda: secondary(source, language),
+    ])
+
+# Words drilled per practice session, and how many recordings may be transcribing at once
+SESSION_WORDS = int(os.getenv("PRACTICE_SESSION_WORDS", "20"))
+SESSION_TRANSCRIBERS = int(os.getenv("PRACTICE_SESSION_TRANSCRIBERS", "4"))
+
+def _countdown(seconds):
+    if seconds:
+        print(f"\nRecording will start in {seconds} second{'s' if seconds != 1 else ''}...")
+    for i in range(seconds, 0, -1):
+        print(i)
+        time.sleep(1)
+
+def _transcribe_recording(path, language):
+    """transcribe_audio, removing the recording afterwards."""
+    try:
+        return transcribe_audio(path, language)
+    finally:
+        os.remove(path)
+
+def report_attempt(target_word, transcribed_text, language, index, scheduler, heading="Results"):
+    """Score one attempt, print the verdict and record the review. Returns the score."""
+    cleaned_text = clean_text(transcribed_text, language)
+    
+    print(f"\n{heading}:")
+    print("--------------")
+    print(f"Target word: {target_word}")
+    print(f"You said: {transcribed_text}")
+    print(f"Cleaned text: {cleaned_text}")
+    
+    score = index.score(target_word, cleaned_text)
+    print(f"Score: {score:.0%}")
+    
+    if cleaned_text == target_word or score >= MATCH_SCORE:
+        print("\n👍 Perfect pronunciation!")
+    elif score >= CLOSE_SCORE:
+        print("\nAlmost! Try again!")
+    else:
+        closest = index.match(cleaned_text, limit=1)
+        if closest and closest[0][0] != target_word:
+            print(f"That sounded like: {closest[0][0]}")
+        print("\nTry again!")
+    
+    state = scheduler.record(target_word, quality_from_score(score))
+    if state.interval:
+        print(f"Next review of {target_word} in {state.interval} day(s)")
+    else:
+        print(f"{target_word} will come up again in a few minutes")
+    return score
+
+def practice_session(word_banks, language, level, size=SESSION_WORDS, duration=5, countdown=3, record=record_audio):
+    """
+    Drill a queue of `size` words, pipelined.
+    
+    Recording stays on this thread while each finished recording is
+    transcribed in the background, so word k is being transcribed while word
+    k+1 is prompted and recorded. Results are printed as they come in,
+    between recordings, and once more for the stragglers at the end.
+    
+    Returns the list of (word, score) pairs, score None if transcription failed.
+    """
+    word_bank = word_banks[level]
+    scheduler = get_scheduler(language, level, lambda: word_bank)
+    queue = scheduler.next_cards(size)
+    if len(queue) < size:
+        print(f"Only {len(queue)} word(s) available at this level; drilling all of them.")
+    index = get_phonetic_index(word_banks, language)
+    
+    scores = []
+    started = time.perf_counter()
+    recording_seconds = 0.0
+    
+    def report(future):
+        number, target_word = pending.pop(future)
+        heading = f"[{number}/{len(queue)}] Results"
+        try:
+            transcribed_text = future.result()
         except Exception as e:
-            print(f"Error in transcribe_audio: {str(e)}")
-            raise e 
+            print(f"\n{heading}:\nCould not transcribe {target_word}: {e}")
+            scores.append((target_word, None))
+            return
+        scores.append((target_word, report_attempt(target_word, transcribed_text, language, index, scheduler, heading)))
+    
+    pending = {}
+    with ThreadPoolExecutor(max_workers=SESSION_TRANSCRIBERS, thread_name_prefix="transcribe") as pool:
+        for number, (word_data, _) in enumerate(queue, 1):
+            for future in [future for future in pending if future.done()]:
+                report(future)
+            
+            print(f"\n[{number}/{len(queue)}] Please say this word in {language.capitalize()}:")
+            print(f"➡️  {word_data['word']} ({word_data['meaning']})")
+            # Full countdown before the first word only; later words follow straight on
+            _countdown(countdown if number == 1 else min(countdown, 1))
+            
+            start = time.perf_counter()
+            path = record(duration)
+            recording_seconds += time.perf_counter() - start
+            pending[pool.submit(_transcribe_recording, path, language)] = (number, word_data['word'])
+        
+        for future in as_completed(list(pending)):
+            report(future)
+    
+    elapsed = time.perf_counter() - started
+    perfect = sum(1 for _, score in scores if score is not None and score >= MATCH_SCORE)
+    print(f"\nSession finished: {perfect}/{len(scores)} perfect in {elapsed:.0f}s "
+          f"({recording_seconds:.0f}s of it recording)")
+    return scores
+
 def main():
+    word_banks = None
+    banks_language = None
+    
     while True:
         print("\nLanguage Pronunciation Practice")
         print("-----------------------------")
         print("1. Select language")
         print("2. Practice pronunciation")
-        print("3. Manage word banks")
-        print("4. Exit")
+        print(f"3. Practice session ({SESSION_WORDS} words)")
+        print("4. Manage word banks")
+        print("5. Exit")
         
-        choice = input("\nEnter your choice (1-4): ")
+        choice = input("\nEnter your choice (1-5): ")
         
         if choice == "1":
             print("\nAvailable languages:")
@@ -308,61 +495,58 @@ def main():
                 
             print(f"\nSelected language: {selected_language.capitalize()}")
             
-        elif choice == "2":
+        elif choice in ("2", "3"):
             if 'selected_language' not in locals():
                 selected_language = "chinese"
                 print(f"Using default language: {selected_language.capitalize()}")
                 
-            word_banks = load_word_banks(selected_language)
+            if word_banks is None or banks_language != selected_language:
+                word_banks = load_word_banks(selected_language)
+                banks_language = selected_language
             print("\nChoose difficulty level:")
             print("1. Beginner")
             print("2. Intermediate")
             level_choice = input("Enter 1 or 2: ")
             
-            word_bank = word_banks['beginner'] if level_choice == "1" else word_banks['intermediate']
+            level = 'beginner' if level_choice == "1" else 'intermediate'
+            word_bank = word_banks[level]
             
             if not word_bank:
                 print(f"No words available for {selected_language} at this level. Please add some words first.")
                 continue
+            
+            if choice == "3":
+                # The banks stay loaded for the whole session
+                practice_session(word_banks, selected_language, level)
+                continue
                 
-            word_data = random.choice(word_bank)
+            scheduler = get_scheduler(selected_language, level, lambda: word_bank)
+            word_data, _ = scheduler.next_card()
             target_word = word_data['word']
             
             print(f"\nPlease say this word in {selected_language.capitalize()}:")
             print(f"➡️  {target_word} ({word_data['meaning']})")
             
-            print("\nRecording will start in 3 seconds...")
-            for i in range(3, 0, -1):
-                print(i)
-                time.sleep(1)
-                
+            _countdown(3)
             temp_file_path = record_audio(5)
-            transcribed_text = transcribe_audio(temp_file_path, selected_language)
-            
-            os.remove(temp_file_path)
-            
-            cleaned_text = clean_text(transcribed_text)
+            transcribed_text = _transcribe_recording(temp_file_path, selected_language)
             
-            print("\nResults:")
-            print("--------------")
-            print(f"Target word: {target_word}")
-            print(f"You said: {transcribed_text}")
-            print(f"Cleaned text: {cleaned_text}")
+            index = get_phonetic_index(word_banks, selected_language)
+            report_attempt(target_word, transcribed_text, selected_language, index, scheduler)
             
-            if cleaned_text == target_word:
-                print("\n👍 Perfect pronunciation!")
-            else:
-                print("\nTry again!")
-            
-        elif choice == "3":
+        elif choice == "4":
             if 'selected_language' not in locals():
                 selected_language = "chinese"
                 print(f"Using default language: {selected_language.capitalize()}")
-            manage_words(selected_language)
+            word_banks = manage_words(selected_language)
+            banks_language = selected_language
+            refresh_schedulers(selected_language, word_banks)
+            refresh_phonetic_index(selected_language, word_banks)
             
-        elif choice == "4":
+        elif choice == "5":
             print("Goodbye!")
             break
 
 if __name__ == "__main__":
+    configure_logging()
     main()
\ No newline at end of file
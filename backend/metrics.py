@@ -0,0 +1,154 @@
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "xilanhua_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+REQUESTS = Counter(
+    "xilanhua_http_requests_total", "HTTP requests served", ("method", "route", "status"))
+STAGE_DURATION = Histogram(
+    "xilanhua_stage_duration_seconds", "Time spent in each pipeline stage", ("stage",))
+STAGE_ERRORS = Counter(
+    "xilanhua_stage_errors_total", "Pipeline stages that raised", ("stage",))
+
+_metrics = [REQUEST_DURATION, REQUESTS, STAGE_DURATION, STAGE_ERRORS]
+_collectors = []
+
+
+def register_collector(collect):
+    """Add a callable returning extra exposition lines (e.g. gauges) at scrape time."""
+    _collectors.append(collect)
+
+
+@contextmanager
+def span(stage):
+    """Time a pipeline stage, e.g. `with span("llm_call"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+# Optional sampling profiler for hot requests: profile PROFILE_SAMPLE_RATE of
+# requests and keep the report when one takes longer than PROFILE_THRESHOLD_MS.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_THRESHOLD_MS = float(os.getenv("PROFILE_THRESHOLD_MS", "1000"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+@contextmanager
+def maybe_profile(name):
+    if pyinstrument is None or PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        yield
+        return
+    profiler = pyinstrument.Profiler(async_mode="enabled")
+    start = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= PROFILE_THRESHOLD_MS:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            safe_name = name.strip("/").replace("/", "_") or "root"
+            path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}_{safe_name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            logger.info("Saved profile of %s (%.0f ms) to %s", name, elapsed_ms, path)
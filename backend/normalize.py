@@ -0,0 +1,218 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+try:
+    import opencc
+except ImportError:
+    opencc = None
+
+# Bracket pairs whose contents are dropped, e.g. "(laughter)" audio events or
+# "(nǐ hǎo)" annotations. Full-width forms fold to ASCII under NFKC already.
+DEFAULT_BRACKETS = "()[]【】〔〕〖〗〘〙⦅⦆"
+
+# Punctuation that is part of a word in some languages and must survive
+LANGUAGE_PROFILES = {
+    "chinese": {},
+    "japanese": {},
+    "korean": {},
+    "spanish": {"keep": "'-"},
+    "french": {"keep": "'-"},
+    "german": {"keep": "'-"},
+    "russian": {"keep": "-"},
+    "english": {"keep": "'-"},
+}
+
+# Code point ranges that hold all the punctuation we expect to see after NFKC:
+# Latin/general punctuation, CJK symbols, vertical and small forms, half-width forms
+_SCAN_RANGES = [(0x0000, 0x2E80), (0x3000, 0x3040), (0xFE10, 0xFE70), (0xFF00, 0xFFF0)]
+
+_SEPARATOR = "\x1e"
+_FLAT_GROUP = re.compile(r"\([^()\x1e]*\)")
+
+
+def _classify(keep, brackets):
+    """Map every special character to "(", ")" or "" (deleted).
+
+    Characters are classified by their NFKC form, so full-width and other
+    width variants are handled without running NFKC over the whole text.
+    """
+    table = {}
+    for start, end in _SCAN_RANGES:
+        for code in range(start, end):
+            char = chr(code)
+            folded = unicodedata.normalize("NFKC", char)
+            if not folded or char == _SEPARATOR:
+                continue
+            if folded in brackets[0::2] or char in brackets[0::2]:
+                table[char] = "("
+            elif folded in brackets[1::2] or char in brackets[1::2]:
+                table[char] = ")"
+            elif folded not in keep and all(unicodedata.category(c).startswith("P") for c in folded):
+                table[char] = ""
+    return table
+
+
+def _strip_nested(text):
+    """Drop bracketed text, nested groups included, and any stray brackets.
+
+    One pass over the brackets with a stack of open positions: closing a group
+    cuts it along with the cuts already made inside it. An unclosed "(" only
+    loses itself. Groups never span the record separator. The next "(", ")"
+    and separator are each found with str.find, which outruns a regex scan.
+    """
+    end = len(text)
+
+    def find(char, start):
+        position = text.find(char, start)
+        return end if position < 0 else position
+
+    next_open, next_close, next_separator = find("(", 0), find(")", 0), find(_SEPARATOR, 0)
+    cuts = []
+    opens = []
+    unclosed = False
+    while True:
+        position = min(next_open, next_close, next_separator)
+        if position == end:
+            break
+        if position == next_open:
+            opens.append(position)
+            next_open = find("(", position + 1)
+        elif position == next_close:
+            if opens:
+                start = opens.pop()
+                while cuts and cuts[-1][0] > start:
+                    cuts.pop()
+                cuts.append((start, position + 1))
+            else:
+                cuts.append((position, position + 1))
+            next_close = find(")", position + 1)
+        else:
+            if opens:
+                cuts.extend((start, start + 1) for start in opens)
+                opens.clear()
+                unclosed = True
+            next_separator = find(_SEPARATOR, position + 1)
+    if opens:
+        cuts.extend((start, start + 1) for start in opens)
+        unclosed = True
+    if unclosed:
+        cuts.sort()
+
+    pieces = []
+    kept = 0
+    for start, stop in cuts:
+        pieces.append(text[kept:start])
+        kept = stop
+    pieces.append(text[kept:])
+    return "".join(pieces)
+
+
+def _strip_brackets(text):
+    """Drop bracketed text and stray brackets in O(len(text)).
+
+    Flat groups, which is nearly all of them, go in one C-level substitution;
+    only text that still has brackets after that (nesting, strays) takes the
+    stack pass.
+    """
+    text = _FLAT_GROUP.sub("", text)
+    if "(" in text or ")" in text:
+        text = _strip_nested(text)
+    return text
+
+
+class Normalizer:
+    """Compiled text normalizer for comparing transcriptions with target words.
+
+    Every special character maps, through one translation table, to nothing
+    (punctuation) or to an ASCII bracket. Bracketed text, nested brackets
+    included, is then dropped in a single pass. NFKC folding of what is left
+    only runs when the text needs it.
+    """
+
+    def __init__(self, keep="", brackets=DEFAULT_BRACKETS, fold_traditional=False, lowercase=False):
+        if fold_traditional and opencc is None:
+            raise ImportError("fold_traditional needs the opencc package (pip install opencc-python-reimplemented)")
+        self.table = _classify(keep, brackets)
+        self.translation = {ord(char): replacement or None
+                            for char, replacement in self.table.items() if replacement != char}
+        self.changes = re.compile(f"[{''.join(re.escape(chr(code)) for code in sorted(self.translation))}]")
+        self.converter = opencc.OpenCC("t2s") if fold_traditional else None
+        self.lowercase = lowercase
+
+    def _fold(self, text):
+        if not text.isascii() and not unicodedata.is_normalized("NFKC", text):
+            text = unicodedata.normalize("NFKC", text)
+        if self.converter is not None:
+            text = self.converter.convert(text)
+        if self.lowercase:
+            text = text.lower()
+        return text
+
+    def _translate(self, text):
+        """Apply the translation table: punctuation deleted, brackets made ASCII."""
+        if text.isascii():
+            # CPython translates ASCII text in C, caching each lookup
+            return text.translate(self.translation)
+        # Elsewhere str.translate looks every character up in Python, which is
+        # slower than the loop it replaced on CJK text. Jump from each special
+        # character to the next one still present instead, replacing all of
+        # its occurrences at once: one C-level scan per distinct character.
+        search = self.changes.search
+        position = 0
+        while True:
+            match = search(text, position)
+            if match is None:
+                return text
+            position = match.start()
+            char = text[position]
+            text = text.replace(char, self.table[char])
+
+    def normalize(self, text):
+        if not text:
+            return ""
+        if _SEPARATOR in text:
+            text = text.replace(_SEPARATOR, "")
+        text = self._translate(text)
+        if "(" in text or ")" in text:
+            text = _strip_brackets(text)
+        return self._fold(text).strip()
+
+    def normalize_many(self, texts):
+        """Normalize a batch (a word bank, a list of transcripts) in one pass."""
+        if not texts:
+            return []
+        joined = _SEPARATOR.join(text or "" for text in texts)
+        if joined.count(_SEPARATOR) != len(texts) - 1:
+            joined = _SEPARATOR.join(text.replace(_SEPARATOR, "") if text else "" for text in texts)
+        joined = self._translate(joined)
+        if "(" in joined or ")" in joined:
+            # Groups never span records: the bracket pass stops at separators
+            joined = _strip_brackets(joined)
+        folded = self._fold(joined)
+        return [record.strip() for record in folded.split(_SEPARATOR)]
+
+
+@lru_cache(maxsize=None)
+def _normalizer(language, fold_traditional, lowercase):
+    profile = LANGUAGE_PROFILES.get(language, {})
+    return Normalizer(keep=profile.get("keep", ""), fold_traditional=fold_traditional, lowercase=lowercase)
+
+
+def get_normalizer(language=None, fold_traditional=False, lowercase=False):
+    """Shared normalizer for a language; tables are built once per configuration.
+
+    Languages without a profile share the default one, so arbitrary `language`
+    strings from requests can't grow the cache.
+    """
+    if language not in LANGUAGE_PROFILES:
+        language = None
+    return _normalizer(language, bool(fold_traditional), bool(lowercase))
+
+
+def normalize(text, language=None, **options):
+    return get_normalizer(language, **options).normalize(text)
+
+
+def normalize_many(texts, language=None, **options):
+    return get_normalizer(language, **options).normalize_many(texts)
@@ -0,0 +1,28 @@
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Learner whose banks live directly under words/<language>, as before users existed
+DEFAULT_USER = "default"
+_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def words_dir():
+    """Root directory of the word banks; XILANHUA_WORDS_DIR overrides it (benchmarks, tests)."""
+    return os.getenv("XILANHUA_WORDS_DIR") or os.path.join(BASE_DIR, 'words')
+
+
+def check_name(kind, name):
+    """Raise ValueError unless `name` is safe to use as a single path component."""
+    if not isinstance(name, str) or not _NAME.fullmatch(name):
+        raise ValueError(f"Invalid {kind} '{name}': use 1-64 letters, digits, '-' or '_'")
+    return name
+
+
+def shard_dir(language, user=DEFAULT_USER):
+    """Directory holding one learner's word banks and review log for a language."""
+    check_name("language", language)
+    if user == DEFAULT_USER:
+        return os.path.join(words_dir(), language)
+    return os.path.join(words_dir(), "users", check_name("user", user), language)
@@ -0,0 +1,227 @@
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+import backends
+from normalize import normalize, normalize_many
+from metrics import span
+from paths import DEFAULT_USER
+
+logger = logging.getLogger(__name__)
+
+# Syllable pieces Mandarin learners (and STT engines) commonly confuse.
+# Swapping one of these costs half a substitution.
+CHINESE_CONFUSIONS = [
+    ("zh", "z"), ("ch", "c"), ("sh", "s"), ("n", "l"), ("r", "l"), ("f", "h"),
+    ("ang", "an"), ("eng", "en"), ("ing", "in"), ("ong", "eng"),
+]
+
+TONE_COST = 0.25
+CONFUSION_COST = 0.5
+
+# Scores at or above these count as a match / a near miss
+MATCH_SCORE = 0.999
+CLOSE_SCORE = 0.75
+
+# Spelling-to-sound rewrite rules for alphabetic languages, applied in order
+# to lowercased text. Languages without rules fall back to accent folding.
+SOUND_RULES = {
+    "spanish": [
+        (r"ll", "y"), (r"v", "b"), (r"h", ""), (r"qu", "k"), (r"gu(?=[ei])", "g"),
+        (r"c(?=[ei])", "s"), (r"z", "s"), (r"c", "k"), (r"x", "ks"),
+    ],
+    "french": [
+        (r"eaux?", "o"), (r"au", "o"), (r"ph", "f"), (r"qu", "k"), (r"h", ""),
+        (r"c(?=[eiy])", "s"), (r"c", "k"), (r"(?<=\w)[sxtd]\b", ""), (r"(?<=\w)e\b", ""),
+    ],
+    "german": [
+        (r"sch", "S"), (r"ph", "f"), (r"v", "f"), (r"w", "v"), (r"ß", "ss"),
+        (r"ie", "i"), (r"(?<=[aeiouäöü])h", ""), (r"dt\b", "t"),
+    ],
+}
+
+_COMPILED_RULES = {
+    language: [(re.compile(pattern), replacement) for pattern, replacement in rules]
+    for language, rules in SOUND_RULES.items()
+}
+
+
+def _fold_accents(text):
+    """Drop combining marks but keep letters like ñ that change the sound."""
+    decomposed = unicodedata.normalize("NFD", text.replace("ñ", "\0"))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).replace("\0", "ñ")
+
+
+_pinyin_missing = False
+
+
+def _pypinyin():
+    """pypinyin, imported on first use (it costs ~250 ms and 55 MB), or None if it isn't installed."""
+    global _pinyin_missing
+    if _pinyin_missing:
+        return None
+    try:
+        return backends.get("pypinyin")
+    except ImportError:
+        logger.warning("pypinyin is not installed; Chinese is graded by character and homophones won't match")
+        _pinyin_missing = True
+        return None
+
+
+def _chinese_key(text):
+    pypinyin = _pypinyin()
+    if pypinyin is None:
+        # Without pypinyin we can still grade character by character
+        return tuple(text.replace(" ", ""))
+    syllables = pypinyin.lazy_pinyin(text, style=pypinyin.Style.TONE3, neutral_tone_with_five=True)
+    return tuple(s for syllable in syllables for s in syllable.split() if s)
+
+
+def _sound_key(text, language):
+    text = _fold_accents(text.lower())
+    for pattern, replacement in _COMPILED_RULES.get(language, []):
+        text = pattern.sub(replacement, text)
+    return tuple(text.replace(" ", ""))
+
+
+def phonetic_key(text, language="chinese", normalized=False):
+    """Sequence of sound tokens for `text`: tone-numbered pinyin syllables for
+    Chinese, rewritten letters for alphabetic languages."""
+    if not normalized:
+        text = normalize(text, language)
+    if language == "chinese":
+        return _chinese_key(text)
+    return _sound_key(text, language)
+
+
+def _split_tone(syllable):
+    if syllable and syllable[-1].isdigit():
+        return syllable[:-1], syllable[-1]
+    return syllable, ""
+
+
+def _substitution_cost(a, b):
+    if a == b:
+        return 0.0
+    if len(a) == 1 and len(b) == 1:
+        return 1.0
+    base_a, tone_a = _split_tone(a)
+    base_b, tone_b = _split_tone(b)
+    cost = 0.0 if tone_a == tone_b else TONE_COST
+    if base_a == base_b:
+        return cost
+    for x, y in CHINESE_CONFUSIONS:
+        for first, second in ((x, y), (y, x)):
+            if base_a.startswith(first) and base_b.startswith(second) and base_a[len(first):] == base_b[len(second):]:
+                return cost + CONFUSION_COST
+            if base_a.endswith(first) and base_b.endswith(second) and base_a[:-len(first)] == base_b[:-len(second)]:
+                return cost + CONFUSION_COST
+    return 1.0
+
+
+def edit_distance(a, b):
+    """Weighted Levenshtein distance over two token sequences."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = [float(j) for j in range(len(b) + 1)]
+    for i, token_a in enumerate(a, 1):
+        current = [float(i)]
+        for j, token_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + _substitution_cost(token_a, token_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a, b):
+    """1.0 for identical keys (homophones included), falling towards 0.0."""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    return max(0.0, 1.0 - edit_distance(a, b) / longest)
+
+
+def _base_tokens(key):
+    """Tone-free tokens used to find candidate words sharing a sound."""
+    if key and len(key[0]) > 1:
+        return {_split_tone(token)[0] for token in key}
+    return {"".join(key[i:i + 2]) for i in range(max(1, len(key) - 1))}
+
+
+class PhoneticIndex:
+    """Phonetic keys for a word bank, built once and reused for every check."""
+
+    def __init__(self, words, language="chinese"):
+        self.language = language
+        self.words = list(dict.fromkeys(words))
+        self.keys = [phonetic_key(text, language, normalized=True)
+                     for text in normalize_many(self.words, language)]
+        self.by_word = dict(zip(self.words, self.keys))
+        self.by_key = defaultdict(list)
+        self.postings = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            self.by_key[key].append(i)
+            for token in _base_tokens(key):
+                self.postings[token].append(i)
+
+    def key(self, text):
+        return self.by_word.get(text) or phonetic_key(text, self.language)
+
+    def score(self, target, said):
+        """Graded similarity between the target word and what was said."""
+        return similarity(self.key(target), phonetic_key(said, self.language))
+
+    def match(self, said, limit=3, candidates=50):
+        """Words in the bank that sound most like `said`, best first, as (word, score)."""
+        key = phonetic_key(said, self.language)
+        if not key:
+            return []
+        # Homophones are an exact key hit; everything else must share a sound
+        exact = self.by_key.get(key, [])
+        ranked = [(self.words[i], 1.0) for i in exact]
+        shared = Counter()
+        for token in _base_tokens(key):
+            shared.update(self.postings.get(token, ()))
+        for i in exact:
+            shared.pop(i, None)
+        ranked.extend((self.words[i], similarity(key, self.keys[i])) for i, _ in shared.most_common(candidates))
+        ranked.sort(key=lambda pair: pair[1], reverse=True)
+        return ranked[:limit]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_phonetic_index(word_banks, language="chinese", user=DEFAULT_USER):
+    """Index for the learner's current word banks.
+
+    Cached per (user, language) against the banks object itself: a shard hands
+    out a new one whenever it saves or reloads, so there is nothing to hash.
+    """
+    key = (user, language)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] is word_banks:
+        return cached[1]
+    # Built outside the registry lock so one learner's build doesn't stall the others
+    with span("phonetic_index_build"):
+        index = PhoneticIndex([entry["word"] for level in word_banks.values() for entry in level], language)
+    with _indexes_lock:
+        _indexes[key] = (word_banks, index)
+    return index
+
+
+def drop_phonetic_index(language, user=DEFAULT_USER):
+    """Forget the cached index for a learner's language; it is rebuilt on next use."""
+    with _indexes_lock:
+        _indexes.pop((user, language), None)
+
+
+def refresh_phonetic_index(language, word_banks=None, user=DEFAULT_USER):
+    """Drop the cached index for `language` after the word banks were rewritten."""
+    drop_phonetic_index(language, user)
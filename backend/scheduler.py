@@ -0,0 +1,276 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from paths import DEFAULT_USER, shard_dir
+from wordbank import Entry, WordBank
+
+DAY = 24 * 60 * 60
+# Failed cards come back after this many seconds rather than a full day
+RELEARN_SECONDS = 10 * 60
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+
+class CardState:
+    """SM-2 review state for one word."""
+
+    __slots__ = ("word", "ease", "interval", "repetitions", "lapses", "due", "version")
+
+    def __init__(self, word):
+        self.word = word
+        self.ease = DEFAULT_EASE
+        self.interval = 0
+        self.repetitions = 0
+        self.lapses = 0
+        self.due = 0.0
+        self.version = 0
+
+    def review(self, quality, now):
+        """Apply an SM-2 review graded 0 (blackout) to 5 (perfect)."""
+        if quality < 3:
+            self.repetitions = 0
+            self.lapses += 1
+            self.interval = 0
+            self.due = now + RELEARN_SECONDS
+        else:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval = 1
+            elif self.repetitions == 2:
+                self.interval = 6
+            else:
+                self.interval = round(self.interval * self.ease)
+            self.due = now + self.interval * DAY
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.version += 1
+
+    def to_dict(self):
+        return {
+            "ease": round(self.ease, 3),
+            "interval_days": self.interval,
+            "repetitions": self.repetitions,
+            "lapses": self.lapses,
+            "due": self.due,
+        }
+
+
+def quality_from_score(score):
+    """Turn a 0-1 pronunciation score into an SM-2 quality grade."""
+    return max(0, min(5, round(score * 5)))
+
+
+def review_log_path(language, user=DEFAULT_USER):
+    return os.path.join(shard_dir(language, user), 'reviews.jsonl')
+
+
+class Scheduler:
+    """Spaced-repetition queue for one learner's (language, level) deck.
+
+    Reviewed cards sit in a min-heap keyed on due time; stale heap entries are
+    skipped lazily using a per-card version. Never-reviewed words wait in a
+    FIFO behind any overdue reviews. Every review is appended to a JSONL log,
+    which is replayed to rebuild the state on startup. Synced with the same
+    WordBank again, the deck only applies the rows added or removed since.
+    """
+
+    def __init__(self, language, level, entries=(), log_path=None, user=DEFAULT_USER):
+        self.language = language
+        self.level = level
+        self.user = user
+        self.log_path = log_path or review_log_path(language, user)
+        self.cards = {}
+        self.entries = {}
+        # The WordBank last synced and its changes_since() mark
+        self.bank = None
+        self.mark = None
+        self.heap = []
+        self.new = deque()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self._replay()
+        self.sync(entries)
+
+    def _replay(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                review = json.loads(line)
+                if review.get("level") != self.level:
+                    continue
+                state = self.cards.get(review["word"])
+                if state is None:
+                    state = self.cards[review["word"]] = CardState(review["word"])
+                state.review(review["quality"], review["reviewed_at"])
+
+    def _push(self, state):
+        heapq.heappush(self.heap, (state.due, next(self.counter), state.word, state.version))
+
+    def sync(self, entries):
+        """Bring the deck in line with the word bank after words were added or removed."""
+        with self.lock:
+            if isinstance(entries, WordBank) and entries is self.bank:
+                added, removed, self.mark = entries.changes_since(self.mark)
+                for row in removed:
+                    word = entries.words[row]
+                    current = entries.get(word)
+                    if current is None:
+                        self.entries.pop(word, None)
+                    else:
+                        self.entries[word] = dict(current)
+                for row in added:
+                    self._add(dict(Entry(entries, row)))
+                return
+            previous = self.entries
+            if isinstance(entries, WordBank):
+                rows, _, self.mark = entries.changes_since()
+                self.bank = bank = entries
+                entries = (Entry(bank, row) for row in rows)
+            else:
+                self.bank = self.mark = None
+            self.entries = {entry["word"]: dict(entry) for entry in entries}
+            if not previous:
+                # First load: build the heap in one go instead of pushing one by one
+                self.heap = [(self.cards[word].due, next(self.counter), word, self.cards[word].version)
+                             for word in self.entries if word in self.cards]
+                heapq.heapify(self.heap)
+                self.new = deque(word for word in self.entries if word not in self.cards)
+                return
+            for word in self.entries.keys() - previous.keys():
+                if word in self.cards:
+                    self._push(self.cards[word])
+                else:
+                    self.new.append(word)
+
+    def _add(self, entry):
+        word = entry["word"]
+        known = word in self.entries
+        self.entries[word] = entry
+        if known:
+            return
+        if word in self.cards:
+            self._push(self.cards[word])
+        else:
+            self.new.append(word)
+
+    def add(self, entry):
+        with self.lock:
+            self._add(dict(entry))
+
+    def remove(self, word):
+        # The heap and new-card queue skip words that are no longer in the deck
+        with self.lock:
+            self.entries.pop(word, None)
+
+    def _top_review(self):
+        while self.heap:
+            _, _, word, version = self.heap[0]
+            if word in self.entries and self.cards[word].version == version:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+        return None
+
+    def _top_new(self):
+        while self.new:
+            word = self.new[0]
+            if word in self.entries and word not in self.cards:
+                return word
+            self.new.popleft()
+        return None
+
+    def next_card(self, now=None):
+        """The card to study now: overdue reviews first, then new words, then
+        the review coming up soonest. Returns (entry, state or None) or None."""
+        now = time.time() if now is None else now
+        with self.lock:
+            review = self._top_review()
+            if review is not None and review[0] <= now:
+                return self.entries[review[2]], self.cards[review[2]]
+            word = self._top_new()
+            if word is not None:
+                return self.entries[word], None
+            if review is not None:
+                return self.entries[review[2]], self.cards[review[2]]
+            return None
+
+    def next_cards(self, count, now=None):
+        """Up to `count` different cards in the order next_card would hand them
+        out if each were reviewed in turn (ignoring the reviews themselves)."""
+        now = time.time() if now is None else now
+        with self.lock:
+            # Pop the valid heads (dropping stale and duplicate entries), then put them back
+            heads = []
+            seen = set()
+            while self.heap and len(heads) < count:
+                item = heapq.heappop(self.heap)
+                _, _, word, version = item
+                if word in self.entries and word not in seen and self.cards[word].version == version:
+                    heads.append(item)
+                    seen.add(word)
+            for item in heads:
+                heapq.heappush(self.heap, item)
+            reviews = [word for _, _, word, _ in heads]
+            due = [word for word in reviews if self.cards[word].due <= now]
+            new = (word for word in self.new if word in self.entries and word not in self.cards)
+            new = itertools.islice(new, count - len(due))
+            words = list(dict.fromkeys(itertools.chain(due, new, reviews)))[:count]
+            return [(self.entries[word], self.cards.get(word)) for word in words]
+
+    def record(self, word, quality, now=None):
+        """Grade a review, reschedule the card and append it to the review log."""
+        now = time.time() if now is None else now
+        with self.lock:
+            if word not in self.entries:
+                raise KeyError(word)
+            state = self.cards.get(word)
+            if state is None:
+                state = self.cards[word] = CardState(word)
+            state.review(quality, now)
+            self._push(state)
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    "level": self.level,
+                    "word": word,
+                    "quality": quality,
+                    "reviewed_at": now
+                }, ensure_ascii=False) + "\n")
+            return state
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(language, level, load_entries, user=DEFAULT_USER):
+    """Shared scheduler for a deck; `load_entries()` is only called to build it."""
+    key = (user, language, level)
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        # Built outside the registry lock so one learner's load doesn't stall the others
+        scheduler = Scheduler(language, level, load_entries(), user=user)
+        with _schedulers_lock:
+            scheduler = _schedulers.setdefault(key, scheduler)
+    return scheduler
+
+
+def drop_schedulers(language, user=DEFAULT_USER):
+    """Forget a learner's decks for `language`; they are rebuilt from the review log on next use."""
+    with _schedulers_lock:
+        for key in [key for key in _schedulers if key[:2] == (user, language)]:
+            del _schedulers[key]
+
+
+def refresh_schedulers(language, word_banks, user=DEFAULT_USER):
+    """Resync any loaded decks for `language` after the word banks were rewritten."""
+    for level, entries in word_banks.items():
+        scheduler = _schedulers.get((user, language, level))
+        if scheduler is not None:
+            scheduler.sync(entries)
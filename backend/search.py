@@ -0,0 +1,368 @@
+import heapq
+import itertools
+import re
+import threading
+import unicodedata
+
+from metrics import span
+from paths import DEFAULT_USER
+from wordbank import Entry, WordBank
+
+# Romanization in Anki-style meanings: "hello (ni3 hao3)"
+_ROMANIZATION = re.compile(r"\s*\(([^()]*)\)\s*$")
+_TONE_DIGITS = str.maketrans("", "", "012345 '-·")
+
+# Rank of each kind of match; higher is better
+EXACT_WORD = 100
+WORD_PREFIX = 80
+EXACT_ROMANIZATION = 70
+ROMANIZATION_PREFIX = 60
+WORD_SUBSTRING = 50
+MEANING_WORD_START = 40
+MEANING_SUBSTRING = 30
+
+# Very common n-grams match most of the bank; verify at most this many
+# candidates per field so such queries stay fast. Only the substring and
+# meaning matches are cut short: exact and prefix hits never are.
+MAX_CANDIDATES = 200
+# Posting lists up to this size are intersected in one go (in C); beyond it,
+# candidates are produced lazily so the cap above can stop the walk early
+EAGER_INTERSECTION = 5000
+
+
+def romanization_key(text):
+    """Toneless, spaceless lowercase romanization: "Nǐ hǎo", "ni3 hao3" -> "nihao"."""
+    text = text.casefold()
+    if not text.isascii():
+        text = unicodedata.normalize("NFD", text).replace("u\u0308", "v")
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.replace("u:", "v").translate(_TONE_DIGITS)
+
+
+def split_meaning(meaning):
+    """("hello", "ni3 hao3") from "hello (ni3 hao3)"; the romanization may be None."""
+    match = _ROMANIZATION.search(meaning or "")
+    if match is None:
+        return meaning or "", None
+    return meaning[:match.start()], match.group(1)
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _word_grams(word):
+    return set(word) | _grams(word, 2)
+
+
+def _post(postings, grams, doc_id):
+    for gram in grams:
+        ids = postings.get(gram)
+        if ids is None:
+            postings[gram] = ids = set()
+        ids.add(doc_id)
+
+
+class _Node:
+    __slots__ = ("edges", "ids")
+
+    def __init__(self):
+        self.edges = None  # first char -> (label, child)
+        self.ids = None
+
+
+class RadixTrie:
+    """Prefix tree with compressed edges, mapping romanization keys to entry ids."""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def add(self, key, doc_id):
+        node = self.root
+        while key:
+            if node.edges is None:
+                node.edges = {}
+            edge = node.edges.get(key[0])
+            if edge is None:
+                leaf = _Node()
+                leaf.ids = {doc_id}
+                node.edges[key[0]] = (key, leaf)
+                return
+            label, child = edge
+            common = 1
+            while common < min(len(label), len(key)) and label[common] == key[common]:
+                common += 1
+            if common < len(label):
+                middle = _Node()
+                middle.edges = {label[common]: (label[common:], child)}
+                node.edges[key[0]] = (label[:common], middle)
+                child = middle
+            node, key = child, key[common:]
+        if node.ids is None:
+            node.ids = set()
+        node.ids.add(doc_id)
+
+    def remove(self, key, doc_id):
+        path = []
+        node = self.root
+        while key:
+            label, child = node.edges[key[0]]
+            path.append((node, key[0]))
+            node, key = child, key[len(label):]
+        node.ids.discard(doc_id)
+        if node.ids:
+            return
+        node.ids = None
+        # Drop the emptied leaf, then fold a parent left with a single edge into it
+        if not node.edges and path:
+            parent, first = path.pop()
+            del parent.edges[first]
+            node = parent
+        if path and node.ids is None and node.edges and len(node.edges) == 1:
+            grandparent, first = path[-1]
+            label, _ = grandparent.edges[first]
+            (child_label, child), = node.edges.values()
+            grandparent.edges[first] = (label + child_label, child)
+
+    def prefix(self, key, limit):
+        """Ids whose key starts with `key`, shortest keys first, stopping after about `limit`."""
+        node = self.root
+        while key:
+            edge = node.edges.get(key[0]) if node.edges else None
+            if edge is None:
+                return []
+            label, child = edge
+            if label.startswith(key):
+                key = ""
+            elif key.startswith(label):
+                key = key[len(label):]
+            else:
+                return []
+            node = child
+        found = []
+        # Walk by key length rather than by node depth, since edges are of any length
+        order = itertools.count()
+        pending = [(0, next(order), node)]
+        while pending:
+            length, _, node = heapq.heappop(pending)
+            if node.ids:
+                found.extend(node.ids)
+                if len(found) >= limit:
+                    return found[:limit]
+            if node.edges:
+                for label, child in node.edges.values():
+                    heapq.heappush(pending, (length + len(label), next(order), child))
+        return found
+
+
+class SearchIndex:
+    """Word-bank search for one language.
+
+    Words are indexed by character unigrams and bigrams, meanings by bigrams;
+    a query's bigrams are intersected (rarest first) and candidates are then
+    checked and ranked. Words and the romanizations parsed from "meaning
+    (pinyin)" go into radix tries, so prefix hits come shortest first and
+    "nih" finds 你好. add/remove/sync update it in place; synced
+    with the same WordBank again, only the rows changed since are looked at.
+    """
+
+    def __init__(self, word_banks=None):
+        self.entries = {}
+        self.ids = {}
+        self.by_word = {}
+        self.word_grams = {}
+        self.meaning_grams = {}
+        self.trie = RadixTrie()
+        self.word_trie = RadixTrie()
+        # level -> (WordBank last synced, its changes_since() mark)
+        self.banks = {}
+        self.levels = set()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        if word_banks:
+            self.sync(word_banks)
+
+    def _index(self, doc_id, level, entry):
+        entry = dict(entry)  # not a view, which would keep the whole WordBank alive
+        word = entry["word"].casefold()
+        meaning, romanization = split_meaning(entry.get("meaning"))
+        meaning = meaning.casefold()
+        key = romanization_key(romanization) if romanization else ""
+        self.entries[doc_id] = (level, entry, word, meaning, key)
+        self.ids[(level, entry["word"])] = doc_id
+        self.levels.add(level)
+        _post(self.by_word, (word,), doc_id)
+        self.word_trie.add(word, doc_id)
+        _post(self.word_grams, _word_grams(word), doc_id)
+        _post(self.meaning_grams, _grams(meaning, 2), doc_id)
+        if key:
+            self.trie.add(key, doc_id)
+
+    def _unindex(self, doc_id):
+        level, entry, word, meaning, key = self.entries.pop(doc_id)
+        del self.ids[(level, entry["word"])]
+        for postings, grams in ((self.by_word, (word,)),
+                                (self.word_grams, _word_grams(word)),
+                                (self.meaning_grams, _grams(meaning, 2))):
+            for gram in grams:
+                ids = postings[gram]
+                ids.discard(doc_id)
+                if not ids:
+                    del postings[gram]
+        self.word_trie.remove(word, doc_id)
+        if key:
+            self.trie.remove(key, doc_id)
+
+    def _add(self, level, entry):
+        doc_id = self.ids.get((level, entry["word"]))
+        if doc_id is not None:
+            if self.entries[doc_id][1] == entry:
+                return
+            self._unindex(doc_id)
+        self._index(next(self.counter), level, entry)
+
+    def _remove(self, level, word):
+        doc_id = self.ids.get((level, word))
+        if doc_id is not None:
+            self._unindex(doc_id)
+
+    def add(self, level, entry):
+        with self.lock:
+            self._add(level, entry)
+
+    def remove(self, level, word):
+        with self.lock:
+            self._remove(level, word)
+
+    def sync(self, word_banks):
+        """Bring the index in line with the word banks, touching only what changed."""
+        with self.lock:
+            for level in self.levels - word_banks.keys():
+                self._sync_level(level, ())
+                self.levels.discard(level)
+            for level, entries in word_banks.items():
+                self._sync_level(level, entries)
+
+    def _sync_level(self, level, entries):
+        tracked = self.banks.get(level)
+        if tracked is not None and tracked[0] is entries:
+            added, removed, mark = entries.changes_since(tracked[1])
+            self.banks[level] = (entries, mark)
+            for row in removed:
+                word = entries.words[row]
+                current = entries.get(word)
+                if current is None:
+                    self._remove(level, word)
+                else:
+                    self._add(level, current)
+            for row in added:
+                self._add(level, Entry(entries, row))
+            return
+        if isinstance(entries, WordBank):
+            rows, _, mark = entries.changes_since()
+            self.banks[level] = (entries, mark)
+            entries = [Entry(entries, row) for row in rows]
+        else:
+            self.banks.pop(level, None)
+        current = {entry["word"]: entry for entry in entries}
+        for key in [key for key in self.ids if key[0] == level and key[1] not in current]:
+            self._unindex(self.ids[key])
+        for entry in current.values():
+            self._add(level, entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _candidates(postings, grams):
+        """Ids in every posting list for `grams`, walking the rarest list."""
+        sets = []
+        for gram in grams:
+            ids = postings.get(gram)
+            if not ids:
+                return
+            sets.append(ids)
+        sets.sort(key=len)
+        rarest, rest = sets[0], sets[1:]
+        if len(rarest) <= EAGER_INTERSECTION:
+            yield from rarest.intersection(*rest)
+            return
+        for doc_id in rarest:
+            if all(doc_id in ids for ids in rest):
+                yield doc_id
+
+    def search(self, query, limit=20, level=None):
+        """Ranked matches for `query` as (score, level, entry), best first."""
+        text = query.strip().casefold()
+        if not text:
+            return []
+        key = romanization_key(text)
+        grams = {text} if len(text) == 1 else _grams(text, 2)
+        entries = self.entries
+        with self.lock:
+            scores = {}
+
+            def offer(doc_id, score):
+                if level is not None and entries[doc_id][0] != level:
+                    return
+                if scores.get(doc_id, 0) < score:
+                    scores[doc_id] = score
+
+            for doc_id in self.by_word.get(text, ()):
+                offer(doc_id, EXACT_WORD)
+            # Prefix hits come from the trie, shortest (best ranked) first, so the
+            # candidate cap below only ever cuts the substring tail
+            for doc_id in self.word_trie.prefix(text, limit * 2):
+                offer(doc_id, WORD_PREFIX)
+            for doc_id in itertools.islice(self._candidates(self.word_grams, grams), MAX_CANDIDATES):
+                word = entries[doc_id][2]
+                if text in word and not word.startswith(text):
+                    offer(doc_id, WORD_SUBSTRING)
+            if len(text) > 1:
+                for doc_id in itertools.islice(self._candidates(self.meaning_grams, grams), MAX_CANDIDATES):
+                    meaning = entries[doc_id][3]
+                    position = meaning.find(text)
+                    if position == 0 or (position > 0 and not meaning[position - 1].isalnum()):
+                        offer(doc_id, MEANING_WORD_START)
+                    elif position > 0:
+                        offer(doc_id, MEANING_SUBSTRING)
+            if key:
+                for doc_id in self.trie.prefix(key, limit * 2):
+                    offer(doc_id, EXACT_ROMANIZATION if entries[doc_id][4] == key else ROMANIZATION_PREFIX)
+
+            best = heapq.nsmallest(
+                limit, scores.items(),
+                key=lambda item: (-item[1], len(entries[item[0]][2]), item[0])
+            )
+            return [(score, entries[doc_id][0], entries[doc_id][1]) for doc_id, score in best]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(language, load_word_banks, user=DEFAULT_USER):
+    """Shared index for a learner's language; `load_word_banks()` is only called to build it."""
+    key = (user, language)
+    index = _indexes.get(key)
+    if index is None:
+        # Built outside the registry lock so one learner's build doesn't stall the others
+        word_banks = load_word_banks()
+        with span("search_index_build"):
+            index = SearchIndex(word_banks)
+        with _indexes_lock:
+            index = _indexes.setdefault(key, index)
+    return index
+
+
+def drop_search_index(language, user=DEFAULT_USER):
+    """Forget the index for a learner's language; it is rebuilt on next use."""
+    with _indexes_lock:
+        _indexes.pop((user, language), None)
+
+
+def refresh_search_index(language, word_banks, user=DEFAULT_USER):
+    """Resync the index for `language`, if built, after the word banks were rewritten."""
+    index = _indexes.get((user, language))
+    if index is not None:
+        index.sync(word_banks)
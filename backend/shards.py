@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from main import load_word_banks, save_word_banks
+from paths import DEFAULT_USER, check_name, shard_dir
+from wordbank import WordBank
+
+LEVELS = ("beginner", "intermediate")
+# Word banks of at most this many (user, language) shards stay loaded
+CACHE_SHARDS = int(os.getenv("WORD_BANK_CACHE_SHARDS", "64"))
+
+
+class Shard:
+    """One learner's word banks for one language.
+
+    Each shard has its own files, lock and cached WordBanks, so a large import
+    for one learner never holds up another learner's requests. The
+    cache is dropped whenever the files change underneath it (e.g. the CLI),
+    and the change listeners are told about the reloaded banks.
+    """
+
+    def __init__(self, user, language):
+        self.user = user
+        self.language = language
+        self.dir = shard_dir(language, user)
+        self.lock = threading.RLock()
+        self.banks = None
+        self.stamp = None
+
+    def _stamp(self):
+        stamp = []
+        for level in LEVELS:
+            try:
+                stat = os.stat(os.path.join(self.dir, f"{level}.json"))
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def load(self):
+        """The cached banks, (re)loading them if needed. Hold `lock` while using them."""
+        with self.lock:
+            stamp = self._stamp()
+            if self.banks is None or stamp != self.stamp:
+                self.banks = load_word_banks(self.language, self.user)
+                self.stamp = stamp
+                _notify(_listeners, self.user, self.language, self.banks)
+            _touch(self)
+            return self.banks
+
+    def save(self, word_banks):
+        """Replace the banks on disk and in the cache, then tell the listeners."""
+        word_banks = {
+            level: entries if isinstance(entries, WordBank) else WordBank(entries)
+            for level, entries in ((level, word_banks.get(level, ())) for level in LEVELS)
+        }
+        with self.lock:
+            save_word_banks(word_banks, self.language, self.user)
+            self.banks = word_banks
+            self.stamp = self._stamp()
+            _touch(self)
+            _notify(_listeners, self.user, self.language, word_banks)
+        return word_banks
+
+    @contextmanager
+    def edit(self):
+        """Lock, load, let the caller change the banks in place, then save."""
+        with self.lock:
+            word_banks = self.load()
+            try:
+                yield word_banks
+            except BaseException:
+                # The change may be half applied; reload from disk next time
+                self.banks = None
+                raise
+            self.save(word_banks)
+
+
+_shards = {}
+_loaded = OrderedDict()
+_shards_lock = threading.Lock()
+_listeners = []
+_evict_listeners = []
+
+
+def on_change(listener):
+    """Call `listener(user, language, word_banks)` after every save or reload from disk."""
+    _listeners.append(listener)
+
+
+def on_evict(listener):
+    """Call `listener(user, language)` when a shard's banks are dropped from the cache,
+    so anything built from them can be dropped too."""
+    _evict_listeners.append(listener)
+
+
+def _notify(listeners, *args):
+    for listener in listeners:
+        listener(*args)
+
+
+def get_shard(user=DEFAULT_USER, language="chinese"):
+    """The shard for a learner and language; ValueError for unsafe names."""
+    key = (check_name("user", user), check_name("language", language))
+    with _shards_lock:
+        shard = _shards.get(key)
+        if shard is None:
+            shard = _shards[key] = Shard(user, language)
+        return shard
+
+
+def _touch(shard):
+    """Mark `shard` most recently used, dropping the banks of the least recently used ones."""
+    with _shards_lock:
+        _loaded[(shard.user, shard.language)] = shard
+        _loaded.move_to_end((shard.user, shard.language))
+        stale = []
+        while len(_loaded) > CACHE_SHARDS:
+            stale.append(_loaded.popitem(last=False)[1])
+    for other in stale:
+        # Evict under the victim's own lock, and only if nobody holds it right
+        # now: a busy shard goes back in the cache rather than blocking here
+        if other is shard or not other.lock.acquire(blocking=False):
+            with _shards_lock:
+                _loaded.setdefault((other.user, other.language), other)
+            continue
+        try:
+            with _shards_lock:
+                # Loaded again since it was picked
+                if (other.user, other.language) in _loaded:
+                    continue
+            other.banks = None
+            _notify(_evict_listeners, other.user, other.language)
+        finally:
+            other.lock.release()
+
+
+def statuses():
+    with _shards_lock:
+        loaded = list(_loaded.values())
+    return [{
+        "user": shard.user,
+        "language": shard.language,
+        "entries": sum(len(entries) for entries in (shard.banks or {}).values()),
+    } for shard in loaded]
@@ -0,0 +1,104 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from governor import CircuitOpenError, DeadlineExceeded
+
+
+class _Governor:
+    def __init__(self, exc):
+        self.exc = exc
+
+    def call(self, fn):
+        raise self.exc
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager, so the lifespan (backend preloading) never runs
+    return TestClient(api.app)
+
+
+@pytest.mark.parametrize("exc, status", [(CircuitOpenError("anthropic circuit is open"), 503),
+                                         (DeadlineExceeded("deadline"), 504)])
+def test_shed_or_late_vocab_extraction_is_an_error(client, monkeypatch, exc, status):
+    monkeypatch.setattr(api, "get_governor", lambda name: _Governor(exc))
+    response = client.post("/api/extract-text", json={"text": "你好，世界"})
+    assert response.status_code == status
+    assert response.json()["detail"] == str(exc)
+
+
+class _Deck:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, word, quality):
+        if word != "你好":
+            raise KeyError(word)
+        self.recorded.append((word, quality))
+        return _State()
+
+
+class _State:
+    def to_dict(self):
+        return {}
+
+
+@pytest.fixture
+def deck(monkeypatch):
+    deck = _Deck()
+    monkeypatch.setattr(api, "_deck", lambda user, language, level: deck)
+    return deck
+
+
+@pytest.mark.parametrize("fields", [
+    {},
+    {"quality": "abc"},
+    {"quality": None},
+    {"quality": 2.5},
+    {"quality": 6},
+    {"quality": -1},
+    {"quality": [3]},
+    {"score": "x"},
+    {"score": "nan"},
+    {"score": 1.5},
+    {"score": -0.1},
+])
+def test_invalid_review_grades_are_rejected(client, deck, fields):
+    response = client.post("/api/review", json={"level": "beginner", "word": "你好", **fields})
+    assert response.status_code == 400
+    assert deck.recorded == []
+
+
+@pytest.mark.parametrize("body", [{"quality": 3}, {"level": "beginner", "quality": 3},
+                                  {"level": "expert", "word": "你好", "quality": 3},
+                                  {"level": "beginner", "word": ["你好"], "quality": 3}])
+def test_review_needs_a_level_and_word(client, deck, body):
+    assert client.post("/api/review", json=body).status_code == 400
+
+
+@pytest.mark.parametrize("fields, quality", [({"quality": 0}, 0), ({"quality": "5"}, 5), ({"quality": 4.0}, 4),
+                                             ({"score": 0.61}, 3), ({"score": 1}, 5)])
+def test_valid_review_grades(client, deck, fields, quality):
+    response = client.post("/api/review", json={"level": "beginner", "word": "你好", **fields})
+    assert response.status_code == 200
+    assert deck.recorded == [("你好", quality)]
+
+
+def test_review_of_an_unknown_word(client, deck):
+    assert client.post("/api/review", json={"level": "beginner", "word": "再见", "quality": 3}).status_code == 404
+
+
+def test_evicting_a_shard_drops_what_was_built_from_it(monkeypatch):
+    import phonetic
+    import scheduler
+    import search
+    key = ("evicted", "chinese")
+    monkeypatch.setitem(search._indexes, key, object())
+    monkeypatch.setitem(phonetic._indexes, key, object())
+    monkeypatch.setitem(scheduler._schedulers, key + ("beginner",), object())
+    monkeypatch.setitem(scheduler._schedulers, ("kept", "chinese", "beginner"), object())
+    api._shard_evicted(*key)
+    assert key not in search._indexes and key not in phonetic._indexes
+    assert key + ("beginner",) not in scheduler._schedulers
+    assert ("kept", "chinese", "beginner") in scheduler._schedulers
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from governor import CircuitBreaker, DeadlineExceeded, Governor, deadline
+
+
+def _governor(**settings):
+    settings = dict(dict(rate=1000, burst=100, retries=0, failure_threshold=1, reset_timeout=0.05), **settings)
+    return Governor("test", **settings)
+
+
+def _fail(exc):
+    def fn(timeout):
+        raise exc
+    return fn
+
+
+def test_backend_timeout_trips_the_breaker():
+    gov = _governor()
+    with pytest.raises(TimeoutError):
+        gov.call(_fail(TimeoutError("attempt timed out")))
+    assert gov.breaker.state == CircuitBreaker.OPEN
+
+
+def test_caller_deadline_does_not_trip_the_breaker():
+    gov = _governor()
+
+    def slow(timeout):
+        time.sleep(timeout)
+        raise TimeoutError("attempt timed out")
+
+    with deadline(0.02), pytest.raises(DeadlineExceeded):
+        gov.call(slow)
+    assert gov.breaker.state == CircuitBreaker.CLOSED
+    assert gov.breaker.failures == 0
+    assert gov.limiter.in_flight == 0
+
+
+def test_expired_deadline_frees_a_half_open_probe():
+    gov = _governor()
+    with pytest.raises(ConnectionError):
+        gov.call(_fail(ConnectionError()))
+    time.sleep(0.06)
+
+    def probe(timeout):
+        assert gov.breaker.state == CircuitBreaker.HALF_OPEN
+        time.sleep(timeout)
+        raise TimeoutError("attempt timed out")
+
+    with deadline(0.02), pytest.raises(DeadlineExceeded):
+        gov.call(probe)
+    assert gov.breaker.state == CircuitBreaker.OPEN
+    # The cooldown was already served, so the next call is let through as a probe
+    assert gov.call(lambda timeout: "ok") == "ok"
+    assert gov.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_half_open_probe_lets_the_next_call_probe():
+    gov = _governor()
+    with pytest.raises(ConnectionError):
+        gov.call(_fail(ConnectionError()))
+    time.sleep(0.06)
+
+    async def main():
+        started = asyncio.Event()
+
+        async def hang(timeout):
+            started.set()
+            await asyncio.sleep(10)
+
+        async def ok(timeout):
+            return "ok"
+
+        probe = asyncio.create_task(gov.acall(hang))
+        await started.wait()
+        assert gov.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert gov.limiter.in_flight == 0
+        assert await gov.acall(ok) == "ok"
+
+    asyncio.run(main())
+    assert gov.breaker.state == CircuitBreaker.CLOSED
+
+
+class _Throttled(Exception):
+    status_code = 429
+
+
+def test_throttling_burst_leaves_the_breaker_closed():
+    gov = _governor(retries=3, failure_threshold=2, base_delay=0.001, max_delay=0.001)
+    calls = []
+
+    def burst(timeout):
+        calls.append(timeout)
+        if len(calls) <= 3:
+            raise _Throttled()
+        return "ok"
+
+    for _ in range(3):
+        calls.clear()
+        assert gov.call(burst) == "ok"
+    assert gov.breaker.state == CircuitBreaker.CLOSED
+    assert gov.breaker.failures == 0
+    assert gov.limiter.in_flight == 0
@@ -0,0 +1,27 @@
+import asyncio
+
+from hedging import Hedger
+
+
+def test_cancelled_primary_is_sampled_as_a_lower_bound():
+    hedger = Hedger(default_delay=0.05)
+
+    async def slow():
+        await asyncio.sleep(10)
+        return "primary"
+
+    async def fast():
+        return "hedge"
+
+    async def main():
+        result = await hedger.run([slow, fast])
+        # Let the cancelled primary unwind
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "hedge"
+    assert hedger.hedges_won == 1
+    # Only the primary is sampled, and it ran at least until the hedge went out
+    assert len(hedger.latencies.samples) == 1
+    assert hedger.latencies.samples[0] >= 0.05
+
@@ -0,0 +1,60 @@
+import random
+import re
+import time
+
+from normalize import _SEPARATOR, _strip_brackets, get_normalizer
+
+_INNERMOST = re.compile(r"\([^()\x1e]*\)")
+
+
+def _reference(text):
+    # The innermost-first passes the single-pass version replaced
+    while "(" in text:
+        text, count = _INNERMOST.subn("", text)
+        if not count:
+            break
+    return text.replace("(", "").replace(")", "")
+
+
+def test_strip_brackets_matches_innermost_passes():
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice("ab()(" + _SEPARATOR) for _ in range(rng.randrange(20)))
+        assert _strip_brackets(text) == _reference(text), repr(text)
+
+
+def test_stray_and_unclosed_brackets():
+    assert _strip_brackets("a(b(c)d") == "abd"
+    assert _strip_brackets("a)b(c)") == "ab"
+    assert _strip_brackets("((a)b)c)") == "c"
+
+
+def test_deep_nesting_is_linear():
+    depth = 100_000
+    start = time.perf_counter()
+    assert _strip_brackets("x" + "(" * depth + "y" + ")" * depth + "z") == "xz"
+    assert _strip_brackets("(" * depth + "y") == "y"
+    assert time.perf_counter() - start < 5
+
+
+def test_normalize_full_width_and_cjk_punctuation():
+    normalizer = get_normalizer("chinese")
+    assert normalizer.normalize("你好（nǐ hǎo）！") == "你好"
+    assert normalizer.normalize("【笑】谢谢，再见。") == "谢谢再见"
+    assert normalizer.normalize("Hello, (laughs) world!") == "Hello  world"
+
+
+def test_normalize_keeps_language_punctuation():
+    assert get_normalizer("english").normalize("don't stop-start.") == "don't stop-start"
+
+
+def test_normalize_many_groups_stay_in_their_record():
+    texts = ["a(b", "c)d", "（e）f", "", None, "g" + _SEPARATOR + "h"]
+    normalizer = get_normalizer("chinese")
+    assert normalizer.normalize_many(texts) == [normalizer.normalize(text) for text in texts]
+    assert normalizer.normalize_many(texts)[:2] == ["ab", "cd"]
+
+
+def test_unknown_languages_share_the_default_normalizer():
+    assert get_normalizer("klingon") is get_normalizer(None) is get_normalizer("x" * 100)
+    assert get_normalizer("english") is not get_normalizer(None)
@@ -0,0 +1,21 @@
+from phonetic import get_phonetic_index, refresh_phonetic_index
+
+
+def _banks(*words):
+    return {"beginner": [{"word": word, "meaning": ""} for word in words], "intermediate": []}
+
+
+def test_index_is_reused_for_the_same_banks():
+    banks = _banks("你好", "谢谢")
+    index = get_phonetic_index(banks, "chinese", "cache-user")
+    assert get_phonetic_index(banks, "chinese", "cache-user") is index
+
+
+def test_index_follows_new_banks_and_refresh():
+    banks = _banks("你好")
+    index = get_phonetic_index(banks, "chinese", "refresh-user")
+    replaced = _banks("你好", "再见")
+    assert get_phonetic_index(replaced, "chinese", "refresh-user").words == ["你好", "再见"]
+
+    refresh_phonetic_index("chinese", replaced, "refresh-user")
+    assert get_phonetic_index(replaced, "chinese", "refresh-user") is not index
@@ -0,0 +1,43 @@
+from scheduler import Scheduler
+from wordbank import WordBank
+
+
+def _scheduler(tmp_path, bank):
+    return Scheduler("chinese", "beginner", bank, log_path=str(tmp_path / "reviews.jsonl"))
+
+
+def test_sync_applies_only_changes_to_the_same_bank(tmp_path):
+    bank = WordBank([{"word": "一", "meaning": "one"}, {"word": "二", "meaning": "two"}])
+    scheduler = _scheduler(tmp_path, bank)
+    scheduler.record("一", 5, now=0)
+
+    bank.discard("二")
+    bank.append({"word": "三", "meaning": "three"})
+    bank.discard("一")
+    bank.append({"word": "一", "meaning": "one again"})
+    scheduler.sync(bank)
+
+    assert scheduler.entries == {"一": {"word": "一", "meaning": "one again"},
+                                 "三": {"word": "三", "meaning": "three"}}
+    assert [entry["word"] for entry, _ in scheduler.next_cards(5, now=0)] == ["三", "一"]
+
+
+def test_sync_with_a_new_bank_rebuilds(tmp_path):
+    scheduler = _scheduler(tmp_path, WordBank([{"word": "一", "meaning": "one"}]))
+    scheduler.sync(WordBank([{"word": "二", "meaning": "two"}]))
+    assert list(scheduler.entries) == ["二"]
+    assert scheduler.next_card(now=0)[0]["word"] == "二"
+
+
+def test_next_cards_skips_stale_heads_and_keeps_the_heap(tmp_path):
+    bank = WordBank({"word": word, "meaning": ""} for word in "abcdef")
+    scheduler = _scheduler(tmp_path, bank)
+    for due, word in enumerate("abcdef"):
+        scheduler.record(word, 5, now=due)
+    scheduler.record("a", 5, now=100)
+    scheduler.remove("b")
+
+    words = [entry["word"] for entry, _ in scheduler.next_cards(3, now=0)]
+    assert words == ["c", "d", "e"]
+    assert [entry["word"] for entry, _ in scheduler.next_cards(3, now=0)] == words
+    assert scheduler.next_card(now=0)[0]["word"] == "c"
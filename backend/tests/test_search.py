@@ -0,0 +1,107 @@
+import random
+
+from search import RadixTrie, SearchIndex, romanization_key
+from wordbank import WordBank
+
+
+def _trie(keys):
+    trie = RadixTrie()
+    for doc_id, key in enumerate(keys):
+        trie.add(key, doc_id)
+    return trie
+
+
+def _edges(node):
+    return {label: _edges(child) for label, child in (node.edges or {}).values()}
+
+
+def test_prefix_splits_and_walks_edges():
+    trie = _trie(["nihao", "ni", "nimen", "hao", "nv"])
+    assert sorted(trie.prefix("ni", 10)) == [0, 1, 2]
+    assert sorted(trie.prefix("nih", 10)) == [0]
+    assert sorted(trie.prefix("n", 10)) == [0, 1, 2, 4]
+    assert trie.prefix("nix", 10) == []
+    assert trie.prefix("x", 10) == []
+    # Shortest keys come first
+    assert trie.prefix("ni", 1) == [1]
+
+
+def test_remove_prunes_and_merges_edges():
+    trie = _trie(["nihao", "nimen", "ni"])
+    trie.remove("nimen", 1)
+    trie.remove("ni", 2)
+    assert _edges(trie.root) == {"nihao": {}}
+    trie.remove("nihao", 0)
+    assert _edges(trie.root) == {}
+    assert trie.prefix("", 10) == []
+
+
+def test_matches_a_linear_scan():
+    rng = random.Random(0)
+    trie = RadixTrie()
+    keys = {}
+    for step in range(3000):
+        if keys and rng.random() < 0.4:
+            doc_id = rng.choice(list(keys))
+            trie.remove(keys.pop(doc_id), doc_id)
+        else:
+            keys[step] = "".join(rng.choice("abc") for _ in range(rng.randrange(1, 6)))
+            trie.add(keys[step], step)
+        if step % 50 == 0:
+            for prefix in ("", "a", "ab", "bca", "cc"):
+                expected = sorted(doc_id for doc_id, key in keys.items() if key.startswith(prefix))
+                assert sorted(trie.prefix(prefix, len(keys) + 1)) == expected
+
+
+def test_romanization_key():
+    assert romanization_key("Nǐ hǎo") == "nihao"
+    assert romanization_key("ni3 hao3") == "nihao"
+    assert romanization_key("nǚ") == "nv"
+
+
+def test_search_finds_romanization_prefixes():
+    index = SearchIndex({"beginner": [{"word": "你好", "meaning": "hello (ni3 hao3)"}], "intermediate": []})
+    assert [entry["word"] for _, _, entry in index.search("nih")] == ["你好"]
+
+
+def _words(index):
+    return sorted((level, entry["word"], entry.get("meaning")) for level, entry, *_ in index.entries.values())
+
+
+def test_sync_with_the_same_banks_applies_only_the_changes():
+    banks = {"beginner": WordBank([{"word": "你好", "meaning": "hello"}, {"word": "谢谢", "meaning": "thanks"}]),
+             "intermediate": WordBank([{"word": "经济", "meaning": "economy"}])}
+    index = SearchIndex(banks)
+    banks["beginner"].discard("谢谢")
+    banks["beginner"].discard("你好")
+    banks["beginner"].append({"word": "你好", "meaning": "hi"})
+    banks["intermediate"].append({"word": "环境", "meaning": "environment"})
+    index.sync(banks)
+    assert _words(index) == [("beginner", "你好", "hi"), ("intermediate", "环境", "environment"),
+                             ("intermediate", "经济", "economy")]
+    assert [entry["word"] for _, _, entry in index.search("hi")] == ["你好"]
+    assert index.search("thanks") == []
+
+
+def test_sync_with_new_banks_or_levels_rebuilds():
+    index = SearchIndex({"beginner": WordBank([{"word": "你好", "meaning": "hello"}]),
+                         "intermediate": [{"word": "经济", "meaning": "economy"}]})
+    index.sync({"beginner": WordBank([{"word": "再见", "meaning": "bye"}])})
+    assert _words(index) == [("beginner", "再见", "bye")]
+
+
+def test_prefix_walks_by_key_length_across_compressed_edges():
+    trie = _trie(["abcdefgh", "abx", "abcdefghi", "ab"])
+    assert trie.prefix("a", 10) == [3, 1, 0, 2]
+
+
+def test_common_prefix_keeps_exact_and_shortest_prefix_matches():
+    rng = random.Random(1)
+    common = [{"word": "长" + "".join(rng.choice("的一是不了人我在有他这") for _ in range(6)) + str(i), "meaning": "x"}
+              for i in range(2000)]
+    index = SearchIndex({"beginner": common + [{"word": "长城", "meaning": "Great Wall"},
+                                               {"word": "长", "meaning": "long"}],
+                         "intermediate": [{"word": "很长", "meaning": "very long"}]})
+    words = [entry["word"] for _, _, entry in index.search("长", limit=3)]
+    assert words[:2] == ["长", "长城"]
+    assert [entry["word"] for _, _, entry in index.search("长城", limit=1)] == ["长城"]
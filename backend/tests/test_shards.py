@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+import shards
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(shards, "CACHE_SHARDS", 1)
+    monkeypatch.setattr(shards, "_loaded", shards.OrderedDict())
+    monkeypatch.setattr(shards, "_listeners", [])
+    monkeypatch.setattr(shards, "_evict_listeners", [])
+    monkeypatch.setattr(shards, "shard_dir", lambda language, user: str(tmp_path / user / language))
+
+
+def _loaded_shard(user):
+    shard = shards.Shard(user, "chinese")
+    shard.banks = {}
+    return shard
+
+
+def test_least_recently_used_shard_is_evicted(cache):
+    first, second = _loaded_shard("a"), _loaded_shard("b")
+    shards._touch(first)
+    shards._touch(second)
+    assert first.banks is None
+    assert second.banks == {}
+    assert list(shards._loaded) == [("b", "chinese")]
+
+
+def test_a_shard_in_use_is_not_evicted(cache):
+    first, second = _loaded_shard("a"), _loaded_shard("b")
+    shards._touch(first)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with first.lock:
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        shards._touch(second)
+        assert first.banks == {}
+        assert ("a", "chinese") in shards._loaded
+    finally:
+        release.set()
+        thread.join()
+    # Once it is free again the next touch evicts it
+    shards._touch(second)
+    assert first.banks is None
+
+
+def test_eviction_tells_the_evict_listeners(cache):
+    evicted = []
+    shards.on_evict(lambda user, language: evicted.append((user, language)))
+    shards._touch(_loaded_shard("a"))
+    shards._touch(_loaded_shard("b"))
+    assert evicted == [("a", "chinese")]
+
+
+def test_reload_from_disk_tells_the_change_listeners(cache, monkeypatch, tmp_path):
+    loads = []
+    monkeypatch.setattr(shards, "load_word_banks", lambda language, user: loads.append(user) or {"n": len(loads)})
+    changed = []
+    shards.on_change(lambda user, language, word_banks: changed.append(word_banks))
+    shard = shards.Shard("a", "chinese")
+    shard.load()
+    shard.load()
+    assert changed == [{"n": 1}]
+
+    # Rewritten behind the cache's back, e.g. by the CLI
+    (tmp_path / "a" / "chinese").mkdir(parents=True)
+    (tmp_path / "a" / "chinese" / "beginner.json").write_text("[]")
+    assert shard.load() == {"n": 2}
+    assert changed == [{"n": 1}, {"n": 2}]
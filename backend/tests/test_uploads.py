@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+import uploads
+from uploads import MB, receive_upload
+
+BOUNDARY = "----testboundary"
+
+
+class _Request:
+    """Just the parts of a Starlette request receive_upload reads."""
+
+    def __init__(self, body, chunk_size=1 << 16, headers=None):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}",
+                        "content-length": str(len(body))}
+        self.headers.update(headers or {})
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+def _form(*parts):
+    body = b""
+    for name, filename, data in parts:
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _receive(request, field="file", max_bytes=MB):
+    return asyncio.run(receive_upload(request, field, max_bytes))
+
+
+def _status(request, **options):
+    with pytest.raises(HTTPException) as error:
+        _receive(request, **options)
+    return error.value.status_code
+
+
+def test_boundaries_split_across_chunks():
+    data = (b"--" + BOUNDARY.encode() + b"x\r\n") * 50 + bytes(range(256))
+    body = _form(("other", "a.txt", b"ignored"), ("file", "b.bin", data))
+    for chunk_size in (1, 7, len(BOUNDARY) + 3):
+        with _receive(_Request(body, chunk_size)) as upload:
+            assert upload.filename == "b.bin"
+            assert upload.source == data
+
+
+def test_only_the_first_matching_part_is_kept():
+    body = _form(("file", "first", b"one"), ("file", "second", b"two"))
+    with _receive(_Request(body)) as upload:
+        assert upload.source == b"one"
+
+
+def test_oversized_part_is_rejected():
+    # Content-Length is within the form allowance, so the part itself trips the limit
+    body = _form(("file", "big.bin", b"x" * 2048))
+    assert _status(_Request(body, 100), max_bytes=1024) == 413
+
+
+def test_content_length_over_the_limit():
+    body = _form(("file", "a", b"x"))
+    assert _status(_Request(body, headers={"content-length": str(MB + uploads.FORM_OVERHEAD + 1)})) == 413
+
+
+@pytest.mark.parametrize("value", ["abc", "-1", "1.5", " 12", "１２"])
+def test_malformed_content_length(value):
+    assert _status(_Request(_form(("file", "a", b"x")), headers={"content-length": value})) == 400
+
+
+def test_missing_field_and_wrong_content_type():
+    assert _status(_Request(_form(("other", "a", b"x")))) == 400
+    assert _status(_Request(b"x", headers={"content-type": "application/json"})) == 400
+
+
+def test_large_uploads_spool_to_disk(monkeypatch):
+    monkeypatch.setattr(uploads, "SPOOL_BYTES", 1024)
+    data = os.urandom(uploads.SPOOL_BYTES * 5)
+    with _receive(_Request(_form(("file", "a.bin", data)), 1000), max_bytes=20 * MB) as upload:
+        assert upload.size == len(data)
+        assert upload.path is not None
+        with upload.open() as f:
+            assert f.read() == data
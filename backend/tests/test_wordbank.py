@@ -0,0 +1,117 @@
+import io
+import json
+import random
+
+import pytest
+
+import wordbank
+from wordbank import WordBank, dump_json, load_json
+
+
+class _Collide(str):
+    """A word whose hash lands every instance in the same probe chain."""
+
+    def __hash__(self):
+        return 42
+
+
+def _entries(n, prefix="w"):
+    return [{"word": f"{prefix}{i}", "meaning": f"m{i}"} for i in range(n)]
+
+
+def test_lookups_survive_collisions_and_deletes():
+    words = [_Collide(f"c{i}") for i in range(50)]
+    bank = WordBank({"word": word, "meaning": ""} for word in words)
+    for i in range(0, 50, 2):
+        assert bank.discard(words[i])
+    for i, word in enumerate(words):
+        assert (word in bank) == (i % 2 == 1)
+    # A probe has to walk past the tombstones to reach the later rows
+    bank.append({"word": _Collide("c0"), "meaning": "again"})
+    assert bank.get(_Collide("c0"))["meaning"] == "again"
+    assert bank.find(_Collide("c49")) >= 0
+
+
+def test_index_resizes_and_matches_a_dict():
+    rng = random.Random(0)
+    bank = WordBank()
+    expected = {}
+    for step in range(20_000):
+        word = f"w{rng.randrange(5000)}"
+        if word in expected and rng.random() < 0.5:
+            assert bank.discard(word)
+            del expected[word]
+        elif word not in expected:
+            bank.append({"word": word, "meaning": str(step)})
+            expected[word] = str(step)
+    assert len(bank) == len(expected)
+    assert all(bank.get(word)["meaning"] == meaning for word, meaning in expected.items())
+    assert {entry["word"] for entry in bank} == set(expected)
+    assert len(bank.slots) * 7 >= bank.used * 10
+
+
+def test_count_and_index_work_like_a_list():
+    bank = WordBank(_entries(3))
+    assert bank.count({"word": "w1", "meaning": "m1"}) == 1
+    assert bank.index({"word": "w2", "meaning": "m2"}) == 2
+
+
+def test_missing_meaning_stays_missing():
+    entries = [{"word": "a"}, {"word": "b", "meaning": ""}, {"word": "c", "pinyin": "c1"}]
+    bank = WordBank(entries)
+    assert bank.to_list() == entries
+    assert "meaning" not in bank[0] and bank[1]["meaning"] == ""
+
+
+ROUND_TRIP = [
+    {"word": "你好", "meaning": "hello (nǐ hǎo)"},
+    {"word": 'quote " back\\slash', "meaning": "tab\tnew\nline \x00  "},
+    {"word": "😀", "meaning": "emoji 😀"},
+    {"word": "extra", "meaning": "m", "tags": ["a", "b"], "level": 2},
+    {"word": "no meaning"},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 20])
+def test_dump_and_load_round_trip(chunk_size):
+    f = io.StringIO()
+    dump_json(WordBank(ROUND_TRIP), f)
+    assert f.getvalue() == json.dumps(ROUND_TRIP, ensure_ascii=False, indent=2)
+    assert load_json(io.StringIO(f.getvalue()), chunk_size).to_list() == ROUND_TRIP
+
+
+def test_dump_plain_entries_and_empty_bank():
+    for entries in (ROUND_TRIP, [], WordBank()):
+        f = io.StringIO()
+        dump_json(entries, f)
+        assert json.loads(f.getvalue()) == list(entries)
+
+
+def test_load_json_batches(monkeypatch):
+    monkeypatch.setattr(wordbank, "BATCH", 7)
+    entries = _entries(50)
+    assert load_json(io.StringIO(json.dumps(entries)), 16).to_list() == entries
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    '[{"word": "a"} {"word": "b"}]',
+    '[{"word": "a"},, {"word": "b"}]',
+    '[, {"word": "a"}]',
+    '[{"word": "a"},]',
+    '[{"word": "a"}',
+    '[{"word": "a"}] x',
+    '[{"word": "a"}]]',
+    '[{"word": "a"',
+])
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 20])
+def test_load_json_rejects_what_json_load_rejects(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text)
+    with pytest.raises(json.JSONDecodeError):
+        load_json(io.StringIO(text), chunk_size)
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] \n", '[\n {"word": "a"} ,\n{"word": "b"}\n]\n  '])
+def test_load_json_accepts_whitespace(text):
+    assert load_json(io.StringIO(text), 2).to_list() == json.loads(text)
@@ -0,0 +1,172 @@
+import asyncio
+import io
+import os
+import tempfile
+
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MB = 1024 * 1024
+# Uploads stay in memory up to this size and are spooled to a temp file beyond it
+SPOOL_BYTES = int(float(os.getenv("UPLOAD_SPOOL_MB", "4")) * MB)
+MAX_PDF_BYTES = int(float(os.getenv("UPLOAD_MAX_PDF_MB", "50")) * MB)
+MAX_ANKI_BYTES = int(float(os.getenv("UPLOAD_MAX_ANKI_MB", "200")) * MB)
+MAX_AUDIO_BYTES = int(float(os.getenv("UPLOAD_MAX_AUDIO_MB", "25")) * MB)
+MAX_IMPORT_BYTES = int(float(os.getenv("UPLOAD_MAX_IMPORT_MB", "1024")) * MB)
+# Allowance for multipart boundaries and part headers around the file itself
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload:
+    """A file received from a multipart request body.
+
+    `source` is what the extractors take: the bytes themselves while the
+    upload is small, or the path of the temp file it was spooled to.
+    """
+
+    def __init__(self, filename, content_type, max_bytes, spool_bytes=None, suffix=""):
+        self.filename = filename
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.spool_bytes = SPOOL_BYTES if spool_bytes is None else spool_bytes
+        self.suffix = suffix
+        self.size = 0
+        self.buffer = io.BytesIO()
+        self.file = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        if self.file is None and self.size > self.spool_bytes:
+            self.file = tempfile.NamedTemporaryFile(delete=False, suffix=self.suffix)
+            self.file.write(self.buffer.getbuffer())
+            self.buffer = None
+        (self.file or self.buffer).write(data)
+
+    def finish(self):
+        if self.file is not None:
+            self.file.close()
+
+    @property
+    def path(self):
+        return self.file.name if self.file is not None else None
+
+    @property
+    def source(self):
+        # BytesIO.getvalue() hands over its buffer without copying
+        return self.path or self.buffer.getvalue()
+
+    def open(self):
+        """Binary file object over the upload, for readers like zipfile."""
+        if self.path:
+            return open(self.path, "rb")
+        return io.BytesIO(self.buffer.getvalue())
+
+    def close(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def receive_upload(request: Request, field, max_bytes, suffix=""):
+    """Stream the multipart file `field` out of the request body in chunks.
+
+    Memory use is bounded by SPOOL_BYTES whatever the upload size, and the
+    request is rejected with 413 as soon as it passes `max_bytes` (400 for a
+    malformed Content-Length or body).
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        if not (content_length.isascii() and content_length.isdigit()):
+            raise HTTPException(status_code=400, detail="Malformed Content-Length header")
+        if int(content_length) > max_bytes + FORM_OVERHEAD:
+            raise HTTPException(status_code=413, detail=f"Upload is larger than {max_bytes // MB} MB")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    target = field.encode()
+    state = {"headers": {}, "header": b"", "value": b"", "upload": None}
+    uploads = []
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["header"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header"].lower()] = state["value"]
+        state["header"] = state["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition"))
+        if disposition.get(b"name") == target and not uploads:
+            filename = disposition.get(b"filename", b"").decode("utf-8", "replace")
+            content_type = state["headers"].get(b"content-type", b"").decode("latin-1")
+            state["upload"] = SpooledUpload(filename, content_type, max_bytes, suffix=suffix)
+            uploads.append(state["upload"])
+        else:
+            state["upload"] = None
+
+    def on_part_data(data, start, end):
+        if state["upload"] is not None:
+            state["upload"].write(memoryview(data)[start:end])
+
+    def on_part_end():
+        if state["upload"] is not None:
+            state["upload"].finish()
+        state["upload"] = None
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > SPOOL_BYTES:
+                # Past this point parts may be spooled to disk: keep file writes off the event loop
+                await asyncio.to_thread(parser.write, chunk)
+            else:
+                parser.write(chunk)
+        parser.finalize()
+    except BaseException as e:
+        for upload in uploads:
+            upload.finish()
+            upload.close()
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(status_code=413, detail=f"Upload is larger than {max_bytes // MB} MB") from None
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}") from None
+        raise
+
+    if not uploads:
+        raise HTTPException(status_code=400, detail=f"Missing file field '{field}'")
+    return uploads[0]
+
@@ -0,0 +1,409 @@
+import json
+import re
+from array import array
+from json.encoder import encode_basestring
+from json.scanner import make_scanner
+from collections.abc import Mapping, Sequence
+from itertools import accumulate, compress, islice
+
+_EMPTY = 0
+_DELETED = -1
+_MIN_SLOTS = 8
+# Entries are appended and indexed in batches of this many
+BATCH = 4096
+# Whitespace between JSON tokens, as json.decoder.WHITESPACE
+_GAP = re.compile(r"[ \t\n\r]*")
+# A comma with the next entry object already in view
+_NEXT_ENTRY = re.compile(r"[ \t\n\r]*,[ \t\n\r]*(?=\{)")
+
+
+class StringArena:
+    """Strings packed end to end as UTF-8 in one buffer, addressed by row."""
+
+    __slots__ = ("data", "ends")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("q")
+
+    def append(self, text):
+        self.data += text.encode("utf-8")
+        self.ends.append(len(self.data))
+
+    def extend(self, texts):
+        encoded = [text.encode("utf-8") for text in texts]
+        self.ends.extend(accumulate(map(len, encoded), initial=len(self.data)))
+        del self.ends[len(self.ends) - len(encoded) - 1]
+        self.data += b"".join(encoded)
+
+    def __getitem__(self, row):
+        start = self.ends[row - 1] if row else 0
+        return self.data[start:self.ends[row]].decode("utf-8")
+
+    def raw(self, row):
+        start = self.ends[row - 1] if row else 0
+        return memoryview(self.data)[start:self.ends[row]]
+
+    @property
+    def nbytes(self):
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+class Entry(Mapping):
+    """Read-only view of one row, usable wherever an entry dict is read."""
+
+    __slots__ = ("bank", "row")
+
+    def __init__(self, bank, row):
+        self.bank = bank
+        self.row = row
+
+    def __getitem__(self, key):
+        if key == "word":
+            return self.bank.words[self.row]
+        if key == "meaning" and self.row not in self.bank.no_meaning:
+            return self.bank.meanings[self.row]
+        extra = self.bank.extras.get(self.row)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield "word"
+        if self.row not in self.bank.no_meaning:
+            yield "meaning"
+        yield from self.bank.extras.get(self.row, ())
+
+    def __len__(self):
+        return 2 - (self.row in self.bank.no_meaning) + len(self.bank.extras.get(self.row, ()))
+
+    def to_dict(self):
+        entry = {"word": self.bank.words[self.row]}
+        if self.row not in self.bank.no_meaning:
+            entry["meaning"] = self.bank.meanings[self.row]
+        extra = self.bank.extras.get(self.row)
+        if extra:
+            entry.update(extra)
+        return entry
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class WordBank(Sequence):
+    """One level's entries stored column-wise.
+
+    Words and meanings live in string arenas rather than one dict and two str
+    objects per entry; rarely used extra keys go in a sparse side table. An
+    open-addressing hash table over the words makes `word in bank`, get() and
+    discard() O(1). Removed rows are tombstoned and dropped on the next load.
+    Iterating or indexing yields Entry views; to_list() exports plain dicts.
+    """
+
+    def __init__(self, entries=()):
+        self.words = StringArena()
+        self.meanings = StringArena()
+        self.extras = {}
+        # Rows whose entry had no "meaning" key at all (stored as "")
+        self.no_meaning = set()
+        self.alive = bytearray()
+        self.row_hashes = array("q")
+        # Rows in the order they were removed, for changes_since()
+        self.removed = array("q")
+        self._size = 0
+        self.slots = array("i", bytes(4 * _MIN_SLOTS))
+        self.used = 0
+        self._live = None
+        self.extend(entries)
+
+    # Hash index: 32-bit slots hold row + 1, _EMPTY or _DELETED; row_hashes caches hash(word)
+
+    def _reserve(self, extra):
+        """Grow the table, dropping deleted slots, if `extra` more rows would pass 70% load."""
+        if (self.used + extra) * 10 <= len(self.slots) * 7:
+            return
+        self.slots = array("i", bytes(4 * max(_MIN_SLOTS, 1 << ((self._size + extra) * 2).bit_length())))
+        self.used = 0
+        if self._size == len(self.alive):
+            self._place(range(self._size), self.row_hashes)
+        else:
+            rows = array("q", compress(range(len(self.alive)), self.alive))
+            self._place(rows, map(self.row_hashes.__getitem__, rows))
+
+    def _place(self, rows, hashes):
+        slots = self.slots
+        mask = len(slots) - 1
+        placed = 0
+        for row, h in zip(rows, hashes):
+            i = h & mask
+            while slots[i]:
+                i = (i + 1) & mask
+            slots[i] = row + 1
+            placed += 1
+        self.used += placed
+
+    def _probe(self, word):
+        """Slot of the first live row holding `word`, or -1."""
+        slots = self.slots
+        mask = len(slots) - 1
+        h = hash(word)
+        i = h & mask
+        encoded = None
+        while True:
+            slot = slots[i]
+            if slot == _EMPTY:
+                return -1
+            if slot != _DELETED and self.row_hashes[slot - 1] == h:
+                if encoded is None:
+                    encoded = word.encode("utf-8")
+                if self.words.raw(slot - 1) == encoded:
+                    return i
+            i = (i + 1) & mask
+
+    def _slot_of(self, row):
+        mask = len(self.slots) - 1
+        i = self.row_hashes[row] & mask
+        while self.slots[i] != row + 1:
+            i = (i + 1) & mask
+        return i
+
+    def find(self, word):
+        """Row of the first entry for `word`, or -1."""
+        i = self._probe(word)
+        return self.slots[i] - 1 if i >= 0 else -1
+
+    def get(self, word, default=None):
+        row = self.find(word)
+        return Entry(self, row) if row >= 0 else default
+
+    def __contains__(self, item):
+        word = item["word"] if isinstance(item, Mapping) else item
+        return self.find(word) >= 0
+
+    # Mutation
+
+    def append(self, entry):
+        self._append_batch([entry])
+
+    def extend(self, entries):
+        entries = iter(entries)
+        while True:
+            batch = list(islice(entries, BATCH))
+            if not batch:
+                return
+            self._append_batch(batch)
+
+    def _append_batch(self, batch):
+        first = len(self.alive)
+        words = [entry["word"] for entry in batch]
+        self.words.extend(words)
+        self.meanings.extend([entry.get("meaning", "") for entry in batch])
+        for row, entry in enumerate(batch, first):
+            if len(entry) > 2 or "meaning" not in entry:
+                if "meaning" not in entry:
+                    self.no_meaning.add(row)
+                extra = {key: value for key, value in entry.items() if key not in ("word", "meaning")}
+                if extra:
+                    self.extras[row] = extra
+        hashes = list(map(hash, words))
+        self.row_hashes.extend(hashes)
+        self._reserve(len(batch))
+        self.alive += b"\x01" * len(batch)
+        self._size += len(batch)
+        self._live = None
+        self._place(range(first, first + len(batch)), hashes)
+
+    def _delete_row(self, row, slot=None):
+        if slot is None:
+            slot = self._slot_of(row)
+        self.slots[slot] = _DELETED
+        self.alive[row] = 0
+        self.removed.append(row)
+        self.extras.pop(row, None)
+        self.no_meaning.discard(row)
+        self._size -= 1
+        self._live = None
+
+    def discard(self, word):
+        """Remove the first entry for `word`; returns whether there was one."""
+        i = self._probe(word)
+        if i < 0:
+            return False
+        self._delete_row(self.slots[i] - 1, i)
+        return True
+
+    def pop(self, index=-1):
+        row = self._rows()[index]
+        entry = Entry(self, row).to_dict()
+        self._delete_row(row)
+        return entry
+
+    # Sequence protocol over live rows
+
+    def _rows(self):
+        if self._live is None:
+            self._live = array("q", compress(range(len(self.alive)), self.alive))
+        return self._live
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        rows = self._rows()
+        if isinstance(index, slice):
+            return [Entry(self, row) for row in rows[index]]
+        return Entry(self, rows[index])
+
+    def __iter__(self):
+        for row in compress(range(len(self.alive)), self.alive):
+            yield Entry(self, row)
+
+    def snapshot(self):
+        """Ids of the rows live right now. Rows are only ever tombstoned, never
+        moved or overwritten, so they stay readable while the bank keeps changing
+        (minus the extra keys of rows removed in the meantime)."""
+        return array("q", self._rows())
+
+    def changes_since(self, mark=(0, 0)):
+        """(live rows added, rows removed, new mark) since `mark`, a mark returned
+        by an earlier call; the default is the empty bank.
+
+        Rows are only appended and tombstoned, so the row count and the journal
+        of removed rows are the whole history. A row added and removed again in
+        between is in neither list. Changes made during the call show up on the
+        next one.
+        """
+        removed_seen, rows_seen = mark
+        removed = self.removed[removed_seen:]
+        rows = len(self.alive)
+        added = array("q", compress(range(rows_seen, rows), self.alive[rows_seen:rows]))
+        return added, [row for row in removed if row < rows_seen], (removed_seen + len(removed), rows)
+
+    def to_list(self):
+        return [entry.to_dict() for entry in self]
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str) or len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"WordBank({len(self)} entries)"
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the columns and index."""
+        return (self.words.nbytes + self.meanings.nbytes + len(self.alive)
+                + self.row_hashes.itemsize * len(self.row_hashes) + self.slots.itemsize * len(self.slots)
+                + self.removed.itemsize * len(self.removed))
+
+
+def export(word_banks):
+    """Plain {level: [entry dict, ...]} for JSON responses."""
+    return {
+        level: entries.to_list() if isinstance(entries, WordBank) else [dict(entry) for entry in entries]
+        for level, entries in word_banks.items()
+    }
+
+
+def load_json(f, chunk_size=1 << 20):
+    """WordBank from a JSON array of entries, read `chunk_size` characters and
+    decoded a batch at a time, so neither the whole file nor the whole list of
+    dicts is ever held at once."""
+    scan = make_scanner(json.JSONDecoder())
+    gap = _GAP.match
+    next_entry = _NEXT_ENTRY.match
+    bank = WordBank()
+    batch = []
+    text = f.read(chunk_size).lstrip()
+    while not text:
+        more = f.read(chunk_size)
+        if not more:
+            break
+        text = more.lstrip()
+    if not text.startswith("["):
+        raise json.JSONDecodeError("Expecting '['", text, 0)
+    position = 1
+    # After "[" or "," an entry comes next ("]" only straight after "["); after an entry, "," or "]"
+    expect_entry = True
+    first = True
+    eof = False
+    while True:
+        position = gap(text, position).end()
+        if position == len(text):
+            if eof:
+                raise json.JSONDecodeError("Unterminated word bank", text, position)
+            text = f.read(chunk_size)
+            eof = not text
+            position = 0
+            continue
+        char = text[position]
+        if not expect_entry:
+            if char == "]":
+                break
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, position)
+            position += 1
+            expect_entry = True
+            continue
+        if char == "]":
+            if not first:
+                raise json.JSONDecodeError("Illegal trailing comma before end of array", text, position)
+            break
+        try:
+            entry, position = scan(text, position)
+        except (StopIteration, json.JSONDecodeError):
+            # Ran off the end of the buffer mid-entry: keep the tail and read on
+            if eof:
+                raise json.JSONDecodeError("Unterminated word bank", text, position) from None
+            more = f.read(chunk_size)
+            eof = not more
+            text = text[position:] + more
+            position = 0
+            continue
+        batch.append(entry)
+        first = False
+        comma = next_entry(text, position)
+        if comma is not None:
+            position = comma.end()
+        else:
+            expect_entry = False
+        if len(batch) == BATCH:
+            bank.extend(batch)
+            batch = []
+    # Like json.load, nothing but whitespace may follow the array
+    position = gap(text, position + 1).end()
+    while position == len(text):
+        text = f.read(chunk_size)
+        if not text:
+            break
+        position = gap(text).end()
+    else:
+        raise json.JSONDecodeError("Extra data", text, position)
+    bank.extend(batch)
+    return bank
+
+
+def _format(bank, row):
+    """One row as json.dumps(entry, ensure_ascii=False, indent=2) would lay it out in a list."""
+    if row in bank.extras or row in bank.no_meaning:
+        return json.dumps(Entry(bank, row).to_dict(), ensure_ascii=False, indent=2).replace("\n", "\n  ")
+    return (f'{{\n    "word": {encode_basestring(bank.words[row])},\n'
+            f'    "meaning": {encode_basestring(bank.meanings[row])}\n  }}')
+
+
+def dump_json(entries, f):
+    """Write entries in the same layout as json.dump(entries, f, ensure_ascii=False, indent=2),
+    one entry at a time."""
+    if isinstance(entries, WordBank):
+        bank = entries
+        texts = (_format(bank, row) for row in compress(range(len(bank.alive)), bank.alive))
+    else:
+        texts = (json.dumps(dict(entry), ensure_ascii=False, indent=2).replace("\n", "\n  ")
+                 for entry in entries)
+    first = True
+    for text in texts:
+        f.write("[\n  " if first else ",\n  ")
+        f.write(text)
+        first = False
+    f.write("[]" if first else "\n]")
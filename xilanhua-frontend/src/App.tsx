@@ -81,13 +81,14 @@ const App = () => {
       setLoading(true);
 
       try {
-        const result = await api.recordPronunciation(audioBlob);
-        const matched = result.transcription.toLowerCase() === activeWord?.word.toLowerCase();
+        const result = await api.recordPronunciation(audioBlob, activeWord?.word);
+        const matched = result.matched ?? result.transcription.toLowerCase() === activeWord?.word.toLowerCase();
 
         setAudioResult({
           success: matched,
           transcription: result.transcription,
-          target: activeWord?.word || ''
+          target: activeWord?.word || '',
+          score: result.score
         });
 
       } catch (error) {
@@ -164,6 +165,9 @@ const App = () => {
               <div className="flex flex-col space-y-2">
                 <div>Target: <span className="font-medium">{audioResult.target}</span></div>
                 <div>You said: <span className="font-medium">{audioResult.transcription}</span></div>
+                {audioResult.score !== undefined && (
+                  <div>Score: <span className="font-medium">{Math.round(audioResult.score * 100)}%</span></div>
+                )}
 
                 {audioResult.success ? (
                   <div className="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded mt-2">
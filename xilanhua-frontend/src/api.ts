@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { WordBanks, WordData } from './types';
+import { SearchResult, TranscriptionResult, WordBanks, WordData } from './types';
 
 const API_BASE_URL = 'http://127.0.0.1:8000/api'; 
 
@@ -14,10 +14,7 @@ export const api = {
     return response.data;
   },
 
-  recordPronunciation: async (audioBlob: Blob): Promise<{
-    transcription: string;
-    raw_transcription: string;
-  }> => {
+  recordPronunciation: async (audioBlob: Blob, target?: string): Promise<TranscriptionResult> => {
     try {
       const formData = new FormData();
       formData.append('audio', audioBlob, 'recording.wav');
@@ -26,6 +23,7 @@ export const api = {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
+        params: target ? { target } : undefined,
       });
       return response.data;
     } catch (error) {
@@ -108,4 +106,13 @@ export const api = {
     const response = await axios.delete(`${API_BASE_URL}/words/${level}/${encodeURIComponent(word)}`);
     return response.data;
   },
+  searchWords: async (q: string, level?: string, limit = 20): Promise<{
+    query: string;
+    results: SearchResult[];
+  }> => {
+    const response = await axios.get(`${API_BASE_URL}/words/search`, {
+      params: { q, level, limit },
+    });
+    return response.data;
+  },
 };
\ No newline at end of file
@@ -11,12 +11,21 @@ export interface WordBanks {
 export interface TranscriptionResult {
   transcription: string;
   raw_transcription: string;
+  score?: number;
+  matched?: boolean;
+  closest?: { word: string; score: number }[];
+}
+
+export interface SearchResult extends WordData {
+  level: 'beginner' | 'intermediate';
+  score: number;
 }
 
 export interface AudioResult {
   success: boolean;
   transcription: string;
   target: string;
+  score?: number;
 }
 
 export interface WordItem {
@@ -33,6 +42,7 @@ export interface AudioResult {
   success: boolean;
   transcription: string;
   target: string;
+  score?: number;
 }
 
 export interface AnkiStatus {